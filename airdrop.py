@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Массовая раздача токенов (mint) по CSV с возобновляемым журналом
+
+CSV: колонки address,amount (amount в ALIEN). Все транзакции проверяются,
+подписываются заранее с последовательными nonce, отправляются в несколько
+потоков, а подтверждения ожидаются одним циклом опроса. Каждый шаг
+пишется в журнал JSONL: при повторном запуске уже подтвержденные строки
+пропускаются, отправленные - дожидаются, неотправленные - подписываются заново.
+
+Использование:
+  python airdrop.py recipients.csv --dry-run
+  python airdrop.py recipients.csv --concurrency 8 --urgency fast
+"""
+
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, Inexact, localcontext
+
+from fee_oracle import URGENCIES
+from nonce_manager import is_nonce_error
+
+DECIMALS = 18
+MAX_UINT256 = 2**256 - 1
+
+def to_wei(amount):
+    """
+    Перевести сумму ALIEN из строки в целые wei без потери точности
+
+    Args:
+        amount (str): Сумма в ALIEN (например, "1.5")
+
+    Returns:
+        int: Сумма в wei
+
+    Raises:
+        ValueError: Если сумма бесконечна, NaN или точнее 1 wei
+        ArithmeticError: Если строка не число (decimal.InvalidOperation и др.)
+    """
+    with localcontext() as ctx:
+        # Точности хватает на любой uint256; округление считается ошибкой
+        ctx.prec = 100
+        ctx.traps[Inexact] = True
+        value = Decimal(amount)
+        if not value.is_finite():
+            raise ValueError(f"неверная сумма {amount!r}")
+        value = value.scaleb(DECIMALS)
+        if value != value.to_integral_value():
+            raise ValueError(f"сумма {amount!r} точнее 1 wei")
+        return int(value)
+
+def load_recipients(csv_path):
+    """
+    Прочитать и проверить CSV получателей
+
+    Args:
+        csv_path (str): Путь к CSV с колонками address,amount
+
+    Returns:
+        tuple: (список {"row", "address", "amount_wei"}, список ошибок)
+    """
+    from web3 import Web3
+
+    recipients = []
+    errors = []
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row_number, row in enumerate(csv.DictReader(f), start=2):
+            address = (row.get('address') or '').strip()
+            amount = (row.get('amount') or '').strip()
+            if not Web3.is_address(address):
+                errors.append(f"строка {row_number}: неверный адрес {address!r}")
+                continue
+            try:
+                amount_wei = to_wei(amount)
+            except ValueError as e:
+                errors.append(f"строка {row_number}: {e}")
+                continue
+            except ArithmeticError:
+                # InvalidOperation, Overflow и Inexact из decimal
+                errors.append(f"строка {row_number}: неверная сумма {amount!r}")
+                continue
+            if amount_wei <= 0:
+                errors.append(f"строка {row_number}: сумма должна быть больше 0")
+                continue
+            if amount_wei > MAX_UINT256:
+                errors.append(f"строка {row_number}: сумма {amount!r} больше uint256")
+                continue
+            recipients.append({
+                "row": row_number,
+                "address": Web3.to_checksum_address(address),
+                "amount_wei": amount_wei
+            })
+    return recipients, errors
+
+class Journal:
+    """
+    Журнал раздачи в формате JSONL (только дозапись)
+
+    Состояние строки - последняя запись о ней: signed, sent, confirmed,
+    failed или dropped (nonce занят другой транзакцией, нужна новая подпись).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.state[record["row"]] = {**self.state.get(record["row"], {}), **record}
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, row, status, **fields):
+        record = {"row": row, "status": status, **fields}
+        with self._lock:
+            self.state[row] = {**self.state.get(row, {}), **record}
+            self._file.write(json.dumps(record) + '\n')
+            self._file.flush()
+
+    def status(self, row):
+        return self.state.get(row, {}).get("status")
+
+    def mismatches(self, recipients):
+        """
+        Сверить журнал с текущим CSV
+
+        Журнал ведется по номерам строк: если CSV изменили между запусками,
+        новые получатели были бы пропущены как уже обработанные, а строки,
+        которых больше нет в CSV, отправлены повторно.
+
+        Args:
+            recipients (list): Получатели из load_recipients
+
+        Returns:
+            list: Описания расхождений (пустой список, если журнал совпадает с CSV)
+        """
+        by_row = {recipient["row"]: recipient for recipient in recipients}
+        errors = []
+        for row, entry in sorted(self.state.items()):
+            if "address" not in entry:
+                continue
+            recipient = by_row.get(row)
+            if recipient is None:
+                errors.append(f"строка {row}: есть в журнале ({entry['status']}), но нет в CSV")
+            elif entry["address"].lower() != recipient["address"].lower() or int(entry["amount_wei"]) != recipient["amount_wei"]:
+                errors.append(
+                    f"строка {row}: в журнале {entry['address']} {entry['amount_wei']} wei, "
+                    f"в CSV {recipient['address']} {recipient['amount_wei']} wei"
+                )
+        return errors
+
+    def close(self):
+        self._file.close()
+
+class Airdrop:
+    """
+    Раздача токенов через token_v2.mint с заранее подписанными транзакциями
+    """
+
+    def __init__(self, engine, contract, tracker, journal, concurrency=8, urgency='normal'):
+        self.engine = engine
+        self.contract = contract
+        self.tracker = tracker
+        self.journal = journal
+        self.concurrency = concurrency
+        self.urgency = urgency
+        self.counts = {"confirmed": 0, "failed": 0, "pending": 0}
+        self._mint_gas = None
+
+    def mint_gas(self, recipients):
+        """
+        Лимит газа mint по худшему случаю, одна оценка на запуск
+
+        Оценивается mint максимальной суммы на новый адрес: запись в пустой
+        слот баланса дороже, чем пополнение существующего держателя, а
+        кэшированный профиль мог быть снят с дешевого пути.
+
+        Returns:
+            int: Лимит газа с запасом GasProfile.margin
+        """
+        if self._mint_gas is None:
+            from web3 import Web3
+
+            fresh_address = Web3.to_checksum_address('0x' + os.urandom(20).hex())
+            max_amount = max(recipient["amount_wei"] for recipient in recipients)
+            estimate = self.contract.functions.mint(fresh_address, max_amount).estimate_gas({'from': self.engine.address})
+            self._mint_gas = int(estimate * self.engine.gas_profile.margin)
+        return self._mint_gas
+
+    def sign(self, recipients):
+        """
+        Подписать транзакции для новых строк и строк со статусом dropped
+
+        Строки в статусе signed не подписываются заново: их транзакция могла
+        дойти до узла (например, при таймауте отправки), и новая подпись
+        с другим nonce заминтила бы получателю второй раз. Такие строки
+        сначала отправляются повторно через broadcast().
+
+        Returns:
+            int: Количество подписанных транзакций
+        """
+        signed_count = 0
+        address = self.engine.address
+        for recipient in recipients:
+            if self.journal.status(recipient["row"]) in ('signed', 'sent', 'confirmed', 'failed'):
+                continue
+            nonce = self.engine.nonces.next_nonce(address)
+            try:
+                signed = self.engine.prepare(
+                    self.contract.functions.mint(recipient["address"], recipient["amount_wei"]),
+                    nonce,
+                    gas=self.mint_gas(recipients),
+                    urgency=self.urgency
+                )
+            except Exception:
+                self.engine.nonces.release(address, nonce)
+                raise
+            self.journal.write(
+                recipient["row"],
+                "signed",
+                address=recipient["address"],
+                amount_wei=str(recipient["amount_wei"]),
+                nonce=nonce,
+                tx_hash='0x' + bytes(signed.hash).hex(),
+                raw='0x' + bytes(signed.raw_transaction).hex()
+            )
+            signed_count += 1
+        return signed_count
+
+    def _broadcast(self, row, entry, stop):
+        if stop.is_set():
+            return False
+        try:
+            self.engine.w3.eth.send_raw_transaction(entry["raw"])
+        except Exception as e:
+            if not is_nonce_error(e):
+                # Пропущенный nonce задержит все следующие транзакции - прекращаем отправку
+                stop.set()
+                print(f"❌ Строка {row}: ошибка отправки: {e}")
+                return False
+            if "already known" not in str(e).lower() and not self._is_known(entry["tx_hash"]):
+                # Nonce занят другой транзакцией, а наша не в сети: строку нужно подписать заново
+                self.journal.write(row, "dropped", error=str(e))
+                return False
+        self.journal.write(row, "sent")
+        return True
+
+    def _is_known(self, tx_hash):
+        # Транзакция уже в блоке или ожидает в мемпуле узла
+        eth = self.engine.w3.eth
+        for lookup in (eth.get_transaction_receipt, eth.get_transaction):
+            try:
+                if lookup(tx_hash) is not None:
+                    return True
+            except Exception:
+                continue
+        return False
+
+    def broadcast(self, statuses=('signed', 'sent')):
+        """
+        Отправить подписанные и повторно отправить неподтвержденные транзакции в порядке nonce
+
+        Ответ "already known", транзакция в мемпуле или квитанция по ее хешу
+        означают, что транзакция уже в сети: строка получает статус sent.
+
+        Args:
+            statuses (tuple): Какие строки журнала отправлять
+
+        Returns:
+            list: Номера строк, ожидающих подтверждения
+        """
+        entries = sorted(
+            (
+                (row, entry) for row, entry in self.journal.state.items()
+                if entry.get("status") in statuses
+            ),
+            key=lambda item: item[1]["nonce"]
+        )
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(lambda item: self._broadcast(item[0], item[1], stop), entries))
+        return [row for (row, _), sent in zip(entries, results) if sent]
+
+    def confirm(self, rows, progress_every=100):
+        """
+        Дождаться квитанций отправленных транзакций и записать результат в журнал
+        """
+        futures = {row: self.tracker.track(self.journal.state[row]["tx_hash"]) for row in rows}
+        self.counts["pending"] = len(futures)
+        done = 0
+        for row, future in futures.items():
+            try:
+                receipt = future.result()
+            except Exception as e:
+                # Строка останется в статусе sent и будет проверена при следующем запуске
+                print(f"⚠️ Строка {row}: {e}")
+                continue
+            if receipt.status == 1:
+                self.journal.write(row, "confirmed", block_number=receipt.blockNumber, gas_used=receipt.gasUsed)
+                self.counts["confirmed"] += 1
+            else:
+                self.journal.write(row, "failed", block_number=receipt.blockNumber)
+                self.counts["failed"] += 1
+            self.counts["pending"] -= 1
+            done += 1
+            if done % progress_every == 0:
+                print(f"⏳ Подтверждено {done}/{len(futures)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовая раздача токенов ALIEN по CSV")
+    parser.add_argument('csv', help='CSV с колонками address,amount')
+    parser.add_argument('--journal', help='Журнал прогресса (по умолчанию <csv>.journal.jsonl)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Количество одновременных отправок')
+    parser.add_argument('--urgency', choices=URGENCIES, default='normal', help='Срочность комиссии EIP-1559')
+    parser.add_argument('--dry-run', action='store_true', help='Только проверить CSV')
+    args = parser.parse_args()
+
+    recipients, errors = load_recipients(args.csv)
+    for error in errors:
+        print(f"❌ {error}")
+    if errors:
+        raise SystemExit(f"❌ В CSV {len(errors)} ошибок, раздача не начата")
+
+    total = sum(recipient["amount_wei"] for recipient in recipients)
+    print(f"📋 Получателей: {len(recipients)} | всего: {Decimal(total) / 10**DECIMALS} ALIEN")
+    if args.dry_run:
+        return
+
+    from config import token_v2_contract
+    from history import log_action
+    from receipt_tracker import get_tracker
+    from tx_engine import get_engine
+
+    if not token_v2_contract:
+        raise SystemExit("❌ Улучшенный токен не настроен")
+
+    journal = Journal(args.journal or f"{args.csv}.journal.jsonl")
+    mismatches = journal.mismatches(recipients)
+    if mismatches:
+        journal.close()
+        for mismatch in mismatches:
+            print(f"❌ {mismatch}")
+        raise SystemExit(f"❌ CSV изменился после прошлого запуска ({len(mismatches)} расхождений): верните CSV или начните новый журнал")
+
+    airdrop = Airdrop(get_engine(), token_v2_contract, get_tracker(), journal, args.concurrency, args.urgency)
+    started = time.perf_counter()
+    try:
+        confirmed_before = sum(1 for r in recipients if journal.status(r["row"]) == 'confirmed')
+        if confirmed_before:
+            print(f"↩️ Уже подтверждено в журнале: {confirmed_before}")
+
+        # Сначала транзакции прошлого запуска: подписанные, но, возможно, не отправленные
+        rows = airdrop.broadcast()
+        if rows:
+            print(f"↩️ Повторно отправлено из журнала: {len(rows)}")
+        unsent = [row for row, entry in journal.state.items() if entry.get("status") == 'signed']
+        if unsent:
+            # Новые подписи заняли бы nonce неотправленных транзакций
+            raise SystemExit(f"❌ Не удалось отправить {len(unsent)} ранее подписанных транзакций, повторите запуск")
+
+        signed = airdrop.sign(recipients)
+        print(f"✍️ Подписано транзакций: {signed} ({time.perf_counter() - started:.1f} с)")
+
+        sent = airdrop.broadcast(statuses=('signed',))
+        rows += sent
+        print(f"🚀 Отправлено: {len(sent)} ({time.perf_counter() - started:.1f} с)")
+
+        airdrop.confirm(rows)
+    finally:
+        journal.close()
+
+    counts = airdrop.counts
+    print(f"✅ Подтверждено: {counts['confirmed']} | ❌ провалено: {counts['failed']} | ⏳ ожидают: {counts['pending']}")
+    print(f"⏱️ Время: {time.perf_counter() - started:.1f} с")
+    log_action(
+        "airdrop",
+        amount=float(Decimal(total) / 10**DECIMALS),
+        status="success" if counts["failed"] == 0 and counts["pending"] == 0 else "error"
+    )
+
+if __name__ == "__main__":
+    main()
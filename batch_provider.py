@@ -0,0 +1,144 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from web3 import Web3
+
+class _PendingRequest:
+    """
+    Запрос, ожидающий отправки в составе пакета
+    """
+    __slots__ = ('method', 'params', 'response', 'error', 'done')
+
+    def __init__(self, method, params):
+        self.method = method
+        self.params = params
+        self.response = None
+        self.error = None
+        self.done = threading.Event()
+
+class BatchingHTTPProvider(Web3.HTTPProvider):
+    """
+    HTTP провайдер, объединяющий одновременные запросы в один JSON-RPC пакет
+
+    Первый запрос в окне ждет batch_window секунд, собирает все запросы,
+    пришедшие из других потоков за это время, и отправляет их одним POST.
+    Ответы раздаются обратно вызывающим потокам. При batch_window <= 0
+    провайдер работает как обычный HTTPProvider.
+    """
+
+    def __init__(self, endpoint_uri=None, batch_window=0.0, max_batch_size=50, **kwargs):
+        super().__init__(endpoint_uri, **kwargs)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        # Количество HTTP запросов к RPC (для бенчмарков и диагностики)
+        self.round_trips = 0
+        self._queue = []
+        self._queue_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+
+    def _count_round_trip(self):
+        with self._counter_lock:
+            self.round_trips += 1
+
+    def make_request(self, method, params):
+        if self.batch_window <= 0:
+            self._count_round_trip()
+            return super().make_request(method, params)
+
+        item = _PendingRequest(method, params)
+        with self._queue_lock:
+            self._queue.append(item)
+            is_leader = len(self._queue) == 1
+            is_full = len(self._queue) >= self.max_batch_size
+
+        if is_full:
+            self._flush()
+        elif is_leader:
+            # Даем другим потокам время добавить свои запросы
+            time.sleep(self.batch_window)
+            self._flush()
+
+        item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.response
+
+    def make_batch_request(self, batch_requests):
+        self._count_round_trip()
+        return super().make_batch_request(batch_requests)
+
+    def _flush(self):
+        with self._queue_lock:
+            batch, self._queue = self._queue, []
+
+        if not batch:
+            return
+
+        try:
+            if len(batch) == 1:
+                self._count_round_trip()
+                responses = [super().make_request(batch[0].method, batch[0].params)]
+            else:
+                responses = self.make_batch_request([(i.method, i.params) for i in batch])
+                if isinstance(responses, dict):
+                    # RPC вернул одну ошибку на весь пакет
+                    responses = [responses] * len(batch)
+            if len(responses) != len(batch):
+                raise ConnectionError(f"RPC вернул {len(responses)} ответов на пакет из {len(batch)} запросов")
+        except Exception as e:
+            for item in batch:
+                item.error = e
+                item.done.set()
+            return
+
+        for item, response in zip(batch, responses):
+            item.response = response
+            item.done.set()
+
+def send_batch(provider, requests):
+    """
+    Выполнить несколько JSON-RPC запросов одним пакетом
+
+    Если провайдер не поддерживает пакеты (или запрос один), запросы
+    выполняются последовательно.
+
+    Args:
+        provider: Провайдер web3 (w3.provider)
+        requests (list): Пары (метод, параметры)
+
+    Returns:
+        list: Ответы JSON-RPC в порядке requests
+
+    Raises:
+        ConnectionError: Если RPC отклонил весь пакет одной ошибкой
+    """
+    if hasattr(provider, 'make_batch_request') and len(requests) > 1:
+        responses = provider.make_batch_request(requests)
+        if isinstance(responses, dict):
+            raise ConnectionError(f"RPC отклонил пакетный запрос: {responses.get('error')}")
+        return responses
+    return [provider.make_request(method, params) for method, params in requests]
+
+def gather_calls(calls, max_workers=16):
+    """
+    Выполнить независимые вызовы параллельно, чтобы провайдер объединил их в пакет
+
+    Args:
+        calls (dict): Имя -> функция без аргументов
+        max_workers (int): Максимум одновременных вызовов
+
+    Returns:
+        dict: Имя -> результат или исключение, если вызов упал
+    """
+    def _safe(fn):
+        try:
+            return fn()
+        except Exception as e:
+            return e
+
+    if not calls:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as pool:
+        futures = {name: pool.submit(_safe, fn) for name, fn in calls.items()}
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Бенчмарки производительности ALIEN Presale Bot
+
+Бенчмарки, зависящие от переменных окружения (RPC_BATCH_WINDOW_MS и т.д.),
+запускаются в отдельном процессе, чтобы настройки применялись к свежему config.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def run_isolated(code, env_overrides=None):
+    """
+    Выполнить код в отдельном интерпретаторе и вернуть его JSON вывод
+
+    Args:
+        code (str): Python код, последней строкой печатающий JSON
+        env_overrides (dict): Дополнительные переменные окружения
+
+    Returns:
+        dict: Результат, напечатанный дочерним процессом
+    """
+    env = {**os.environ, **(env_overrides or {})}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+RPC_BATCH_CODE = """
+import contextlib, io, json, time
+import config
+import check_token_balance
+before = config.w3.provider.round_trips
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    check_token_balance.check_token_contract_balance()
+elapsed = time.perf_counter() - start
+print(json.dumps({"round_trips": config.w3.provider.round_trips - before, "seconds": elapsed}))
+"""
+
+def bench_rpc_batch(args):
+    """
+    Количество HTTP запросов check_token_balance с пакетным провайдером и без
+    """
+    print(f"📡 check_token_balance: round-trips к RPC")
+    print("-" * 50)
+    for window_ms in (0, args.window_ms):
+        result = run_isolated(RPC_BATCH_CODE, {"RPC_BATCH_WINDOW_MS": str(window_ms)})
+        mode = "без пакетов" if window_ms == 0 else f"окно {window_ms} мс"
+        print(f"{mode:>14}: {result['round_trips']:>3} запросов | {result['seconds']:.3f} с")
+
+STARTUP_CODE = """
+import json, time
+start = time.perf_counter()
+{body}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+# Что нужно каждой подкоманде bot.py до первого обращения к сети
+STARTUP_SCENARIOS = {
+    "history": "import bot",
+    "stats": "import bot",
+    "balance": "import bot, token_utils, config; config.token_contract",
+    "balances": "import bot, token_utils, multicall, config; config.token_contract",
+    "buy": "import bot, token_utils, presale, config; config.presale_contract",
+    "claim": "import bot, presale, config; config.presale_contract",
+    "info": "import bot, presale, config; config.presale_contract",
+    "withdraw": "import bot, presale, config; config.presale_contract",
+    "pause": "import bot, presale, config; config.presale_contract"
+}
+
+# Прежний config: web3, все ABI и контракты создавались при импорте
+EAGER_STARTUP = (
+    "import bot, token_utils, presale, config; "
+    "config.TOKEN_V2_ABI, config.PRESALE_ABI, config.token_contract, "
+    "config.token_v2_contract, config.presale_contract"
+)
+
+# Неотвечающий адрес: офлайн команды не должны к нему обращаться
+BLACKHOLE_RPC = "http://10.255.255.1:8545"
+
+def bench_startup(args):
+    """
+    Время запуска каждой подкоманды bot.py до первого сетевого запроса
+    """
+    env = {"RPC_URL": BLACKHOLE_RPC}
+
+    def best_of(code):
+        return min(run_isolated(STARTUP_CODE.format(body=code), env)["seconds"] for _ in range(args.repeat))
+
+    print(f"🚀 Запуск bot.py (лучшее из {args.repeat}, RPC_URL={BLACKHOLE_RPC})")
+    print("-" * 50)
+    eager = best_of(EAGER_STARTUP)
+    for command, code in STARTUP_SCENARIOS.items():
+        print(f"{command:>10}: {best_of(code) * 1000:8.1f} мс")
+    print(f"{'eager':>10}: {eager * 1000:8.1f} мс (все ABI и контракты при импорте, без is_connected)")
+
+def bench_history(args):
+    """
+    Задержка одной записи history.log_action на большом журнале
+    """
+    import contextlib
+    import io
+    import tempfile
+    import time
+    import history
+
+    latencies = []
+    with tempfile.TemporaryDirectory() as tmp:
+        history.HISTORY_FILE = os.path.join(tmp, 'history.csv')
+        with contextlib.redirect_stdout(io.StringIO()) as sink:
+            for i in range(args.count):
+                start = time.perf_counter()
+                history.log_action("buy", tx_hash=f"0x{i:064x}", amount=0.1, status="success")
+                latencies.append(time.perf_counter() - start)
+                # Не копим вывод log_action в памяти
+                sink.seek(0)
+                sink.truncate()
+
+    latencies_sorted = sorted(latencies)
+    chunk = max(1, args.count // 100)
+
+    def percentile(p):
+        return latencies_sorted[min(len(latencies_sorted) - 1, int(len(latencies_sorted) * p))] * 1e6
+
+    print(f"📝 history.log_action: {args.count:,} записей")
+    print("-" * 50)
+    print(f"среднее: {sum(latencies) / len(latencies) * 1e6:8.1f} мкс")
+    print(f"    p50: {percentile(0.50):8.1f} мкс")
+    print(f"    p99: {percentile(0.99):8.1f} мкс")
+    print(f"  макс.: {latencies_sorted[-1] * 1e6:8.1f} мкс")
+    print(f"первые {chunk:,}: {sum(latencies[:chunk]) / chunk * 1e6:8.1f} мкс в среднем")
+    print(f"последние {chunk:,}: {sum(latencies[-chunk:]) / chunk * 1e6:8.1f} мкс в среднем")
+
+def bench_tx(args):
+    """
+    Задержка подготовки (nonce, комиссия, сборка, подпись) и отправки транзакций
+    """
+    import time
+    from collections import defaultdict
+    from web3 import Web3
+    from config import w3, token_contract, WALLET_ADDRESS, PRIVATE_KEY
+    from tx_engine import STAGES, TransactionEngine
+
+    engine = TransactionEngine(w3, PRIVATE_KEY)
+    stages = defaultdict(list)
+    engine.add_hook(lambda stage, seconds: stages[stage].append(seconds))
+    # Перевод 0 токенов самому себе: безопасная транзакция для замера
+    call = token_contract.functions.transfer(engine.address, 0)
+
+    def legacy_prepare(nonce_offset):
+        # Прежний код: ключ, адрес, nonce и цена газа заново для каждой транзакции
+        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
+        nonce = w3.eth.get_transaction_count(wallet_address) + nonce_offset
+        transaction = call.build_transaction({
+            'from': wallet_address,
+            'nonce': nonce,
+            'gas': 60000,
+            'gasPrice': w3.eth.gas_price
+        })
+        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
+        return w3.eth.account.sign_transaction(transaction, private_key_with_0x)
+
+    start = time.perf_counter()
+    for i in range(args.count):
+        legacy_prepare(i)
+    legacy = (time.perf_counter() - start) / args.count
+
+    start = time.perf_counter()
+    for i in range(args.count):
+        if args.send:
+            engine.send(call)
+        else:
+            engine.prepare(call, engine.nonces.next_nonce(engine.address))
+    pipeline = (time.perf_counter() - start) / args.count
+
+    mode = "подпись и отправка" if args.send else "подпись без отправки"
+    print(f"✍️ Конвейер транзакций: {args.count} транзакций ({mode})")
+    print("-" * 50)
+    print(f"{'прежний код':>12}: {legacy * 1000:8.2f} мс на транзакцию (без отправки)")
+    print(f"{'tx_engine':>12}: {pipeline * 1000:8.2f} мс на транзакцию")
+    for stage in STAGES:
+        if stages[stage]:
+            print(f"{stage:>12}: {sum(stages[stage]) / len(stages[stage]) * 1000:8.2f} мс в среднем")
+
+def bench_holders(args):
+    """
+    Пересчет балансов держателей по переводам: Decimal в цикле против целых wei
+    """
+    import random
+    import time
+    from decimal import Decimal, getcontext
+    from list_holders import ZERO_ADDRESS, apply_transfers
+
+    rng = random.Random(42)
+    holders = [f"0x{rng.getrandbits(160):040x}" for _ in range(args.holders)]
+    # Сначала минт всем держателям, затем случайные переводы частей баланса
+    transfers = [{"from": ZERO_ADDRESS, "to": h, "value": str(10**30)} for h in holders]
+    for _ in range(args.count - len(transfers)):
+        transfers.append({
+            "from": rng.choice(holders),
+            "to": rng.choice(holders),
+            "value": str(rng.randrange(1, 10**21))
+        })
+
+    def legacy_replay():
+        # Прежний код list_holders: Decimal с точностью 50 и деление на 10**18 на каждый перевод
+        getcontext().prec = 50
+        balances = {}
+        for tx in transfers:
+            frm = tx["from"].lower()
+            to = tx["to"].lower()
+            value = Decimal(tx["value"]) / (Decimal(10) ** 18)
+            if value == 0:
+                continue
+            if frm != ZERO_ADDRESS:
+                balances[frm] = balances.get(frm, Decimal(0)) - value
+            balances[to] = balances.get(to, Decimal(0)) + value
+        return {a: b for a, b in balances.items() if b > Decimal(0)}
+
+    start = time.perf_counter()
+    legacy = legacy_replay()
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    balances = apply_transfers({}, transfers)
+    balances = {a: b for a, b in balances.items() if b > 0}
+    integer_seconds = time.perf_counter() - start
+
+    same = legacy.keys() == balances.keys() and all(
+        legacy[a] == Decimal(b) / (Decimal(10) ** 18) for a, b in balances.items()
+    )
+    print(f"👥 Пересчет балансов: {len(transfers):,} переводов, {args.holders:,} держателей")
+    print("-" * 50)
+    print(f"{'Decimal':>10}: {legacy_seconds:8.2f} с")
+    print(f"{'int wei':>10}: {integer_seconds:8.2f} с (x{legacy_seconds / integer_seconds:.1f})")
+    print(f"{'итоги':>10}: {'совпадают' if same else 'РАЗЛИЧАЮТСЯ'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки ALIEN Presale Bot")
+    subparsers = parser.add_subparsers(dest='command', help='Доступные бенчмарки')
+
+    rpc_batch_parser = subparsers.add_parser('rpc-batch', help='Пакетирование JSON-RPC в check_token_balance')
+    rpc_batch_parser.add_argument('--window-ms', type=float, default=20, help='Окно сбора пакета в мс')
+
+    startup_parser = subparsers.add_parser('startup', help='Время запуска подкоманд bot.py')
+    startup_parser.add_argument('--repeat', type=int, default=5, help='Количество повторов')
+
+    history_parser = subparsers.add_parser('history', help='Задержка записи в историю действий')
+    history_parser.add_argument('--count', type=int, default=100_000, help='Количество записей')
+
+    tx_parser = subparsers.add_parser('tx', help='Задержка подписи и отправки транзакций')
+    tx_parser.add_argument('--count', type=int, default=20, help='Количество транзакций')
+    tx_parser.add_argument('--send', action='store_true', help='Отправлять транзакции (перевод 0 токенов себе, тратит газ)')
+
+    holders_parser = subparsers.add_parser('holders', help='Пересчет балансов держателей по переводам')
+    holders_parser.add_argument('--count', type=int, default=1_000_000, help='Количество переводов')
+    holders_parser.add_argument('--holders', type=int, default=10_000, help='Количество держателей')
+
+    args = parser.parse_args()
+
+    if args.command == 'rpc-batch':
+        bench_rpc_batch(args)
+    elif args.command == 'startup':
+        bench_startup(args)
+    elif args.command == 'history':
+        bench_history(args)
+    elif args.command == 'tx':
+        bench_tx(args)
+    elif args.command == 'holders':
+        bench_holders(args)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import chain_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS block_timestamps (
+    -- chain.db общий для всех RPC_URL: номера блоков разных сетей не пересекаются по смыслу
+    chain_id INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    PRIMARY KEY (chain_id, number)
+);
+CREATE INDEX IF NOT EXISTS idx_block_timestamps_timestamp ON block_timestamps(chain_id, timestamp);
+"""
+
+# Ограничение SQLite на количество параметров в одном запросе
+_SQL_CHUNK = 500
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+class BlockTimestampCache:
+    """
+    Постоянный кэш номер блока -> timestamp в chain.db
+
+    Время блока не меняется, поэтому повторные отчеты не запрашивают
+    его у сети повторно. Записи разделены по chain id сети.
+    """
+
+    def __init__(self, chain_id, db_path=None):
+        self.chain_id = int(chain_id)
+        self.conn = chain_db.connect(db_path)
+        columns = [row["name"] for row in self.conn.execute("PRAGMA table_info(block_timestamps)")]
+        if columns and "chain_id" not in columns:
+            # Кэш старого формата без chain id: сеть записей неизвестна, заполнится заново
+            with self.conn:
+                self.conn.execute("DROP TABLE block_timestamps")
+        self.conn.executescript(SCHEMA)
+        # Сколько блоков пришлось запросить у сети при последнем resolve
+        self.last_fetched = 0
+
+    def get_many(self, numbers):
+        """
+        Получить закэшированные timestamp
+
+        Args:
+            numbers (list): Номера блоков
+
+        Returns:
+            dict: Номер блока -> timestamp (только найденные в кэше)
+        """
+        found = {}
+        for chunk in _chunks(list(numbers), _SQL_CHUNK):
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT number, timestamp FROM block_timestamps WHERE chain_id = ? AND number IN ({placeholders})",
+                [self.chain_id, *chunk]
+            ).fetchall()
+            found.update({row["number"]: row["timestamp"] for row in rows})
+        return found
+
+    def put_many(self, timestamps):
+        """
+        Сохранить timestamp блоков
+
+        Args:
+            timestamps (dict): Номер блока -> timestamp
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO block_timestamps (chain_id, number, timestamp) VALUES (?, ?, ?)",
+                [(self.chain_id, number, timestamp) for number, timestamp in timestamps.items()]
+            )
+
+    def resolve(self, numbers, fetch_many, batch_size=100):
+        """
+        Получить timestamp для списка блоков, запрашивая у сети только недостающие
+
+        Args:
+            numbers (iterable): Номера блоков (могут повторяться)
+            fetch_many (callable): fetch_many(list номеров) -> dict номер -> timestamp
+            batch_size (int): Сколько блоков запрашивать за один пакет
+
+        Returns:
+            dict: Номер блока -> timestamp
+        """
+        unique = sorted(set(numbers))
+        result = self.get_many(unique)
+        missing = [n for n in unique if n not in result]
+
+        self.last_fetched = len(missing)
+        for chunk in _chunks(missing, batch_size):
+            fetched = fetch_many(chunk)
+            self.put_many(fetched)
+            result.update(fetched)
+        return result
+
+    def _anchor_below(self, target_ts):
+        # Ближайший известный блок строго раньше target_ts
+        return self.conn.execute(
+            "SELECT number, timestamp FROM block_timestamps WHERE chain_id = ? AND timestamp < ? "
+            "ORDER BY timestamp DESC, number DESC LIMIT 1",
+            (self.chain_id, target_ts)
+        ).fetchone()
+
+    def _anchor_above(self, target_ts):
+        # Первый известный блок с timestamp >= target_ts
+        return self.conn.execute(
+            "SELECT number, timestamp FROM block_timestamps WHERE chain_id = ? AND timestamp >= ? "
+            "ORDER BY timestamp, number LIMIT 1",
+            (self.chain_id, target_ts)
+        ).fetchone()
+
+    def find_block(self, target_ts, get_block):
+        """
+        Найти первый блок с timestamp >= target_ts
+
+        Поиск начинается с ближайших известных блоков из кэша (якорей) и
+        угадывает номер по среднему времени блока между ними (секущая).
+        Если шаг интерполяции сократил интервал меньше чем вдвое, следующий
+        шаг делается бисекцией, поэтому запросов не больше, чем у двоичного
+        поиска, умноженного на два. Каждый полученный блок сохраняется как
+        новый якорь, и повторные поиски рядом обходятся 0-2 запросами.
+
+        Args:
+            target_ts (int): Искомое время (unix timestamp)
+            get_block (callable): get_block(номер или 'latest') -> блок с number и timestamp
+                (например, w3.eth.get_block)
+
+        Returns:
+            int: Номер блока (текущий блок, если target_ts еще не наступил)
+        """
+        self.last_fetched = 0
+
+        def fetch(identifier):
+            block = get_block(identifier)
+            self.last_fetched += 1
+            self.put_many({block['number']: block['timestamp']})
+            return block['number'], block['timestamp']
+
+        upper = self._anchor_above(target_ts)
+        if upper is None:
+            hi, hi_ts = fetch('latest')
+            if hi_ts < target_ts:
+                return hi
+        else:
+            hi, hi_ts = upper["number"], upper["timestamp"]
+
+        lower = self._anchor_below(target_ts)
+        if lower is None or lower["number"] >= hi:
+            lo, lo_ts = fetch(0)
+            if lo_ts >= target_ts:
+                return lo
+        else:
+            lo, lo_ts = lower["number"], lower["timestamp"]
+
+        # Инвариант: lo_ts < target_ts <= hi_ts
+        bisect_next = False
+        while hi - lo > 1:
+            span = hi - lo
+            if bisect_next or hi_ts == lo_ts:
+                guess = (lo + hi) // 2
+            else:
+                guess = lo + round((target_ts - lo_ts) * span / (hi_ts - lo_ts))
+            guess = min(hi - 1, max(lo + 1, guess))
+
+            number, ts = fetch(guess)
+            if ts < target_ts:
+                lo, lo_ts = number, ts
+            else:
+                hi, hi_ts = number, ts
+            bisect_next = (hi - lo) * 2 > span
+        return hi
+
+    def close(self):
+        self.conn.close()
+
+def fetch_block_timestamps_rpc(w3, numbers):
+    """
+    Получить timestamp блоков одним пакетным JSON-RPC запросом
+
+    Args:
+        w3: Экземпляр Web3
+        numbers (list): Номера блоков
+
+    Returns:
+        dict: Номер блока -> timestamp
+    """
+    from batch_provider import send_batch
+
+    requests = [('eth_getBlockByNumber', [hex(n), False]) for n in numbers]
+    responses = send_batch(w3.provider, requests)
+
+    timestamps = {}
+    for number, response in zip(numbers, responses):
+        block = response.get('result')
+        if not block:
+            raise ValueError(f"Не удалось получить блок {number}: {response.get('error')}")
+        timestamps[number] = int(block['timestamp'], 16)
+    return timestamps
@@ -5,12 +5,14 @@ ALIEN Presale Bot - CLI интерфейс
 
 import argparse
 import sys
-from web3 import Web3
 
-from config import w3, WALLET_ADDRESS
-from token_utils import get_matic_balance, get_token_balance, format_balance
-from presale import buy_tokens, claim_tokens, get_presale_info, wait_for_transaction, withdraw_funds, withdraw_unsold_tokens, pause_presale
-from history import log_action, print_history, get_statistics
+from config import WALLET_ADDRESS
+from history import log_action, print_history, get_statistics, check_statistics
+from fee_oracle import URGENCIES
+
+# Команды, которые не обращаются к блокчейну: для них не импортируем
+# web3/контракты и не проверяем подключение к RPC
+OFFLINE_COMMANDS = ('history', 'stats')
 
 def check_balance(address=None):
     """
@@ -19,6 +21,8 @@ def check_balance(address=None):
     Args:
         address (str): Адрес для проверки (опционально)
     """
+    from token_utils import get_matic_balance, get_token_balance, format_balance
+    
     try:
         # Получаем балансы
         matic_balance = get_matic_balance(address)
@@ -38,13 +42,70 @@ def check_balance(address=None):
         print(f"❌ Ошибка при проверке баланса: {str(e)}")
         log_action("balance", address=address or WALLET_ADDRESS, status="error")
 
-def buy_tokens_cli(amount):
+def export_balances(path, fmt='csv', output=None, chunk_size=500, workers=4):
+    """
+    Выгрузить балансы MATIC и ALIEN для адресов из файла
+    
+    Args:
+        path (str): Файл с адресами (по одному в строке или CSV с адресом в первой колонке)
+        fmt (str): Формат вывода: csv или jsonl
+        output (str): Файл результата (по умолчанию stdout)
+        chunk_size (int): Адресов в одном пакетном чтении
+        workers (int): Количество одновременных пакетных чтений
+    """
+    import contextlib
+    import csv
+    import json
+    import time
+    from token_utils import read_addresses, get_balances, format_wei
+    
+    addresses, invalid = read_addresses(path)
+    for line in invalid:
+        print(f"⚠️ Неверный адрес, пропущен: {line}", file=sys.stderr)
+    
+    out = open(output, 'w', newline='', encoding='utf-8') if output else sys.stdout
+    started = time.perf_counter()
+    count = 0
+    try:
+        writer = None
+        if fmt == 'csv':
+            writer = csv.writer(out)
+            writer.writerow(['address', 'matic', 'alien', 'block'])
+        
+        # Строки пишутся по мере готовности чанков, без накопления в памяти
+        for row in get_balances(addresses, chunk_size=chunk_size, workers=workers):
+            matic = format_wei(row["matic_wei"])
+            alien = format_wei(row["alien_wei"])
+            if writer:
+                writer.writerow([row["address"], matic, alien, row["block"]])
+            else:
+                out.write(json.dumps({"address": row["address"], "matic": matic, "alien": alien, "block": row["block"]}) + "\n")
+            count += 1
+        
+        print(f"✅ Балансы {count} адресов за {time.perf_counter() - started:.1f} с", file=sys.stderr)
+        status = "success"
+    except Exception as e:
+        print(f"❌ Ошибка при выгрузке балансов: {str(e)}", file=sys.stderr)
+        status = "error"
+    finally:
+        if output:
+            out.close()
+    
+    # Сообщения истории не должны попадать в поток данных на stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        log_action("balances", amount=count, status=status)
+
+def buy_tokens_cli(amount, urgency='normal'):
     """
     Купить токены ALIEN
     
     Args:
         amount (float): Количество MATIC для покупки
+        urgency (str): Срочность комиссии: slow, normal или fast
     """
+    from token_utils import get_matic_balance
+    from presale import buy_tokens, wait_for_transaction
+    
     try:
         print(f"\n🛒 Покупка токенов ALIEN за {amount} MATIC...")
         
@@ -55,7 +116,7 @@ def buy_tokens_cli(amount):
             return
         
         # Выполняем покупку
-        tx_hash = buy_tokens(amount)
+        tx_hash = buy_tokens(amount, urgency)
         print(f"✅ Транзакция отправлена: {tx_hash}")
         
         # Ждем подтверждения
@@ -73,15 +134,20 @@ def buy_tokens_cli(amount):
         print(f"❌ Ошибка при покупке токенов: {str(e)}")
         log_action("buy", amount=amount, status="error")
 
-def claim_tokens_cli():
+def claim_tokens_cli(urgency='normal'):
     """
     Забрать купленные токены
+    
+    Args:
+        urgency (str): Срочность комиссии: slow, normal или fast
     """
+    from presale import claim_tokens, wait_for_transaction
+    
     try:
         print("\n🎁 Забираем купленные токены...")
         
         # Выполняем claim
-        tx_hash = claim_tokens()
+        tx_hash = claim_tokens(urgency)
         print(f"✅ Транзакция отправлена: {tx_hash}")
         
         # Ждем подтверждения
@@ -108,10 +174,19 @@ def show_history(limit=10):
     """
     print_history(limit)
 
-def show_stats():
+def show_stats(verify=False):
     """
     Показать статистику
+    
+    Args:
+        verify (bool): Сверить накопленную статистику с журналом и пересобрать при расхождении
     """
+    if verify:
+        if check_statistics(rebuild=True):
+            print("✅ Накопленная статистика совпадает с журналом")
+        else:
+            print("🔧 Статистика расходилась с журналом и была пересобрана")
+    
     stats = get_statistics()
     
     print("\n📊 Статистика действий:")
@@ -139,7 +214,9 @@ def main():
 Примеры использования:
   python bot.py balance                    # Проверить баланс
   python bot.py balance --address 0x123   # Проверить баланс другого адреса
+  python bot.py balances --file addresses.txt --output balances.csv  # Балансы многих адресов
   python bot.py buy --amount 1            # Купить токены за 1 MATIC
+  python bot.py buy --amount 1 --urgency fast  # Купить с повышенной комиссией
   python bot.py claim                     # Забрать купленные токены
   python bot.py history                   # Показать историю
   python bot.py stats                     # Показать статистику
@@ -152,19 +229,30 @@ def main():
     balance_parser = subparsers.add_parser('balance', help='Проверить баланс')
     balance_parser.add_argument('--address', help='Адрес для проверки (по умолчанию используется WALLET_ADDRESS)')
     
+    # Команда balances
+    balances_parser = subparsers.add_parser('balances', help='Балансы многих адресов из файла')
+    balances_parser.add_argument('--file', required=True, help='Файл с адресами (по одному в строке или CSV)')
+    balances_parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='Формат вывода')
+    balances_parser.add_argument('--output', help='Файл результата (по умолчанию stdout)')
+    balances_parser.add_argument('--chunk-size', type=int, default=500, help='Адресов в одном пакетном чтении')
+    balances_parser.add_argument('--workers', type=int, default=4, help='Количество одновременных пакетных чтений')
+    
     # Команда buy
     buy_parser = subparsers.add_parser('buy', help='Купить токены ALIEN')
     buy_parser.add_argument('--amount', type=float, required=True, help='Количество MATIC для покупки')
+    buy_parser.add_argument('--urgency', choices=URGENCIES, default='normal', help='Срочность комиссии EIP-1559')
     
     # Команда claim
-    subparsers.add_parser('claim', help='Забрать купленные токены')
+    claim_parser = subparsers.add_parser('claim', help='Забрать купленные токены')
+    claim_parser.add_argument('--urgency', choices=URGENCIES, default='normal', help='Срочность комиссии EIP-1559')
     
     # Команда history
     history_parser = subparsers.add_parser('history', help='Показать историю действий')
     history_parser.add_argument('--limit', type=int, default=10, help='Количество последних записей')
     
     # Команда stats
-    subparsers.add_parser('stats', help='Показать статистику')
+    stats_parser = subparsers.add_parser('stats', help='Показать статистику')
+    stats_parser.add_argument('--verify', action='store_true', help='Сверить статистику с журналом и пересобрать при расхождении')
     
     # Команда info
     subparsers.add_parser('info', help='Информация о пресейле')
@@ -183,29 +271,37 @@ def main():
         return
     
     try:
-        # Проверяем подключение к сети
-        if not w3.is_connected():
-            print("❌ Не удалось подключиться к Polygon RPC")
-            sys.exit(1)
+        # Проверяем подключение к сети только для команд, работающих с блокчейном
+        if args.command not in OFFLINE_COMMANDS:
+            from config import check_connection
+            try:
+                check_connection()
+            except ConnectionError:
+                print("❌ Не удалось подключиться к Polygon RPC")
+                sys.exit(1)
         
         # Выполняем команды
         if args.command == 'balance':
             check_balance(args.address)
+        elif args.command == 'balances':
+            export_balances(args.file, args.format, args.output, args.chunk_size, args.workers)
         elif args.command == 'buy':
-            buy_tokens_cli(args.amount)
+            buy_tokens_cli(args.amount, args.urgency)
         elif args.command == 'claim':
-            claim_tokens_cli()
+            claim_tokens_cli(args.urgency)
         elif args.command == 'history':
             show_history(args.limit)
         elif args.command == 'stats':
-            show_stats()
+            show_stats(args.verify)
         elif args.command == 'info':
+            from presale import get_presale_info
             info = get_presale_info()
             print(f"\n📋 Информация о пресейле:")
             print("-" * 30)
             for key, value in info.items():
                 print(f"{key}: {value}")
         elif args.command == 'withdraw':
+            from presale import withdraw_funds, withdraw_unsold_tokens, wait_for_transaction
             if args.type == 'funds':
                 print("\n💰 Забираем собранные MATIC...")
                 tx_hash = withdraw_funds()
@@ -231,6 +327,7 @@ def main():
                     print(f"❌ Ошибка: {result.get('error', 'Неизвестная ошибка')}")
                     log_action("withdraw_tokens", tx_hash=tx_hash, status="error")
         elif args.command == 'pause':
+            from presale import pause_presale, wait_for_transaction
             status_text = "приостановлен" if args.status else "возобновлен"
             print(f"\n⏸️ Пресейл {status_text}...")
             tx_hash = pause_presale(args.status)
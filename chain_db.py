@@ -0,0 +1,21 @@
+import os
+import sqlite3
+
+# Локальная база с данными блокчейна (индекс событий, кэши блоков и т.д.)
+CHAIN_DB = os.getenv('CHAIN_DB', 'chain.db')
+
+def connect(db_path=None):
+    """
+    Открыть локальную базу данных блокчейна
+
+    Args:
+        db_path (str): Путь к базе. Если None, используется CHAIN_DB
+
+    Returns:
+        sqlite3.Connection: Соединение с базой
+    """
+    conn = sqlite3.connect(db_path or CHAIN_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+    # WAL позволяет читать данные, пока другой процесс синхронизирует индекс
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from config import w3, TOKEN_ADDRESS, TOKEN_V2_ABI
 from token_utils import get_token_balance, get_matic_balance
+from batch_provider import gather_calls
 from web3 import Web3
 
 def check_token_contract_balance():
@@ -31,12 +32,41 @@ def check_token_contract_balance():
         print(f"🔗 Polygonscan: https://polygonscan.com/address/{token_address}")
         print()
         
+        presale_address = "0x2699838c090346Eaf93F96069B56B3637828dFAC"
+        presale_checksum = Web3.to_checksum_address(presale_address)
+        from config import WALLET_ADDRESS
+        wallet_checksum = Web3.to_checksum_address(WALLET_ADDRESS) if WALLET_ADDRESS else None
+        
+        # Независимые чтения запускаем параллельно: пакетный провайдер
+        # (RPC_BATCH_WINDOW_MS) объединяет их в один JSON-RPC запрос
+        reads = {
+            "name": token_contract.functions.name().call,
+            "symbol": token_contract.functions.symbol().call,
+            "decimals": token_contract.functions.decimals().call,
+            "total_supply": token_contract.functions.totalSupply().call,
+            "presale_balance": token_contract.functions.balanceOf(presale_checksum).call,
+            "owner": token_contract.functions.owner().call,
+            "paused": token_contract.functions.paused().call,
+            "chain_id": lambda: w3.eth.chain_id,
+            "block_number": lambda: w3.eth.block_number
+        }
+        if wallet_checksum:
+            reads["user_balance"] = token_contract.functions.balanceOf(wallet_checksum).call
+            reads["allowance"] = token_contract.functions.allowance(wallet_checksum, presale_checksum).call
+        results = gather_calls(reads)
+        
+        # Баланс владельца зависит от результата owner() - второй пакет
+        owner = results["owner"]
+        if not isinstance(owner, Exception):
+            results.update(gather_calls({
+                "owner_balance": token_contract.functions.balanceOf(owner).call
+            }))
+        
         # Получаем общую информацию о токене
-        try:
-            name = token_contract.functions.name().call()
-            symbol = token_contract.functions.symbol().call()
-            decimals = token_contract.functions.decimals().call()
-            total_supply = token_contract.functions.totalSupply().call()
+        token_info = [results[k] for k in ("name", "symbol", "decimals", "total_supply")]
+        token_error = next((r for r in token_info if isinstance(r, Exception)), None)
+        if token_error is None:
+            name, symbol, decimals, total_supply = token_info
             
             print(f"📋 Информация о токене:")
             print(f"   Название: {name}")
@@ -45,15 +75,14 @@ def check_token_contract_balance():
             print(f"   Общее предложение: {total_supply:,} {symbol}")
             print()
             
-        except Exception as e:
-            print(f"⚠️  Ошибка получения информации о токене: {e}")
+        else:
+            print(f"⚠️  Ошибка получения информации о токене: {token_error}")
             print()
         
         # Проверяем баланс на пресейле
-        presale_address = "0x2699838c090346Eaf93F96069B56B3637828dFAC"
-        presale_balance = token_contract.functions.balanceOf(
-            Web3.to_checksum_address(presale_address)
-        ).call()
+        presale_balance = results["presale_balance"]
+        if isinstance(presale_balance, Exception):
+            raise presale_balance
         
         print(f"💰 Баланс токенов на пресейле:")
         print(f"   Адрес пресейла: {presale_address}")
@@ -61,67 +90,57 @@ def check_token_contract_balance():
         print()
         
         # Проверяем баланс у владельца (если есть функция owner)
-        try:
-            owner = token_contract.functions.owner().call()
-            owner_balance = token_contract.functions.balanceOf(owner).call()
-            
+        owner_balance = owner if isinstance(owner, Exception) else results["owner_balance"]
+        if not isinstance(owner_balance, Exception):
             print(f"👑 Баланс у владельца:")
             print(f"   Адрес владельца: {owner}")
             print(f"   Баланс: {owner_balance:,} ALIEN")
             print()
             
-        except Exception as e:
-            print(f"⚠️  Не удалось получить информацию о владельце: {e}")
+        else:
+            print(f"⚠️  Не удалось получить информацию о владельце: {owner_balance}")
             print()
         
         # Проверяем баланс у пользователя (если указан в .env)
-        try:
-            from config import WALLET_ADDRESS
-            if WALLET_ADDRESS:
-                user_balance = token_contract.functions.balanceOf(
-                    Web3.to_checksum_address(WALLET_ADDRESS)
-                ).call()
-                
+        if wallet_checksum:
+            user_balance = results["user_balance"]
+            if not isinstance(user_balance, Exception):
                 print(f"👤 Баланс у пользователя:")
                 print(f"   Адрес: {WALLET_ADDRESS}")
                 print(f"   Баланс: {user_balance:,} ALIEN")
                 print()
                 
-        except Exception as e:
-            print(f"⚠️  Не удалось получить баланс пользователя: {e}")
-            print()
+            else:
+                print(f"⚠️  Не удалось получить баланс пользователя: {user_balance}")
+                print()
         
         # Проверяем разрешения (allowance) для пресейла
-        try:
-            if WALLET_ADDRESS:
-                allowance = token_contract.functions.allowance(
-                    Web3.to_checksum_address(WALLET_ADDRESS),
-                    Web3.to_checksum_address(presale_address)
-                ).call()
-                
+        if wallet_checksum:
+            allowance = results["allowance"]
+            if not isinstance(allowance, Exception):
                 print(f"🔐 Разрешения для пресейла:")
                 print(f"   Allowance: {allowance:,} ALIEN")
                 print()
                 
-        except Exception as e:
-            print(f"⚠️  Не удалось получить разрешения: {e}")
-            print()
+            else:
+                print(f"⚠️  Не удалось получить разрешения: {allowance}")
+                print()
         
         # Проверяем статус паузы
-        try:
-            paused = token_contract.functions.paused().call()
+        paused = results["paused"]
+        if not isinstance(paused, Exception):
             print(f"⏸️  Статус паузы: {'Да' if paused else 'Нет'}")
             print()
             
-        except Exception as e:
-            print(f"⚠️  Не удалось получить статус паузы: {e}")
+        else:
+            print(f"⚠️  Не удалось получить статус паузы: {paused}")
             print()
         
         # Дополнительная информация
         print("📊 Дополнительная информация:")
         print(f"   Сеть: Polygon Mainnet")
-        print(f"   RPC: {w3.eth.chain_id}")
-        print(f"   Блок: {w3.eth.block_number}")
+        print(f"   RPC: {results['chain_id']}")
+        print(f"   Блок: {results['block_number']}")
         print()
         
         print("✅ Проверка завершена!")
@@ -154,19 +173,21 @@ def check_multiple_addresses():
     print("📋 Балансы токенов:")
     print("-" * 40)
     
+    balances = gather_calls({
+        address: token_contract.functions.balanceOf(Web3.to_checksum_address(address)).call
+        for address in addresses_to_check
+    })
+    
     for i, address in enumerate(addresses_to_check, 1):
-        try:
-            balance = token_contract.functions.balanceOf(
-                Web3.to_checksum_address(address)
-            ).call()
-            
+        balance = balances[address]
+        if not isinstance(balance, Exception):
             print(f"{i}. {address}")
             print(f"   Баланс: {balance:,} ALIEN")
             print()
             
-        except Exception as e:
+        else:
             print(f"{i}. {address}")
-            print(f"   Ошибка: {e}")
+            print(f"   Ошибка: {balance}")
             print()
 
 if __name__ == "__main__":
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Локальный индекс событий пресейла
+
+Хранит декодированные события TokensPurchased, TokensClaimed, FundsWithdrawn
+и PresalePaused в chain.db вместе с последним синхронизированным блоком.
+Повторные запуски запрашивают у RPC только новые блоки; последние
+REORG_DEPTH блоков каждый раз откатываются и перечитываются, чтобы
+реорганизации цепочки не оставляли в индексе устаревших событий.
+
+Тот же индекс используется и для других контрактов (например, события
+Transfer токена в holder_snapshots). Таблица presale_events называется так
+по истории: строки в ней разделены по адресу контракта, а не по типу.
+
+Использование:
+  python event_index.py sync --start-block 60000000
+  python event_index.py status
+"""
+
+import argparse
+import json
+import os
+import time
+from web3 import Web3
+import chain_db
+from log_scanner import WindowController, scan_logs
+
+INDEXED_EVENTS = ('TokensPurchased', 'TokensClaimed', 'FundsWithdrawn', 'PresalePaused')
+REORG_DEPTH = int(os.getenv('REORG_DEPTH', '64'))
+SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', '4'))
+
+SCHEMA = """
+-- Общая таблица событий всех индексируемых контрактов (не только пресейла)
+CREATE TABLE IF NOT EXISTS presale_events (
+    contract TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    block_hash TEXT,
+    tx_hash TEXT NOT NULL,
+    event TEXT NOT NULL,
+    args TEXT NOT NULL,
+    PRIMARY KEY (contract, block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_presale_events_event ON presale_events(contract, event, block_number);
+CREATE TABLE IF NOT EXISTS event_index_checkpoints (
+    contract TEXT PRIMARY KEY,
+    first_block INTEGER NOT NULL,
+    last_block INTEGER NOT NULL
+);
+"""
+
+def _event_topic(event_abi):
+    types = ','.join(i['type'] for i in event_abi['inputs'])
+    return Web3.to_hex(Web3.keccak(text=f"{event_abi['name']}({types})"))
+
+class EventIndex:
+    """
+    Индекс событий одного контракта в локальной базе
+
+    По умолчанию индексирует события пресейла; для другого контракта
+    передайте его события в events (например, events=('Transfer',)).
+    """
+
+    def __init__(self, contract, db_path=None, events=INDEXED_EVENTS, reorg_depth=REORG_DEPTH):
+        self.contract = contract
+        self.address = contract.address
+        self.events = events
+        self.reorg_depth = reorg_depth
+        self.db_path = db_path
+        self.conn = chain_db.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        # Статистика последней синхронизации: блоки и секунды
+        self.last_scan = {"blocks": 0, "seconds": 0.0}
+
+        # topic0 -> имя события
+        self._topics = {
+            _event_topic(item): item['name']
+            for item in contract.abi
+            if item.get('type') == 'event' and item.get('name') in events
+        }
+        missing = set(events) - set(self._topics.values())
+        if missing:
+            raise ValueError(f"События {', '.join(sorted(missing))} отсутствуют в ABI контракта")
+
+    def checkpoint(self):
+        """
+        Получить диапазон уже проиндексированных блоков
+
+        Returns:
+            tuple: (first_block, last_block) или None, если индекс пуст
+        """
+        row = self.conn.execute(
+            "SELECT first_block, last_block FROM event_index_checkpoints WHERE contract = ?",
+            (self.address,)
+        ).fetchone()
+        return (row["first_block"], row["last_block"]) if row else None
+
+    def _save_checkpoint(self, first_block, last_block):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO event_index_checkpoints (contract, first_block, last_block) VALUES (?, ?, ?)",
+            (self.address, first_block, last_block)
+        )
+
+    def _fetch(self, from_block, to_block):
+        return self.contract.w3.eth.get_logs({
+            'address': self.address,
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'topics': [list(self._topics)]
+        })
+
+    def _store(self, logs):
+        rows = []
+        for log in logs:
+            topic0 = Web3.to_hex(log['topics'][0])
+            name = self._topics.get(topic0)
+            if name is None:
+                continue
+            decoded = getattr(self.contract.events, name)().process_log(log)
+            rows.append((
+                self.address,
+                log['blockNumber'],
+                log['logIndex'],
+                Web3.to_hex(log['blockHash']),
+                Web3.to_hex(log['transactionHash']),
+                name,
+                json.dumps(dict(decoded['args']))
+            ))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO presale_events "
+            "(contract, block_number, log_index, block_hash, tx_hash, event, args) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        return len(rows)
+
+    def _scan(self, from_block, to_block, controller, workers, on_window):
+        stored = 0
+        started = time.perf_counter()
+        try:
+            for win_from, win_to, logs in scan_logs(self._fetch, from_block, to_block, workers=workers, controller=controller):
+                with self.conn:
+                    stored += self._store(logs)
+                    if on_window:
+                        on_window(win_to)
+                self.last_scan["blocks"] += win_to - win_from + 1
+        finally:
+            self.last_scan["seconds"] += time.perf_counter() - started
+        return stored
+
+    def blocks_per_second(self):
+        """
+        Пропускная способность последней синхронизации
+
+        Returns:
+            float: Блоков в секунду
+        """
+        if self.last_scan["seconds"] <= 0:
+            return 0.0
+        return self.last_scan["blocks"] / self.last_scan["seconds"]
+
+    def sync(self, start_block, to_block=None, window_size=1000, workers=SCAN_WORKERS):
+        """
+        Догрузить в индекс новые события
+
+        Args:
+            start_block (int): Блок, с которого нужен индекс (блок старта пресейла)
+            to_block (int): Последний блок. Если None - текущий блок сети
+            window_size (int): Начальный размер окна get_logs, если для RPC
+                еще не сохранен подобранный размер
+            workers (int): Количество одновременных запросов get_logs
+
+        Returns:
+            int: Количество записанных событий
+
+        Raises:
+            log_scanner.RateLimitError: RPC ограничил частоту запросов
+                (прогресс до последнего окна сохранен)
+        """
+        if to_block is None:
+            to_block = self.contract.w3.eth.block_number
+
+        state = self.checkpoint()
+        self.last_scan = {"blocks": 0, "seconds": 0.0}
+
+        # Размер окна подбирается адаптивно и запоминается для каждого RPC
+        endpoint = getattr(self.contract.w3.provider, 'endpoint_uri', None)
+        if endpoint:
+            controller = WindowController.for_endpoint(str(endpoint), window_size, self.db_path)
+        else:
+            controller = WindowController(window_size)
+        try:
+            return self._sync(start_block, to_block, state, controller, workers)
+        finally:
+            controller.save(self.db_path)
+
+    def _sync(self, start_block, to_block, state, controller, workers):
+        stored = 0
+
+        if state is None:
+            first_block, last_block = start_block, start_block - 1
+            with self.conn:
+                self._save_checkpoint(first_block, last_block)
+        else:
+            first_block, last_block = state
+
+            # Индекс начинается позже запрошенного блока - догружаем начало
+            if start_block < first_block:
+                stored += self._scan(start_block, first_block - 1, controller, workers, None)
+                first_block = start_block
+                with self.conn:
+                    self._save_checkpoint(first_block, last_block)
+
+        # Откатываем последние блоки: они могли быть заменены реорганизацией
+        resume_block = max(first_block, last_block - self.reorg_depth + 1)
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM presale_events WHERE contract = ? AND block_number >= ?",
+                (self.address, resume_block)
+            )
+            self._save_checkpoint(first_block, resume_block - 1)
+
+        stored += self._scan(
+            resume_block,
+            to_block,
+            controller,
+            workers,
+            lambda win_to: self._save_checkpoint(first_block, win_to)
+        )
+        return stored
+
+    def get_events(self, event, from_block=None, to_block=None):
+        """
+        Получить события из индекса в порядке блоков
+
+        Args:
+            event (str): Имя события
+            from_block (int): Начальный блок (включительно)
+            to_block (int): Конечный блок (включительно)
+
+        Returns:
+            list: События в формате web3 (args, transactionHash, blockNumber, logIndex)
+        """
+        rows = self.conn.execute(
+            "SELECT block_number, log_index, tx_hash, args FROM presale_events "
+            "WHERE contract = ? AND event = ? AND block_number BETWEEN ? AND ? "
+            "ORDER BY block_number, log_index",
+            (self.address, event, from_block or 0, to_block if to_block is not None else 2**62)
+        ).fetchall()
+        return [
+            {
+                "event": event,
+                "args": json.loads(row["args"]),
+                "transactionHash": row["tx_hash"],
+                "blockNumber": row["block_number"],
+                "logIndex": row["log_index"]
+            }
+            for row in rows
+        ]
+
+    def close(self):
+        self.conn.close()
+
+def main():
+    from config import presale_contract
+
+    parser = argparse.ArgumentParser(description="Локальный индекс событий пресейла")
+    subparsers = parser.add_subparsers(dest='command', help='Доступные команды')
+
+    sync_parser = subparsers.add_parser('sync', help='Догрузить новые события')
+    sync_parser.add_argument('--start-block', type=int, default=int(os.getenv('PRESALE_START_BLOCK', '0')), help='Блок старта пресейла')
+    sync_parser.add_argument('--window', type=int, default=int(os.getenv('WINDOW_SIZE', '1000')), help='Размер окна get_logs')
+    sync_parser.add_argument('--workers', type=int, default=SCAN_WORKERS, help='Количество одновременных запросов get_logs')
+
+    subparsers.add_parser('status', help='Показать состояние индекса')
+
+    args = parser.parse_args()
+
+    if not presale_contract:
+        raise SystemExit("❌ Пресейл контракт не настроен в .env")
+
+    index = EventIndex(presale_contract)
+    try:
+        if args.command == 'sync':
+            stored = index.sync(args.start_block, window_size=args.window, workers=args.workers)
+            first_block, last_block = index.checkpoint()
+            print(f"✅ Записано событий: {stored} | индекс: блоки {first_block}-{last_block}")
+            print(f"⚡ Просканировано {index.last_scan['blocks']} блоков: {index.blocks_per_second():,.0f} блоков/с")
+        elif args.command == 'status':
+            state = index.checkpoint()
+            if state is None:
+                print("📭 Индекс пуст")
+                return
+            print(f"📚 Индекс {presale_contract.address}: блоки {state[0]}-{state[1]}")
+            for event in index.events:
+                print(f"  {event}: {len(index.get_events(event))}")
+        else:
+            parser.print_help()
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    main()
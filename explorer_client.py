@@ -0,0 +1,232 @@
+import hashlib
+import http.client
+import json
+import os
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+import chain_db
+
+EXPLORER_API = os.getenv('POLYGONSCAN_API', 'https://api.polygonscan.com/api')
+# Бесплатный ключ Polygonscan: 5 запросов в секунду; для платных тарифов увеличьте
+EXPLORER_RATE = float(os.getenv('POLYGONSCAN_RATE', '5'))
+EXPLORER_BURST = int(os.getenv('POLYGONSCAN_BURST', '5'))
+EXPLORER_RETRIES = int(os.getenv('POLYGONSCAN_RETRIES', '5'))
+EXPLORER_POOL_SIZE = 4
+# Сеть, данные которой отдает EXPLORER_API (137 - Polygon PoS)
+EXPLORER_CHAIN_ID = int(os.getenv('POLYGONSCAN_CHAIN_ID', '137'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS explorer_cache (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    -- NULL - ответ не устаревает (данные финализированных блоков)
+    expires REAL
+);
+"""
+
+class ExplorerError(Exception):
+    """
+    Запрос к API обозревателя не удался после всех повторов
+    """
+
+def is_explorer_rate_limit(data):
+    """
+    Проверить, что API ответило ограничением частоты (Polygonscan отвечает HTTP 200)
+    """
+    return data.get("status") == "0" and "rate limit" in str(data.get("result", "")).lower()
+
+class TokenBucket:
+    """
+    Ограничитель частоты: rate запросов в секунду, до burst подряд
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class ExplorerClient:
+    """
+    Клиент API Polygonscan (Etherscan-совместимого) для всех скриптов
+
+    Держит пул постоянных HTTP соединений, ограничивает частоту запросов
+    под тариф ключа, повторяет сетевые ошибки, 5xx и ответы "Max rate
+    limit reached" с экспоненциальной паузой и случайным разбросом.
+    Ответы, которые не меняются (финализированные блоки), кэшируются
+    в chain.db.
+    """
+
+    def __init__(self, api_key, base_url=EXPLORER_API, rate=EXPLORER_RATE, burst=EXPLORER_BURST,
+                 retries=EXPLORER_RETRIES, backoff=1.0, timeout=30, pool_size=EXPLORER_POOL_SIZE, db_path=None):
+        self.api_key = api_key
+        parts = urlsplit(base_url)
+        self._https = parts.scheme == 'https'
+        self._host = parts.netloc
+        self._path = parts.path or '/'
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate, burst)
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self.db_path = db_path
+        self.stats = {"requests": 0, "retries": 0, "cache_hits": 0}
+        conn = chain_db.connect(db_path)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connection(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            connection_class = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            return connection_class(self._host, timeout=self.timeout)
+
+    def _release(self, connection):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def _request(self, params):
+        self.limiter.acquire()
+        self.stats["requests"] += 1
+        connection = self._connection()
+        try:
+            connection.request('GET', f"{self._path}?{urlencode(params)}", headers={'Connection': 'keep-alive'})
+            response = connection.getresponse()
+            body = response.read()
+        except (http.client.HTTPException, OSError):
+            # Соединение могло быть закрыто сервером: следующее создастся заново
+            connection.close()
+            raise
+        self._release(connection)
+        if response.status == 429 or response.status >= 500:
+            raise ConnectionError(f"HTTP {response.status}")
+        if response.status != 200:
+            raise ExplorerError(f"HTTP {response.status}: {body[:200]!r}")
+        try:
+            return json.loads(body)
+        except ValueError:
+            # Пустой ответ или HTML страница прокси (Cloudflare) с кодом 200 - повторяем
+            raise ConnectionError(f"ответ не JSON: {body[:200]!r}")
+
+    def _cache_key(self, params):
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _cached(self, key):
+        conn = chain_db.connect(self.db_path)
+        try:
+            row = conn.execute("SELECT response, expires FROM explorer_cache WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        if row is None or (row["expires"] is not None and row["expires"] < time.time()):
+            return None
+        return json.loads(row["response"])
+
+    def _store(self, key, data, ttl):
+        conn = chain_db.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO explorer_cache (key, response, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(data), None if ttl is None else time.time() + ttl)
+                )
+        finally:
+            conn.close()
+
+    def get(self, params, ttl=0):
+        """
+        Выполнить запрос к API
+
+        Args:
+            params (dict): Параметры запроса (module, action, ...) без apikey
+            ttl (float): Время жизни ответа в кэше в секундах: 0 - не кэшировать,
+                None - хранить всегда (для данных финализированных блоков)
+
+        Returns:
+            dict: Ответ API (status, message, result)
+
+        Raises:
+            ExplorerError: Если запрос не удался после всех повторов
+        """
+        key = self._cache_key(params) if ttl != 0 else None
+        if key:
+            cached = self._cached(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return cached
+
+        query = {**params, "apikey": self.api_key}
+        for attempt in range(self.retries + 1):
+            try:
+                data = self._request(query)
+                if not is_explorer_rate_limit(data):
+                    break
+                error = f"ограничение частоты: {data.get('result')}"
+            except (ConnectionError, TimeoutError, http.client.HTTPException, OSError) as e:
+                error = str(e) or type(e).__name__
+            if attempt == self.retries:
+                raise ExplorerError(f"{params.get('module')}/{params.get('action')}: {error} (попыток: {attempt + 1})")
+            self.stats["retries"] += 1
+            # Экспоненциальная пауза со случайным разбросом, чтобы потоки не повторяли запросы одновременно
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+        # Кэшируем только успешные ответы и "ничего не найдено", но не ошибки (NOTOK)
+        if key and (data.get("status") == "1" or str(data.get("message", "")).startswith("No ")):
+            self._store(key, data, ttl)
+        return data
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    Получить общий ExplorerClient с ключом из .env
+
+    Returns:
+        ExplorerClient: Клиент API обозревателя
+
+    Raises:
+        SystemExit: Если POLYGONSCAN_API_KEY не задан
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            api_key = os.getenv('POLYGONSCAN_API_KEY') or os.getenv('ETHERSCAN_API_KEY')
+            if not api_key:
+                raise SystemExit("POLYGONSCAN_API_KEY not set in .env")
+            # Настройки читаются при первом обращении, после load_dotenv() в скрипте
+            _client = ExplorerClient(
+                api_key,
+                base_url=os.getenv('POLYGONSCAN_API', EXPLORER_API),
+                rate=float(os.getenv('POLYGONSCAN_RATE', EXPLORER_RATE)),
+                burst=int(os.getenv('POLYGONSCAN_BURST', EXPLORER_BURST)),
+                retries=int(os.getenv('POLYGONSCAN_RETRIES', EXPLORER_RETRIES))
+            )
+        return _client
@@ -0,0 +1,86 @@
+import os
+import threading
+
+# Сколько последних блоков учитывать в eth_feeHistory
+FEE_HISTORY_BLOCKS = int(os.getenv('FEE_HISTORY_BLOCKS', '20'))
+# Минимальная чаевая валидатору (Polygon отклоняет транзакции с меньшей)
+MIN_PRIORITY_FEE_GWEI = float(os.getenv('MIN_PRIORITY_FEE_GWEI', '30'))
+
+# Срочность -> (перцентиль чаевых в блоках, запас на рост base fee)
+URGENCY_LEVELS = {
+    'slow': (10, 1.25),
+    'normal': (50, 2.0),
+    'fast': (90, 3.0)
+}
+URGENCIES = tuple(URGENCY_LEVELS)
+_PERCENTILES = sorted({percentile for percentile, _ in URGENCY_LEVELS.values()})
+
+class FeeOracle:
+    """
+    Комиссии EIP-1559 по скользящему окну eth_feeHistory
+
+    История кэшируется по номеру последнего блока (как в read_cache): пока
+    блок не сменился, комиссии считаются без eth_feeHistory, с новым блоком
+    base fee берется свежий. При обновлении запрашиваются только блоки,
+    появившиеся с прошлого запроса, и окно сдвигается.
+    """
+
+    def __init__(self, w3, blocks=FEE_HISTORY_BLOCKS, min_priority_fee_gwei=MIN_PRIORITY_FEE_GWEI):
+        self.w3 = w3
+        self.blocks = blocks
+        self.min_priority_fee = int(min_priority_fee_gwei * 10**9)
+        self._lock = threading.Lock()
+        # Номер блока -> {перцентиль: чаевые}
+        self._rewards = {}
+        self._next_base_fee = None
+        # Последний блок, по которому посчитан _next_base_fee
+        self._head = None
+
+    def _refresh(self):
+        head = self.w3.eth.block_number
+        if self._next_base_fee is not None and head == self._head:
+            return
+
+        if self._rewards and self._head is not None and head > self._head:
+            # Только блоки, появившиеся с прошлого запроса
+            count = min(self.blocks, head - self._head)
+        else:
+            count = self.blocks
+        history = self.w3.eth.fee_history(count, head, _PERCENTILES)
+
+        oldest = history['oldestBlock']
+        for offset, rewards in enumerate(history.get('reward') or []):
+            self._rewards[oldest + offset] = dict(zip(_PERCENTILES, rewards))
+        # Последний элемент baseFeePerGas - base fee следующего блока
+        self._next_base_fee = history['baseFeePerGas'][-1]
+        self._head = head
+
+        for number in sorted(self._rewards)[:-self.blocks]:
+            del self._rewards[number]
+
+    def fees(self, urgency='normal'):
+        """
+        Получить поля комиссии для транзакции
+
+        Args:
+            urgency (str): slow, normal или fast
+
+        Returns:
+            dict: {'maxFeePerGas': ..., 'maxPriorityFeePerGas': ...} в wei
+        """
+        if urgency not in URGENCY_LEVELS:
+            raise ValueError(f"Неизвестная срочность: {urgency}. Доступно: {', '.join(URGENCIES)}")
+        percentile, base_multiplier = URGENCY_LEVELS[urgency]
+
+        with self._lock:
+            self._refresh()
+            rewards = sorted(block[percentile] for block in self._rewards.values())
+            base_fee = self._next_base_fee
+
+        # Медиана по окну сглаживает единичные блоки с аномальными чаевыми
+        priority_fee = rewards[len(rewards) // 2] if rewards else 0
+        priority_fee = max(priority_fee, self.min_priority_fee)
+        return {
+            'maxPriorityFeePerGas': priority_fee,
+            'maxFeePerGas': int(base_fee * base_multiplier) + priority_fee
+        }
@@ -0,0 +1,168 @@
+import os
+import threading
+import chain_db
+
+# Запас к оценке газа: состояние контракта к моменту майнинга может отличаться
+GAS_SAFETY_MARGIN = float(os.getenv('GAS_SAFETY_MARGIN', '1.2'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gas_profiles (
+    contract TEXT NOT NULL,
+    selector TEXT NOT NULL,
+    size_class INTEGER NOT NULL,
+    gas INTEGER NOT NULL,
+    words INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    PRIMARY KEY (contract, selector, size_class)
+);
+"""
+
+def _data_hex(data):
+    if isinstance(data, (bytes, bytearray)):
+        return '0x' + bytes(data).hex()
+    return data if data.startswith('0x') else f"0x{data}"
+
+def size_class(words):
+    """
+    Класс размера аргументов: точное число слов до 8, дальше степень двойки
+
+    Args:
+        words (int): Количество 32-байтных слов calldata после селектора
+
+    Returns:
+        int: Класс размера
+    """
+    if words <= 8:
+        return words
+    return 8 + (words - 1).bit_length()
+
+def bool_variant(call):
+    """
+    Значения bool аргументов вызова для ключа профиля
+
+    Флаги меняют путь исполнения и стоимость записи в storage
+    (batchSetBlacklist(..., true) дороже, чем (..., false)), поэтому
+    оценки для разных значений хранятся раздельно.
+
+    Args:
+        call: Вызов функции контракта (contract.functions.fn(...))
+
+    Returns:
+        str: Например "true,false" или "" если bool аргументов нет
+    """
+    inputs = (getattr(call, 'abi', None) or {}).get('inputs', [])
+    args = getattr(call, 'args', None) or ()
+    return ','.join(
+        'true' if value else 'false'
+        for param, value in zip(inputs, args)
+        if param.get('type') == 'bool'
+    )
+
+class GasProfile:
+    """
+    Постоянный кэш оценок газа по контракту, селектору, bool флагам и размеру аргументов
+
+    Первый вызов метода оценивается через eth_estimateGas, результат
+    сохраняется в chain.db. Повторные вызовы того же метода с теми же
+    флагами и аргументами того же размера получают лимит без запроса к RPC.
+    Для массивов (batchSetBlacklist и т.п.) лимит масштабируется по числу
+    слов calldata.
+
+    Кэш не знает, пишет ли вызов в пустой слот storage (mint новому
+    держателю дороже на ~17k газа), и попадание в кэш не проверяет,
+    откатится ли вызов. Массовые отправки (airdrop, batch_set_blacklist)
+    поэтому передают явный gas по оценке худшего случая.
+    """
+
+    def __init__(self, w3, db_path=None, margin=GAS_SAFETY_MARGIN):
+        self.w3 = w3
+        self.db_path = db_path
+        self.margin = margin
+        self._lock = threading.Lock()
+        # (contract, selector, size_class) -> (gas, words)
+        self._memo = {}
+        conn = chain_db.connect(db_path)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def lookup(self, contract, selector, words):
+        """
+        Найти сохраненную оценку газа
+
+        Returns:
+            int: Оценка газа (без запаса) или None
+        """
+        key = (contract.lower(), selector, size_class(words))
+        with self._lock:
+            if key not in self._memo:
+                conn = chain_db.connect(self.db_path)
+                try:
+                    row = conn.execute(
+                        "SELECT gas, words FROM gas_profiles WHERE contract = ? AND selector = ? AND size_class = ?",
+                        key
+                    ).fetchone()
+                finally:
+                    conn.close()
+                self._memo[key] = (row["gas"], row["words"]) if row else None
+            profile = self._memo[key]
+
+        if profile is None:
+            return None
+        gas, profile_words = profile
+        if words > profile_words:
+            # Газ на массив растет линейно с числом элементов
+            return gas * words // max(1, profile_words)
+        return gas
+
+    def record(self, contract, selector, words, gas):
+        """
+        Сохранить оценку газа (в классе хранится максимальная)
+        """
+        key = (contract.lower(), selector, size_class(words))
+        conn = chain_db.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO gas_profiles (contract, selector, size_class, gas, words, samples) "
+                    "VALUES (?, ?, ?, ?, ?, 1) "
+                    "ON CONFLICT(contract, selector, size_class) DO UPDATE SET "
+                    "gas = MAX(gas, excluded.gas), words = MAX(words, excluded.words), samples = samples + 1",
+                    (*key, gas, words)
+                )
+                row = conn.execute(
+                    "SELECT gas, words FROM gas_profiles WHERE contract = ? AND selector = ? AND size_class = ?",
+                    key
+                ).fetchone()
+        finally:
+            conn.close()
+        with self._lock:
+            self._memo[key] = (row["gas"], row["words"])
+
+    def gas_limit(self, transaction, variant=''):
+        """
+        Лимит газа для собранной транзакции
+
+        Args:
+            transaction (dict): Транзакция с полями from, to, data и value
+            variant (str): Значения bool аргументов (см. bool_variant)
+
+        Returns:
+            int: Лимит газа с запасом GAS_SAFETY_MARGIN
+        """
+        data = _data_hex(transaction.get('data') or '0x')
+        # Флаги хранятся в том же столбце: "0xa9059cbb" или "0x1234abcd:true"
+        selector = f"{data[:10]}:{variant}" if variant else data[:10]
+        words = max(0, (len(data) - 10) // 64)
+
+        gas = self.lookup(transaction['to'], selector, words)
+        if gas is None:
+            gas = self.w3.eth.estimate_gas({
+                'from': transaction['from'],
+                'to': transaction['to'],
+                'data': data,
+                'value': transaction.get('value', 0)
+            })
+            self.record(transaction['to'], selector, words, gas)
+        return int(gas * self.margin)
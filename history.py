@@ -1,13 +1,113 @@
-import pandas as pd
+import csv
+import json
 import os
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокировка через msvcrt
+    fcntl = None
+    import msvcrt
+
 HISTORY_FILE = 'history.csv'
+HISTORY_COLUMNS = ['timestamp', 'action', 'tx_hash', 'amount', 'address', 'status']
+
+# Хранилище истории: csv (history.csv) или sqlite (HISTORY_DB, см. history_db.py)
+HISTORY_BACKEND = os.getenv('HISTORY_BACKEND', 'csv')
+
+def _use_sqlite():
+    return HISTORY_BACKEND == 'sqlite'
+
+def _stats_file():
+    # Накопленная статистика хранится рядом с журналом
+    return f"{HISTORY_FILE}.stats.json"
+
+def _empty_stats():
+    return {
+        "total_actions": 0,
+        "actions_by_type": {},
+        "success_count": 0,
+        "last_action": None,
+        "last_timestamp": None,
+        "log_size": 0
+    }
+
+def _apply_record(stats, record):
+    """
+    Учесть одну запись журнала в накопленной статистике
+    """
+    stats["total_actions"] += 1
+    action = record['action']
+    stats["actions_by_type"][action] = stats["actions_by_type"].get(action, 0) + 1
+    if record['status'] == 'success':
+        stats["success_count"] += 1
+    stats["last_action"] = action
+    stats["last_timestamp"] = record['timestamp']
+
+def _compute_stats(f):
+    """
+    Пересчитать статистику по всему журналу
+    
+    Args:
+        f: Файл журнала, открытый на чтение
+    
+    Returns:
+        dict: Накопленная статистика
+    """
+    stats = _empty_stats()
+    f.seek(0)
+    for row in csv.DictReader(f):
+        _apply_record(stats, row)
+    stats["log_size"] = os.fstat(f.fileno()).st_size
+    return stats
+
+def _load_stats():
+    try:
+        with open(_stats_file(), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _save_stats(stats):
+    # Пишем во временный файл и подменяем, чтобы читатели не видели половину JSON
+    tmp_path = f"{_stats_file()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False)
+    os.replace(tmp_path, _stats_file())
+
+@contextmanager
+def _locked(f):
+    """
+    Эксклюзивная блокировка файла истории на время записи
+    
+    Args:
+        f: Открытый файл
+    """
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+    try:
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
 
 def log_action(action, tx_hash=None, amount=None, address=None, status="success"):
     """
     Логировать действие в CSV файл
     
+    Запись дописывается в конец файла под блокировкой, поэтому время
+    записи не зависит от размера истории, а параллельные процессы бота
+    не теряют строки друг друга.
+    
     Args:
         action (str): Тип действия (balance, buy, claim)
         tx_hash (str): Хеш транзакции
@@ -27,20 +127,33 @@ def log_action(action, tx_hash=None, amount=None, address=None, status="success"
         'status': status
     }
     
-    # Создаем DataFrame
-    df_new = pd.DataFrame([record])
-    
-    # Проверяем существование файла
-    if os.path.exists(HISTORY_FILE):
-        # Читаем существующий файл
-        df_existing = pd.read_csv(HISTORY_FILE)
-        # Объединяем с новой записью
-        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-    else:
-        df_combined = df_new
+    if _use_sqlite():
+        import history_db
+        history_db.insert_record(record)
+        print(f"✅ Действие '{action}' записано в {history_db.HISTORY_DB}")
+        return
     
-    # Сохраняем в CSV
-    df_combined.to_csv(HISTORY_FILE, index=False)
+    with open(HISTORY_FILE, 'a+', newline='', encoding='utf-8') as f:
+        with _locked(f):
+            writer = csv.writer(f)
+            
+            # Заголовок пишем только в новый файл
+            size_before = os.fstat(f.fileno()).st_size
+            if size_before == 0:
+                writer.writerow(HISTORY_COLUMNS)
+            
+            writer.writerow([record[column] for column in HISTORY_COLUMNS])
+            f.flush()
+            
+            # Обновляем накопленную статистику; если она не соответствует
+            # журналу (удалена, журнал правили вручную) - пересчитываем
+            stats = _load_stats()
+            if stats is None or stats.get("log_size") != size_before:
+                stats = _compute_stats(f)
+            else:
+                _apply_record(stats, record)
+                stats["log_size"] = os.fstat(f.fileno()).st_size
+            _save_stats(stats)
     
     print(f"✅ Действие '{action}' записано в {HISTORY_FILE}")
 
@@ -54,6 +167,13 @@ def get_history(limit=None):
     Returns:
         pd.DataFrame: История действий
     """
+    import pandas as pd
+    
+    if _use_sqlite():
+        import history_db
+        records = history_db.fetch_records(limit)
+        return pd.DataFrame(records, columns=HISTORY_COLUMNS) if records else pd.DataFrame()
+    
     if not os.path.exists(HISTORY_FILE):
         return pd.DataFrame()
     
@@ -64,6 +184,27 @@ def get_history(limit=None):
     
     return df
 
+def _read_records(limit=None):
+    """
+    Прочитать последние записи без pandas
+    
+    Args:
+        limit (int): Количество последних записей
+    
+    Returns:
+        list: Список записей (dict)
+    """
+    if _use_sqlite():
+        import history_db
+        return history_db.fetch_records(limit)
+    
+    if not os.path.exists(HISTORY_FILE):
+        return []
+    
+    with open(HISTORY_FILE, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return list(deque(reader, maxlen=limit)) if limit else list(reader)
+
 def print_history(limit=10):
     """
     Вывести историю действий в консоль
@@ -71,20 +212,20 @@ def print_history(limit=10):
     Args:
         limit (int): Количество последних записей
     """
-    df = get_history(limit)
+    records = _read_records(limit)
     
-    if df.empty:
+    if not records:
         print("📝 История действий пуста")
         return
     
-    print(f"\n📝 Последние {len(df)} действий:")
+    print(f"\n📝 Последние {len(records)} действий:")
     print("-" * 80)
     
-    for _, row in df.iterrows():
+    for row in records:
         timestamp = row['timestamp']
         action = row['action']
-        tx_hash = row['tx_hash'] if pd.notna(row['tx_hash']) else ''
-        amount = row['amount'] if pd.notna(row['amount']) else ''
+        tx_hash = row['tx_hash'] or ''
+        amount = row['amount'] or ''
         status = row['status']
         
         print(f"🕐 {timestamp} | {action.upper()} | {status}")
@@ -98,30 +239,89 @@ def clear_history():
     """
     Очистить историю действий
     """
+    if _use_sqlite():
+        import history_db
+        history_db.clear()
+        print("🗑️ История действий очищена")
+        return
+    
+    if os.path.exists(_stats_file()):
+        os.remove(_stats_file())
+    
     if os.path.exists(HISTORY_FILE):
         os.remove(HISTORY_FILE)
         print("🗑️ История действий очищена")
     else:
         print("📝 История действий уже пуста")
 
+def _cached_stats():
+    """
+    Получить накопленную статистику CSV журнала, пересчитав ее при рассинхронизации
+    
+    Returns:
+        dict: Накопленная статистика
+    """
+    if not os.path.exists(HISTORY_FILE):
+        return _empty_stats()
+    
+    stats = _load_stats()
+    if stats is not None and stats.get("log_size") == os.path.getsize(HISTORY_FILE):
+        return stats
+    
+    with open(HISTORY_FILE, 'a+', newline='', encoding='utf-8') as f:
+        with _locked(f):
+            stats = _compute_stats(f)
+            _save_stats(stats)
+    return stats
+
 def get_statistics():
     """
     Получить статистику действий
     
+    Статистика накапливается при каждом log_action, поэтому время ответа
+    не зависит от размера истории.
+    
     Returns:
         dict: Статистика
     """
-    df = get_history()
+    if _use_sqlite():
+        import history_db
+        return history_db.fetch_statistics()
     
-    if df.empty:
+    stats = _cached_stats()
+    
+    if stats["total_actions"] == 0:
         return {"total_actions": 0}
     
-    stats = {
-        "total_actions": len(df),
-        "actions_by_type": df['action'].value_counts().to_dict(),
-        "success_rate": len(df[df['status'] == 'success']) / len(df) * 100,
-        "last_action": df.iloc[-1]['action'] if not df.empty else None,
-        "last_timestamp": df.iloc[-1]['timestamp'] if not df.empty else None
+    return {
+        "total_actions": stats["total_actions"],
+        "actions_by_type": dict(sorted(stats["actions_by_type"].items(), key=lambda item: item[1], reverse=True)),
+        "success_rate": stats["success_count"] / stats["total_actions"] * 100,
+        "last_action": stats["last_action"],
+        "last_timestamp": stats["last_timestamp"]
     }
+
+def check_statistics(rebuild=True):
+    """
+    Сверить накопленную статистику с журналом
+    
+    Args:
+        rebuild (bool): Пересобрать статистику из журнала при расхождении
+    
+    Returns:
+        bool: True если статистика совпадала с журналом
+    """
+    if _use_sqlite():
+        import history_db
+        return history_db.check_statistics(rebuild)
+    
+    if not os.path.exists(HISTORY_FILE):
+        return True
     
-    return stats 
\ No newline at end of file
+    with open(HISTORY_FILE, 'a+', newline='', encoding='utf-8') as f:
+        with _locked(f):
+            actual = _compute_stats(f)
+            consistent = _load_stats() == actual
+            if not consistent and rebuild:
+                _save_stats(actual)
+    return consistent
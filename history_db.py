@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+SQLite хранилище истории действий (HISTORY_BACKEND=sqlite)
+
+Использование:
+  python history_db.py migrate                      # Импортировать history.csv в history.db
+  python history_db.py migrate --csv old.csv --db history.db
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+
+HISTORY_DB = os.getenv('HISTORY_DB', 'history.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    action TEXT NOT NULL,
+    tx_hash TEXT,
+    amount TEXT,
+    address TEXT,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_action ON history(action);
+CREATE INDEX IF NOT EXISTS idx_history_status ON history(status);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_tx_hash ON history(tx_hash);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+-- Агрегаты ведутся триггером при каждой вставке, статистика не сканирует history
+CREATE TABLE IF NOT EXISTS action_stats (
+    action TEXT PRIMARY KEY,
+    total INTEGER NOT NULL,
+    success INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS history_action_stats AFTER INSERT ON history
+BEGIN
+    INSERT INTO action_stats (action, total, success)
+    VALUES (NEW.action, 1, NEW.status = 'success')
+    ON CONFLICT(action) DO UPDATE SET
+        total = total + 1,
+        success = success + (NEW.status = 'success');
+END;
+"""
+
+COLUMNS = ['timestamp', 'action', 'tx_hash', 'amount', 'address', 'status']
+
+def connect(db_path=None):
+    """
+    Открыть базу истории и создать схему при необходимости
+
+    Args:
+        db_path (str): Путь к базе. Если None, используется HISTORY_DB
+
+    Returns:
+        sqlite3.Connection: Соединение с базой
+    """
+    conn = sqlite3.connect(db_path or HISTORY_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+    # WAL позволяет читать историю, пока другой процесс пишет
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    
+    # База из прежней версии: агрегатов еще нет, строим их один раз
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'action_stats'").fetchone() is None:
+        with conn:
+            _rebuild_statistics(conn)
+    return conn
+
+def _compute_statistics(conn):
+    rows = conn.execute(
+        "SELECT action, COUNT(*), SUM(status = 'success') FROM history GROUP BY action"
+    ).fetchall()
+    return {action: (total, success) for action, total, success in rows}
+
+def _stored_statistics(conn):
+    rows = conn.execute("SELECT action, total, success FROM action_stats").fetchall()
+    return {action: (total, success) for action, total, success in rows}
+
+def _rebuild_statistics(conn):
+    conn.execute("DELETE FROM action_stats")
+    conn.execute(
+        "INSERT INTO action_stats (action, total, success) "
+        "SELECT action, COUNT(*), SUM(status = 'success') FROM history GROUP BY action"
+    )
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('action_stats', 'ready')")
+
+def _nullable(value):
+    return None if value in ('', None) else value
+
+def insert_record(record, db_path=None):
+    """
+    Добавить запись в историю
+
+    Args:
+        record (dict): Запись с полями COLUMNS
+        db_path (str): Путь к базе
+    """
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO history (timestamp, action, tx_hash, amount, address, status) VALUES (?, ?, ?, ?, ?, ?)",
+                [_nullable(record[column]) for column in COLUMNS]
+            )
+    finally:
+        conn.close()
+
+def fetch_records(limit=None, db_path=None):
+    """
+    Получить последние записи истории в хронологическом порядке
+
+    Args:
+        limit (int): Количество последних записей (None - все)
+        db_path (str): Путь к базе
+
+    Returns:
+        list: Список записей (dict)
+    """
+    conn = connect(db_path)
+    try:
+        if limit:
+            rows = conn.execute(
+                "SELECT * FROM (SELECT * FROM history ORDER BY id DESC LIMIT ?) ORDER BY id",
+                (limit,)
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM history ORDER BY id").fetchall()
+        return [{column: row[column] for column in COLUMNS} for row in rows]
+    finally:
+        conn.close()
+
+def fetch_statistics(db_path=None):
+    """
+    Посчитать статистику действий на стороне SQLite
+
+    Args:
+        db_path (str): Путь к базе
+
+    Returns:
+        dict: Статистика в формате history.get_statistics
+    """
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT action, total, success FROM action_stats WHERE total > 0 ORDER BY total DESC"
+        ).fetchall()
+        actions_by_type = {row["action"]: row["total"] for row in rows}
+        total = sum(actions_by_type.values())
+
+        if total == 0:
+            return {"total_actions": 0}
+
+        success = sum(row["success"] for row in rows)
+        last = conn.execute("SELECT action, timestamp FROM history ORDER BY id DESC LIMIT 1").fetchone()
+
+        return {
+            "total_actions": total,
+            "actions_by_type": actions_by_type,
+            "success_rate": success / total * 100,
+            "last_action": last["action"],
+            "last_timestamp": last["timestamp"]
+        }
+    finally:
+        conn.close()
+
+def clear(db_path=None):
+    """
+    Удалить все записи истории
+
+    Args:
+        db_path (str): Путь к базе
+    """
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM history")
+            conn.execute("DELETE FROM action_stats")
+    finally:
+        conn.close()
+
+def check_statistics(rebuild=True, db_path=None):
+    """
+    Сверить агрегаты action_stats с таблицей history
+
+    Args:
+        rebuild (bool): Пересобрать агрегаты при расхождении
+        db_path (str): Путь к базе
+
+    Returns:
+        bool: True если агрегаты совпадали с историей
+    """
+    conn = connect(db_path)
+    try:
+        with conn:
+            consistent = _compute_statistics(conn) == {
+                action: counts for action, counts in _stored_statistics(conn).items() if counts[0] > 0
+            }
+            if not consistent and rebuild:
+                _rebuild_statistics(conn)
+        return consistent
+    finally:
+        conn.close()
+
+def migrate_from_csv(csv_path, db_path=None):
+    """
+    Однократно импортировать history.csv в SQLite
+
+    Args:
+        csv_path (str): Путь к CSV истории
+        db_path (str): Путь к базе
+
+    Returns:
+        int: Количество импортированных записей
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Файл истории не найден: {csv_path}")
+
+    conn = connect(db_path)
+    try:
+        migrated = conn.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone()
+        if migrated:
+            raise ValueError(f"История уже импортирована из {migrated['value']}")
+
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = (
+                [_nullable(row.get(column)) for column in COLUMNS]
+                for row in csv.DictReader(f)
+            )
+            with conn:
+                cursor = conn.executemany(
+                    "INSERT INTO history (timestamp, action, tx_hash, amount, address, status) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('migrated_from', ?)",
+                    (os.path.abspath(csv_path),)
+                )
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite хранилище истории действий")
+    subparsers = parser.add_subparsers(dest='command', help='Доступные команды')
+
+    migrate_parser = subparsers.add_parser('migrate', help='Импортировать history.csv в SQLite')
+    migrate_parser.add_argument('--csv', default='history.csv', help='Путь к CSV истории')
+    migrate_parser.add_argument('--db', default=HISTORY_DB, help='Путь к базе SQLite')
+
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        count = migrate_from_csv(args.csv, args.db)
+        print(f"✅ Импортировано {count} записей из {args.csv} в {args.db}")
+        print("💡 Установите HISTORY_BACKEND=sqlite в .env, чтобы бот писал историю в базу")
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
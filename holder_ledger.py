@@ -0,0 +1,244 @@
+import os
+import chain_db
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+# Переводы в последних блоках еще могут быть отменены реорганизацией
+REORG_DEPTH = int(os.getenv('REORG_DEPTH', '64'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS holder_balances (
+    token TEXT NOT NULL,
+    address TEXT NOT NULL,
+    -- uint256 не помещается в INTEGER: храним 64 hex символа с ведущими нулями,
+    -- тогда строковый порядок совпадает с числовым и ORDER BY работает
+    balance TEXT NOT NULL,
+    PRIMARY KEY (token, address)
+);
+CREATE INDEX IF NOT EXISTS idx_holder_balances_balance ON holder_balances(token, balance);
+CREATE TABLE IF NOT EXISTS holder_ledger_state (
+    token TEXT PRIMARY KEY,
+    last_block INTEGER NOT NULL,
+    last_position INTEGER NOT NULL,
+    total TEXT NOT NULL
+);
+"""
+
+def _encode(value):
+    return f"{value:064x}"
+
+def _decode(value):
+    return int(value, 16)
+
+class HolderLedger:
+    """
+    Постоянный реестр балансов держателей токена
+
+    Хранит целые балансы (в минимальных единицах) и позицию последнего
+    примененного перевода: номер блока и сколько переводов этого блока уже
+    учтено. Каждый запуск применяет только новые переводы.
+    """
+
+    def __init__(self, token, db_path=None):
+        self.token = token.lower()
+        self.conn = chain_db.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        self._migrate_zero_address()
+
+    def _migrate_zero_address(self):
+        """
+        Перевести реестр старого формата на текущий учет сжигания
+
+        Раньше сжигание зачислялось нулевому адресу как держателю, а total
+        считал только минт. Строка нулевого адреса удаляется, total
+        пересчитывается как сумма балансов (минт минус сжигание).
+        """
+        row = self.conn.execute(
+            "SELECT 1 FROM holder_balances WHERE token = ? AND address = ?",
+            (self.token, ZERO_ADDRESS)
+        ).fetchone()
+        if row is None:
+            return
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM holder_balances WHERE token = ? AND address = ?",
+                (self.token, ZERO_ADDRESS)
+            )
+            total = sum(balance for _, balance in self.balances())
+            self.conn.execute(
+                "UPDATE holder_ledger_state SET total = ? WHERE token = ?",
+                (_encode(total), self.token)
+            )
+
+    def state(self):
+        """
+        Получить позицию реестра
+
+        Returns:
+            dict: last_block, last_position и total (минт минус сжигание) или None, если реестр пуст
+        """
+        row = self.conn.execute(
+            "SELECT last_block, last_position, total FROM holder_ledger_state WHERE token = ?",
+            (self.token,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"last_block": row["last_block"], "last_position": row["last_position"], "total": _decode(row["total"])}
+
+    def apply(self, transfers):
+        """
+        Применить новые переводы (в порядке блоков, как их отдает tokentx)
+
+        Переводы из уже учтенной части последнего блока пропускаются,
+        поэтому страницы можно запрашивать с startblock = last_block.
+
+        Args:
+            transfers (list): Переводы с полями blockNumber, from, to, value
+
+        Returns:
+            int: Количество примененных переводов
+        """
+        state = self.state() or {"last_block": -1, "last_position": 0, "total": 0}
+        last_block, position, total = state["last_block"], state["last_position"], state["total"]
+
+        deltas = {}
+        applied = 0
+        seen_in_last_block = 0
+        for tx in transfers:
+            block = int(tx["blockNumber"])
+            if block < state["last_block"]:
+                continue
+            if block == state["last_block"]:
+                seen_in_last_block += 1
+                # Перевод уже учтен при прошлом запуске
+                if seen_in_last_block <= state["last_position"]:
+                    continue
+
+            if block == last_block:
+                position += 1
+            else:
+                last_block, position = block, 1
+
+            value = int(tx["value"])
+            applied += 1
+            if value == 0:
+                continue
+            frm = tx["from"].lower()
+            to = tx["to"].lower()
+            # Минт и сжигание меняют общее предложение, нулевой адрес держателем не считается
+            if frm == ZERO_ADDRESS:
+                total += value
+            else:
+                deltas[frm] = deltas.get(frm, 0) - value
+            if to == ZERO_ADDRESS:
+                total -= value
+            else:
+                deltas[to] = deltas.get(to, 0) + value
+
+        with self.conn:
+            self._apply_deltas(deltas)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO holder_ledger_state (token, last_block, last_position, total) VALUES (?, ?, ?, ?)",
+                (self.token, last_block, position, _encode(total))
+            )
+        return applied
+
+    def _apply_deltas(self, deltas):
+        addresses = list(deltas)
+        current = {}
+        for i in range(0, len(addresses), 500):
+            chunk = addresses[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT address, balance FROM holder_balances WHERE token = ? AND address IN ({placeholders})",
+                [self.token, *chunk]
+            ).fetchall()
+            current.update({row["address"]: _decode(row["balance"]) for row in rows})
+
+        upserts = []
+        deletes = []
+        for address, delta in deltas.items():
+            balance = current.get(address, 0) + delta
+            if balance > 0:
+                upserts.append((self.token, address, _encode(balance)))
+            else:
+                deletes.append((self.token, address))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO holder_balances (token, address, balance) VALUES (?, ?, ?)",
+            upserts
+        )
+        self.conn.executemany("DELETE FROM holder_balances WHERE token = ? AND address = ?", deletes)
+
+    def sync(self, fetch_page, head_block, page_size=10_000, reorg_depth=REORG_DEPTH):
+        """
+        Догрузить и применить новые переводы
+
+        Args:
+            fetch_page (callable): fetch_page(startblock, endblock, offset) -> список
+                переводов tokentx по возрастанию блока (не больше offset)
+            head_block (int): Текущий блок сети
+            page_size (int): Размер страницы tokentx
+            reorg_depth (int): Сколько последних блоков не применять
+
+        Returns:
+            int: Количество примененных переводов
+        """
+        end_block = head_block - reorg_depth
+        applied = 0
+        while True:
+            state = self.state()
+            start_block = state["last_block"] if state else 0
+            if start_block > end_block:
+                break
+            transfers = fetch_page(start_block, end_block, page_size)
+            page_applied = self.apply(transfers)
+            applied += page_applied
+            if len(transfers) < page_size:
+                break
+            if page_applied == 0:
+                # Страница целиком из одного уже учтенного блока - дальше не продвинуться
+                raise ValueError(f"В блоке {start_block} больше {page_size} переводов: постраничная загрузка по блокам невозможна")
+        return applied
+
+    def top(self, n):
+        """
+        Крупнейшие держатели
+
+        Returns:
+            list: [(адрес, баланс в минимальных единицах)] по убыванию баланса
+        """
+        rows = self.conn.execute(
+            "SELECT address, balance FROM holder_balances WHERE token = ? ORDER BY balance DESC LIMIT ?",
+            (self.token, n)
+        ).fetchall()
+        return [(row["address"], _decode(row["balance"])) for row in rows]
+
+    def balances(self, batch_size=10_000, by_balance=False):
+        """
+        Все балансы реестра без загрузки таблицы в память целиком
+
+        Args:
+            batch_size (int): Сколько строк читать из базы за раз
+            by_balance (bool): По убыванию баланса (по индексу) вместо порядка адресов
+
+        Yields:
+            tuple: (адрес, баланс в минимальных единицах)
+        """
+        order = "balance DESC" if by_balance else "address"
+        cursor = self.conn.execute(
+            f"SELECT address, balance FROM holder_balances WHERE token = ? ORDER BY {order}",
+            (self.token,)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield row["address"], _decode(row["balance"])
+
+    def holders_count(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM holder_balances WHERE token = ?", (self.token,)
+        ).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
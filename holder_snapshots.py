@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Снимки балансов держателей токена на произвольный блок или момент времени
+
+События Transfer токена хранятся в локальном индексе событий (event_index,
+chain.db). Снимок строится повтором переводов до нужного блока. Каждые
+SNAPSHOT_INTERVAL блоков сохраняется контрольная точка со всеми балансами,
+поэтому любой исторический снимок стоит одну загрузку контрольной точки
+и повтор не больше SNAPSHOT_INTERVAL блоков, а не всей истории.
+
+Индекс нужно синхронизировать с блока деплоя токена, иначе ранние
+переводы не попадут в балансы.
+
+Использование:
+  python holder_snapshots.py sync --start-block 60000000
+  python holder_snapshots.py snapshot --block 65000000 --output snapshot.csv
+  python holder_snapshots.py snapshot --timestamp 1735689600
+"""
+
+import argparse
+import csv
+import json
+import os
+import zlib
+import chain_db
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+# Шаг контрольных точек в блоках (~2.3 дня на Polygon)
+SNAPSHOT_INTERVAL = int(os.getenv('SNAPSHOT_INTERVAL', '100000'))
+DECIMALS = 18
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS holder_snapshot_checkpoints (
+    token TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    -- Первый блок индекса, от которого считались балансы
+    first_block INTEGER NOT NULL,
+    holders INTEGER NOT NULL,
+    supply TEXT NOT NULL,
+    -- zlib(JSON {адрес: баланс hex})
+    balances BLOB NOT NULL,
+    PRIMARY KEY (token, block_number)
+);
+"""
+
+def apply_transfer_events(balances, events):
+    """
+    Применить события Transfer к балансам (адрес -> целый баланс)
+
+    Args:
+        balances (dict): Балансы, изменяются на месте
+        events (list): События из EventIndex.get_events('Transfer', ...)
+
+    Returns:
+        int: Изменение общего предложения (минт минус сжигание)
+    """
+    supply_delta = 0
+    for event in events:
+        args = event["args"]
+        value = int(args["value"])
+        if value == 0:
+            continue
+        frm = args["from"].lower()
+        to = args["to"].lower()
+        if frm == ZERO_ADDRESS:
+            supply_delta += value
+        else:
+            balance = balances.get(frm, 0) - value
+            if balance > 0:
+                balances[frm] = balance
+            else:
+                balances.pop(frm, None)
+        if to == ZERO_ADDRESS:
+            supply_delta -= value
+        else:
+            balances[to] = balances.get(to, 0) + value
+    return supply_delta
+
+class HolderSnapshots:
+    """
+    Снимки балансов по индексу событий Transfer с контрольными точками
+    """
+
+    def __init__(self, index, db_path=None, interval=SNAPSHOT_INTERVAL):
+        self.index = index
+        self.token = index.address.lower()
+        self.interval = interval
+        self.conn = chain_db.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        # Статистика последнего снимка: блок контрольной точки и число повторенных событий
+        self.last_snapshot = {"checkpoint": None, "replayed": 0}
+
+    def final_block(self):
+        """
+        Последний блок индекса, который уже не перечитывается из-за реорганизаций
+
+        Returns:
+            int: Номер блока или None, если индекс пуст
+        """
+        state = self.index.checkpoint()
+        if state is None:
+            return None
+        return state[1] - self.index.reorg_depth
+
+    def _load_checkpoint(self, block, first_block):
+        row = self.conn.execute(
+            "SELECT block_number, supply, balances FROM holder_snapshot_checkpoints "
+            "WHERE token = ? AND first_block = ? AND block_number <= ? "
+            "ORDER BY block_number DESC LIMIT 1",
+            (self.token, first_block, block)
+        ).fetchone()
+        if row is None:
+            return first_block - 1, {}, 0
+        balances = {
+            address: int(value, 16)
+            for address, value in json.loads(zlib.decompress(row["balances"])).items()
+        }
+        return row["block_number"], balances, int(row["supply"], 16)
+
+    def _save_checkpoint(self, block, first_block, balances, supply):
+        payload = zlib.compress(json.dumps({address: f"{value:x}" for address, value in balances.items()}).encode())
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO holder_snapshot_checkpoints "
+                "(token, block_number, first_block, holders, supply, balances) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.token, block, first_block, len(balances), f"{supply:x}", payload)
+            )
+
+    def snapshot(self, block):
+        """
+        Балансы всех держателей на конец блока
+
+        Загружает ближайшую контрольную точку не позже block и повторяет
+        переводы после нее. Пройденные по пути границы SNAPSHOT_INTERVAL
+        в финализированной части индекса сохраняются как новые точки.
+
+        Args:
+            block (int): Номер блока
+
+        Returns:
+            tuple: (словарь адрес -> баланс в минимальных единицах, общее предложение)
+
+        Raises:
+            ValueError: Если индекс не покрывает блок
+        """
+        state = self.index.checkpoint()
+        if state is None or not state[0] <= block <= state[1]:
+            covered = f"{state[0]}-{state[1]}" if state else "пуст"
+            raise ValueError(f"Индекс Transfer не покрывает блок {block} (индекс: {covered}), выполните sync")
+        first_block = state[0]
+        final_block = self.final_block()
+
+        checkpoint_block, balances, supply = self._load_checkpoint(block, first_block)
+        self.last_snapshot = {"checkpoint": checkpoint_block if checkpoint_block >= first_block else None, "replayed": 0}
+
+        cursor = checkpoint_block
+        while cursor < block:
+            # Повторяем до следующей границы интервала, чтобы сохранить на ней точку
+            boundary = (cursor // self.interval + 1) * self.interval
+            window_end = min(boundary, block)
+            events = self.index.get_events('Transfer', cursor + 1, window_end)
+            supply += apply_transfer_events(balances, events)
+            self.last_snapshot["replayed"] += len(events)
+            cursor = window_end
+            if cursor == boundary and cursor <= final_block:
+                self._save_checkpoint(cursor, first_block, balances, supply)
+        return balances, supply
+
+    def build_checkpoints(self):
+        """
+        Создать контрольные точки на всех границах интервала в финализированной части индекса
+
+        Returns:
+            int: Количество контрольных точек токена
+        """
+        final_block = self.final_block()
+        if final_block is not None:
+            last_boundary = final_block // self.interval * self.interval
+            if last_boundary >= self.index.checkpoint()[0]:
+                self.snapshot(last_boundary)
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM holder_snapshot_checkpoints WHERE token = ?", (self.token,)
+        ).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+def block_at_timestamp(timestamp, get_block, chain_id):
+    """
+    Последний блок с timestamp <= timestamp (состояние "на момент времени")
+
+    Если момент позже последнего блока, возвращается последний блок.
+    """
+    from block_times import BlockTimestampCache
+
+    cache = BlockTimestampCache(chain_id)
+    try:
+        block = cache.find_block(timestamp + 1, get_block)
+        # find_block возвращает текущий блок, если timestamp + 1 еще не наступил;
+        # найденный блок уже в кэше, отдельный запрос не нужен
+        if cache.get_many([block])[block] <= timestamp:
+            return block
+        return block - 1
+    finally:
+        cache.close()
+
+def write_snapshot(path, balances):
+    """
+    Записать снимок в CSV (address,balance_raw,balance) по убыванию баланса
+    """
+    from token_utils import format_wei
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['address', 'balance_raw', 'balance'])
+        for address, value in sorted(balances.items(), key=lambda item: item[1], reverse=True):
+            writer.writerow([address, value, format_wei(value, DECIMALS)])
+
+def main():
+    from config import w3, token_v2_contract
+    from event_index import EventIndex, SCAN_WORKERS
+    from token_utils import format_wei
+
+    parser = argparse.ArgumentParser(description="Снимки балансов держателей ALIEN")
+    subparsers = parser.add_subparsers(dest='command', help='Доступные команды')
+
+    sync_parser = subparsers.add_parser('sync', help='Догрузить события Transfer и создать контрольные точки')
+    sync_parser.add_argument('--start-block', type=int, default=int(os.getenv('TOKEN_START_BLOCK', '0')), help='Блок деплоя токена')
+    sync_parser.add_argument('--workers', type=int, default=SCAN_WORKERS, help='Количество одновременных запросов get_logs')
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='Балансы на блок или момент времени')
+    target = snapshot_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--block', type=int, help='Номер блока')
+    target.add_argument('--timestamp', type=int, help='Unix timestamp')
+    snapshot_parser.add_argument('--output', help='CSV файл для снимка')
+
+    args = parser.parse_args()
+
+    if not token_v2_contract:
+        raise SystemExit("❌ Токен не настроен в .env")
+
+    index = EventIndex(token_v2_contract, events=('Transfer',))
+    snapshots = HolderSnapshots(index)
+    try:
+        if args.command == 'sync':
+            stored = index.sync(args.start_block, workers=args.workers)
+            checkpoints = snapshots.build_checkpoints()
+            first_block, last_block = index.checkpoint()
+            print(f"✅ Записано переводов: {stored} | индекс: блоки {first_block}-{last_block}")
+            print(f"📍 Контрольных точек: {checkpoints} (каждые {snapshots.interval} блоков)")
+        elif args.command == 'snapshot':
+            block = args.block if args.block is not None else block_at_timestamp(args.timestamp, w3.eth.get_block, w3.eth.chain_id)
+            balances, supply = snapshots.snapshot(block)
+            info = snapshots.last_snapshot
+            source = f"точка {info['checkpoint']}" if info["checkpoint"] is not None else "начало индекса"
+            print(f"📸 Снимок на блок {block}: держателей {len(balances)}, предложение {format_wei(supply, DECIMALS)} ALIEN")
+            print(f"⚡ {source} + {info['replayed']} переводов")
+            if args.output:
+                write_snapshot(args.output, balances)
+                print(f"💾 Сохранено в {args.output}")
+        else:
+            parser.print_help()
+    finally:
+        snapshots.close()
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,27 @@
 #!/usr/bin/env python3
+import argparse
+import csv
+import heapq
+import math
 import os
-import json
+from itertools import islice
 from decimal import Decimal, getcontext
-from urllib.parse import urlencode
-from urllib.request import urlopen
-from urllib.error import URLError, HTTPError
 from dotenv import load_dotenv
+from explorer_client import get_client
+from holder_ledger import HolderLedger
 
 getcontext().prec = 50
 
 load_dotenv()
 
 TOKEN_ADDRESS = os.getenv("TOKEN_ADDRESS", "0xa8e302849DdF86769C026d9A2405e1cdA01ED992")
-API_KEY = os.getenv("POLYGONSCAN_API_KEY") or os.getenv("ETHERSCAN_API_KEY")
-API_BASE = os.getenv("POLYGONSCAN_API", "https://api.polygonscan.com/api")
 TOP_N = int(os.getenv("TOP_N", "20"))
 DECIMALS = int(os.getenv("TOKEN_DECIMALS", "18"))
 
 
-def api_get(params: dict):
-    if not API_KEY:
-        raise SystemExit("POLYGONSCAN_API_KEY not set in .env")
-    params = {**params, "apikey": API_KEY}
-    url = f"{API_BASE}?{urlencode(params)}"
-    with urlopen(url, timeout=30) as resp:
-        return json.loads(resp.read())
+def api_get(params: dict, ttl=0):
+    # Shared client: keep-alive connections, rate limit, retries and response cache
+    return get_client().get(params, ttl=ttl)
 
 
 def try_tokenholderlist(contract: str):
@@ -46,16 +43,40 @@ def try_tokenholderlist(contract: str):
         return None
 
 
-def get_total_supply(contract: str) -> Decimal:
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+def to_tokens(raw: int) -> Decimal:
+    # Display-time conversion only; all aggregation works on integer base units
+    return Decimal(raw) / (Decimal(10) ** DECIMALS)
+
+
+def get_total_supply(contract: str) -> int:
     data = api_get({"module": "stats", "action": "tokensupply", "contractaddress": contract})
     if data.get("status") == "1":
-        return Decimal(data["result"]) / (Decimal(10) ** DECIMALS)
+        return int(data["result"])
     # Fallback zero if not provided
-    return Decimal(0)
+    return 0
+
+
+def apply_transfers(balances: dict, transfers) -> dict:
+    """Add tokentx transfers to balances (address -> integer base units)."""
+    get = balances.get
+    for tx in transfers:
+        value = int(tx["value"])
+        if value == 0:
+            continue
+        frm = tx["from"].lower()
+        to = tx["to"].lower()
+        if frm != ZERO_ADDRESS:
+            balances[frm] = get(frm, 0) - value
+        balances[to] = get(to, 0) + value
+    return balances
 
 
 def build_balances_from_transfers(contract: str):
-    balances: dict[str, Decimal] = {}
+    """Full rebuild from every transfer (kept for comparison with the ledger)."""
+    balances: dict[str, int] = {}
     page = 1
     offset = int(os.getenv("TX_OFFSET", "10000"))
     while True:
@@ -75,24 +96,199 @@ def build_balances_from_transfers(contract: str):
         txs = data.get("result", [])
         if not txs:
             break
-        for tx in txs:
-            frm = tx["from"].lower()
-            to = tx["to"].lower()
-            value = Decimal(tx["value"]) / (Decimal(10) ** DECIMALS)
-            if value == 0:
-                continue
-            if frm != "0x0000000000000000000000000000000000000000":
-                balances[frm] = balances.get(frm, Decimal(0)) - value
-            balances[to] = balances.get(to, Decimal(0)) + value
+        apply_transfers(balances, txs)
         if len(txs) < offset:
             break
         page += 1
-    # Clean near-zero
-    balances = {a: b for a, b in balances.items() if b > Decimal(0)}
+    # Integer balances are exact: drop emptied holders
+    balances = {a: b for a, b in balances.items() if b > 0}
     return balances
 
 
+def fetch_transfers_page(contract: str, start_block: int, end_block: int, offset: int) -> list:
+    """One tokentx page in ascending block order, starting at start_block."""
+    data = api_get(
+        {
+            "module": "account",
+            "action": "tokentx",
+            "contractaddress": contract,
+            "startblock": start_block,
+            "endblock": end_block,
+            "page": 1,
+            "offset": offset,
+            "sort": "asc",
+        }
+    )
+    if data.get("status") != "1":
+        # "No transactions found" is reported as status 0
+        return []
+    return data.get("result", [])
+
+
+def get_head_block() -> int:
+    data = api_get({"module": "proxy", "action": "eth_blockNumber"})
+    return int(data.get("result", "0x0"), 16)
+
+
+def sync_holder_ledger(contract: str) -> HolderLedger:
+    """Apply only the transfers that arrived since the previous run."""
+    ledger = HolderLedger(contract)
+    offset = int(os.getenv("TX_OFFSET", "10000"))
+    applied = ledger.sync(
+        lambda start, end, size: fetch_transfers_page(contract, start, end, size),
+        get_head_block(),
+        page_size=offset,
+    )
+    state = ledger.state()
+    position = f"block {state['last_block']}" if state else "empty"
+    print(f"Holder ledger: {applied} new transfers applied ({position})")
+    return ledger
+
+
+def top_holders(rows, n: int) -> list:
+    """Largest n (address, balance) rows using a bounded heap instead of a full sort."""
+    return heapq.nlargest(n, rows, key=lambda row: row[1])
+
+
+class HolderStats:
+    """Concentration metrics over balances streamed largest first, in one pass.
+
+    Gini uses the sorted-order formula G = 2*sum(i*x_i)/(n*S) - (n+1)/n with
+    ascending ranks i; for a descending stream sum(i*x_i) = (n+1)*S - sum(r*x_r),
+    so nothing has to be buffered. Percentile ranks need the holder count upfront.
+    """
+
+    def __init__(self, count: int, percentiles=(50, 90, 99), top_k: int = 10):
+        self.count = count
+        self.top_k = top_k
+        self.n = 0
+        self.total = 0
+        self.top_total = 0
+        self.rank_weighted = 0
+        # descending rank (1-based) -> percentile, nearest-rank method
+        self._ranks = {count - max(1, math.ceil(p / 100 * count)) + 1: p for p in percentiles} if count else {}
+        self.percentiles = {}
+
+    def add(self, balance: int):
+        self.n += 1
+        self.total += balance
+        self.rank_weighted += self.n * balance
+        if self.n <= self.top_k:
+            self.top_total += balance
+        if self.n in self._ranks:
+            self.percentiles[self._ranks[self.n]] = balance
+
+    def gini(self) -> float:
+        if self.n == 0 or self.total == 0:
+            return 0.0
+        ascending_weighted = (self.n + 1) * self.total - self.rank_weighted
+        return 2 * ascending_weighted / (self.n * self.total) - (self.n + 1) / self.n
+
+    def top_share(self) -> float:
+        return self.top_total / self.total if self.total else 0.0
+
+
+def stream_holders(rows_desc, stats: HolderStats, export_path: str = None, chunk_size: int = 10_000):
+    """Feed holders (largest first) into stats and optionally write them to CSV in chunks."""
+    writer = None
+    f = None
+    if export_path:
+        f = open(export_path, "w", newline="", encoding="utf-8")
+        writer = csv.writer(f)
+        writer.writerow(["rank", "address", "balance_raw", "balance"])
+    try:
+        rows_desc = iter(rows_desc)
+        while True:
+            chunk = list(islice(rows_desc, chunk_size))
+            if not chunk:
+                break
+            start = stats.n + 1
+            for _, bal in chunk:
+                stats.add(bal)
+            if writer:
+                writer.writerows(
+                    (start + i, addr, bal, to_tokens(bal)) for i, (addr, bal) in enumerate(chunk)
+                )
+    finally:
+        if f:
+            f.close()
+    return stats
+
+
+def print_stats(stats: HolderStats):
+    print(f"Concentration ({stats.n} holders):")
+    print(f"  Gini: {stats.gini():.4f} | top-{stats.top_k} share: {stats.top_share() * 100:.2f}%")
+    for p in sorted(stats.percentiles):
+        print(f"  p{p} balance: {to_tokens(stats.percentiles[p]):,.4f} ALIEN")
+
+
+def onchain_balance_source(contract: str):
+    """balanceOf / totalSupply readers pinned to a block, batched through Multicall3."""
+    from web3 import Web3
+    from config import w3, TOKEN_V2_ABI
+    from multicall import batch_read, prepare_call
+
+    # The short TOKEN_ABI has no totalSupply
+    token = w3.eth.contract(address=Web3.to_checksum_address(contract), abi=TOKEN_V2_ABI)
+
+    def balances_at(addresses, block):
+        calls = [prepare_call(token, "balanceOf", Web3.to_checksum_address(addr)) for addr in addresses]
+        return batch_read(calls, block)[1]
+
+    def total_supply_at(block):
+        return batch_read([prepare_call(token, "totalSupply")], block)[1][0]
+
+    return balances_at, total_supply_at
+
+
+def verify_ledger(ledger: HolderLedger, balances_at, total_supply_at, chunk_size: int = 500) -> bool:
+    """Compare every ledger balance with on-chain balances at the ledger's last block.
+
+    balances_at(addresses, block) returns balanceOf for each address and
+    total_supply_at(block) returns totalSupply (see onchain_balance_source).
+    """
+    state = ledger.state()
+    if not state:
+        print("Verify: ledger is empty")
+        return False
+    block = state["last_block"]
+
+    holders = ledger.balances()
+    count = 0
+    mismatches = 0
+    ledger_sum = 0
+    while True:
+        chunk = list(islice(holders, chunk_size))
+        if not chunk:
+            break
+        count += len(chunk)
+        onchain = balances_at([addr for addr, _ in chunk], block)
+        for (addr, bal), actual in zip(chunk, onchain):
+            ledger_sum += bal
+            if bal != actual:
+                mismatches += 1
+                print(f"  mismatch {addr}: ledger {bal} != balanceOf {actual}")
+
+    supply = total_supply_at(block)
+    exact = ledger_sum == supply == state["total"]
+    print(f"Verify @ block {block}: {count} holders, {mismatches} mismatches")
+    print(
+        f"  sum of balances {ledger_sum} | ledger supply {state['total']} | totalSupply {supply} | "
+        f"{'exact match' if exact else 'DIFFERENT'}"
+    )
+    return mismatches == 0 and exact
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Top token holders")
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="check ledger balances against on-chain balanceOf (needs RPC with state at the ledger block)",
+    )
+    parser.add_argument("--export", metavar="CSV", help="stream the full holder list (largest first) to a CSV file")
+    args = parser.parse_args()
+
     contract = TOKEN_ADDRESS
     print(f"Token: {contract}")
 
@@ -105,25 +301,45 @@ def main():
             addr = h.get("HolderAddress") or h.get("address")
             bal_raw = h.get("TokenHolderQuantity") or h.get("balance")
             try:
-                bal = Decimal(bal_raw) / (Decimal(10) ** DECIMALS)
-            except Exception:
-                bal = Decimal(0)
+                bal = int(bal_raw)
+            except (TypeError, ValueError):
+                bal = 0
             rows.append((addr, bal))
+        top = top_holders(rows, TOP_N)
+        holders_count = len(rows)
+        total_known = sum(b for _, b in rows)
+        if args.export:
+            # tokenholderlist returns only the largest holders; the list is small
+            stream_holders(top_holders(rows, len(rows)), HolderStats(len(rows)), args.export)
+        stats = None
     else:
-        print("tokenholderlist unavailable; building from transfers (tokentx)...")
-        balances = build_balances_from_transfers(contract)
-        rows = list(balances.items())
+        print("tokenholderlist unavailable; updating holder ledger from transfers (tokentx)...")
+        ledger = sync_holder_ledger(contract)
+        try:
+            top = ledger.top(TOP_N)
+            holders_count = ledger.holders_count()
+            state = ledger.state()
+            total_known = state["total"] if state else 0
+            stats = stream_holders(
+                ledger.balances(by_balance=True), HolderStats(holders_count), args.export
+            )
+            if args.verify and not verify_ledger(ledger, *onchain_balance_source(contract)):
+                raise SystemExit(1)
+        finally:
+            ledger.close()
 
-    rows.sort(key=lambda x: x[1], reverse=True)
-    top = rows[:TOP_N]
-
-    total_known = sum(b for _, b in rows)
-    print(f"Total supply (reported): {total_supply:,.0f}")
-    print(f"Holders discovered: {len(rows)} | Sum balances: {total_known:,.0f}")
+    print(f"Total supply (reported): {to_tokens(total_supply):,.0f}")
+    print(f"Holders discovered: {holders_count} | Sum balances: {to_tokens(total_known):,.0f}")
     print(f"Top {len(top)} holders:")
     for i, (addr, bal) in enumerate(top, 1):
-        pct = (bal / total_supply * 100) if total_supply > 0 else Decimal(0)
-        print(f"{i:>2}. {addr} | {bal:,.0f} ALIEN | {pct:.2f}%")
+        pct = (Decimal(bal) * 100 / total_supply) if total_supply > 0 else Decimal(0)
+        print(f"{i:>2}. {addr} | {to_tokens(bal):,.0f} ALIEN | {pct:.2f}%")
+    if stats:
+        print_stats(stats)
+    else:
+        print("Concentration metrics need the full holder ledger (tokenholderlist is capped at 200)")
+    if args.export:
+        print(f"Exported holders to {args.export}")
 
 
 if __name__ == "__main__":
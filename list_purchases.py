@@ -2,12 +2,12 @@
 import json
 import os
 from datetime import datetime
-import time
 from web3 import Web3
-from urllib.parse import urlencode
-from urllib.request import urlopen
-from urllib.error import URLError, HTTPError
 from dotenv import load_dotenv
+from block_times import BlockTimestampCache, fetch_block_timestamps_rpc
+from event_index import EventIndex, REORG_DEPTH
+from explorer_client import EXPLORER_CHAIN_ID, ExplorerError, get_client
+from log_scanner import RateLimitError
 
 # Load environment early
 load_dotenv()
@@ -23,6 +23,11 @@ except Exception:
     USE_RPC = False
 
 
+def get_chain_id() -> int:
+    # Block caches in chain.db are keyed by chain id; Polygonscan serves a fixed chain
+    return w3.eth.chain_id if USE_RPC else EXPLORER_CHAIN_ID
+
+
 def load_presale_contract(presale_address: str):
     artifact_path = os.path.join(
         "artifacts", "contracts", "AlienPresale.sol", "AlienPresale.json"
@@ -41,22 +46,35 @@ def load_presale_contract(presale_address: str):
 
 
 def find_block_by_timestamp(target_ts: int, search_window: int = 5_000) -> int:
-    """Binary search the block number closest to target_ts (>= target_ts)."""
+    """Find the first block with timestamp >= target_ts.
+
+    Interpolates from block/timestamp anchors persisted in chain.db, so repeated
+    lookups (presale start/end, report ranges) take only a few RPC calls.
+    """
     if not USE_RPC:
         raise RuntimeError("RPC not available")
-    low = 0
-    high = w3.eth.block_number
-
-    # Quick narrowing using step jumps if network allows
-    while low < high:
-        mid = (low + high) // 2
-        blk = w3.eth.get_block(mid)
-        blk_ts = blk.timestamp
-        if blk_ts < target_ts:
-            low = mid + 1
-        else:
-            high = mid
-    return low
+    cache = BlockTimestampCache(get_chain_id())
+    try:
+        block = cache.find_block(target_ts, w3.eth.get_block)
+        print(f"Block for timestamp {target_ts}: {block} ({cache.last_fetched} RPC calls)")
+        return block
+    finally:
+        cache.close()
+
+
+def fetch_block_timestamps_polygonscan(numbers):
+    """Query block timestamps via Polygonscan proxy (one request per block)."""
+    client = get_client()
+    timestamps = {}
+    for number in numbers:
+        data = client.get(
+            {"module": "proxy", "action": "eth_getBlockByNumber", "tag": hex(number), "boolean": "false"}
+        )
+        result = data.get("result")
+        # Do not cache a missing block as timestamp 0
+        if isinstance(result, dict) and result.get("timestamp"):
+            timestamps[number] = int(result["timestamp"], 16)
+    return timestamps
 
 
 def main():
@@ -70,18 +88,19 @@ def main():
     if USE_RPC:
         latest_block = w3.eth.block_number
     else:
-        api_key_probe = os.getenv("POLYGONSCAN_API_KEY") or os.getenv("ETHERSCAN_API_KEY")
-        base_url = os.getenv("POLYGONSCAN_API", "https://api.polygonscan.com/api")
-        if not api_key_probe:
+        if not (os.getenv("POLYGONSCAN_API_KEY") or os.getenv("ETHERSCAN_API_KEY")):
             raise SystemExit("RPC unavailable and POLYGONSCAN_API_KEY not set in .env")
-        url = f"{base_url}?{urlencode({'module':'proxy','action':'eth_blockNumber','apikey':api_key_probe})}"
-        with urlopen(url, timeout=15) as resp:
-            data = json.loads(resp.read())
+        data = get_client().get({"module": "proxy", "action": "eth_blockNumber"})
         latest_block = int(data.get("result", "0x0"), 16)
     # Presale start block can be provided to avoid heavy RPC usage
     env_start_block = os.getenv("PRESALE_START_BLOCK")
+    index = EventIndex(contract) if USE_RPC else None
+    indexed = index.checkpoint() if index else None
     if env_start_block:
         from_block = int(env_start_block)
+    elif indexed:
+        # The index already starts at the presale start block
+        from_block = indexed[0]
     else:
         # Try to start from presale start block to minimize range
         if USE_RPC:
@@ -98,61 +117,38 @@ def main():
             from_block = max(0, latest_block - default_span)
     to_block = latest_block
 
-    # Page through block ranges to avoid RPC "Block range is too large"
-    window_size = int(os.getenv("WINDOW_SIZE", "1000"))
+    # Sync the local event index (only new blocks are fetched) and read purchases from it
     logs_collected = []
-    cur_from = from_block
     rpc_failed = False
-    retry_limit = 3
-    while USE_RPC and cur_from <= to_block:
-        cur_to = min(cur_from + window_size, to_block)
+    if USE_RPC:
         try:
-            part = contract.events.TokensPurchased().get_logs(
-                from_block=cur_from, to_block=cur_to
+            index.sync(
+                from_block,
+                to_block,
+                window_size=int(os.getenv("WINDOW_SIZE", "1000")),
+                workers=int(os.getenv("SCAN_WORKERS", "4")),
             )
-            logs_collected.extend(part)
-            cur_from = cur_to + 1
-        except Exception as e:
-            msg = str(e)
-            # If provider rate-limited or large range, fallback to Polygonscan later
-            if ("Too many requests" in msg) or ("-32090" in msg):
-                if retry_limit > 0:
-                    retry_limit -= 1
-                    time.sleep(15)
-                    continue
-                rpc_failed = True
-                break
-            if ("Block range is too large" in msg) or ("-32062" in msg):
-                # shrink window and retry
-                if window_size > 100:
-                    window_size = max(100, window_size // 2)
-                    continue
-                # as a last resort, scan per-block in this small range
-                for b in range(cur_from, cur_to + 1):
-                    try:
-                        part_b = contract.events.TokensPurchased().get_logs(
-                            from_block=b, to_block=b
-                        )
-                        logs_collected.extend(part_b)
-                    except Exception:
-                        pass
-                cur_from = cur_to + 1
-                continue
-            # If other error and window can still be reduced, reduce window and retry
-            if window_size > 200:
-                window_size = max(200, window_size // 2)
-                continue
-            else:
-                raise
+            if index.last_scan["blocks"]:
+                print(
+                    f"Scanned {index.last_scan['blocks']} blocks at {index.blocks_per_second():,.0f} blocks/s"
+                )
+            logs_collected = index.get_events("TokensPurchased", from_block, to_block)
+        except RateLimitError:
+            # If provider rate-limited, fallback to Polygonscan later
+            rpc_failed = True
+        finally:
+            index.close()
 
     # If RPC failed or returned nothing, try Polygonscan API
+    failed_windows = []
     if rpc_failed or not logs_collected or not USE_RPC:
-        api_key = os.getenv("POLYGONSCAN_API_KEY") or os.getenv("ETHERSCAN_API_KEY")
-        if not api_key:
+        if not (os.getenv("POLYGONSCAN_API_KEY") or os.getenv("ETHERSCAN_API_KEY")):
             raise SystemExit("RPC limited and POLYGONSCAN_API_KEY not set in .env")
+        client = get_client()
         topic0 = Web3.keccak(text="TokensPurchased(address,uint256,uint256)").hex()
-        base_url = os.getenv("POLYGONSCAN_API", "https://api.polygonscan.com/api")
         step = int(os.getenv("SCAN_WINDOW", "50000"))
+        # Windows below this block are final: cache them so a rerun skips them
+        final_block = latest_block - REORG_DEPTH
         scan_from = from_block
         while scan_from <= to_block:
             scan_to = min(scan_from + step, to_block)
@@ -163,12 +159,9 @@ def main():
                 "toBlock": scan_to,
                 "address": Web3.to_checksum_address(presale_address),
                 "topic0": topic0,
-                "apikey": api_key,
             }
-            url = f"{base_url}?{urlencode(q)}"
             try:
-                with urlopen(url, timeout=30) as resp:
-                    data = json.loads(resp.read())
+                data = client.get(q, ttl=None if scan_to <= final_block else 0)
                 if data.get("status") == "1":
                     for it in data.get("result", []):
                         topics = it.get("topics", [])
@@ -196,11 +189,16 @@ def main():
                 elif data.get("status") == "0" and data.get("message") == "No records found":
                     pass
                 else:
-                    # Respect API rate limit: small sleep could be added, but avoid extra deps
-                    raise SystemExit(f"Polygonscan error: {data}")
-            except (HTTPError, URLError, TimeoutError) as e:
-                raise SystemExit(f"Polygonscan request failed: {e}")
+                    raise ExplorerError(f"Polygonscan error: {data}")
+            except ExplorerError as e:
+                # Keep scanning; the gap is reported below and refetched on the next run
+                print(f"Window {scan_from}-{scan_to} failed: {e}")
+                failed_windows.append((scan_from, scan_to))
             scan_from = scan_to + 1
+        print(
+            f"Polygonscan: {client.stats['requests']} requests, {client.stats['retries']} retries, "
+            f"{client.stats['cache_hits']} cached windows"
+        )
 
     print(
         f"Purchases found: {len(logs_collected)} (blocks {from_block}-{to_block}) for presale {presale_address}"
@@ -209,6 +207,20 @@ def main():
     buyers_to_matic = {}
     total_wei = 0
 
+    # Resolve timestamps for unique blocks once; cached blocks need no lookups
+    ts_cache = BlockTimestampCache(get_chain_id())
+    try:
+        block_numbers = [ev["blockNumber"] for ev in logs_collected]
+        if USE_RPC:
+            block_ts = ts_cache.resolve(block_numbers, lambda nums: fetch_block_timestamps_rpc(w3, nums))
+        else:
+            block_ts = ts_cache.resolve(block_numbers, fetch_block_timestamps_polygonscan)
+        print(
+            f"Block timestamps: {len(set(block_numbers))} unique blocks, {ts_cache.last_fetched} fetched"
+        )
+    finally:
+        ts_cache.close()
+
     for ev in logs_collected:
         args = ev["args"]
         buyer = args["buyer"]
@@ -217,21 +229,9 @@ def main():
         total_wei += amount_wei
         buyers_to_matic[buyer] = buyers_to_matic.get(buyer, 0) + amount_wei
 
-        if USE_RPC:
-            block = w3.eth.get_block(ev["blockNumber"])  # type: ignore[index]
-            ts = datetime.fromtimestamp(block.timestamp)
-        else:
-            # Query timestamp via Polygonscan proxy
-            api_key = os.getenv("POLYGONSCAN_API_KEY") or os.getenv("ETHERSCAN_API_KEY")
-            base_url = os.getenv("POLYGONSCAN_API", "https://api.polygonscan.com/api")
-            blk_hex = hex(ev["blockNumber"])
-            url = f"{base_url}?{urlencode({'module':'proxy','action':'eth_getBlockByNumber','tag':blk_hex,'boolean':'false','apikey':api_key})}"
-            with urlopen(url, timeout=15) as resp:
-                data = json.loads(resp.read())
-            ts_hex = data.get("result", {}).get("timestamp", "0x0")
-            ts = datetime.fromtimestamp(int(ts_hex, 16))
+        ts = datetime.fromtimestamp(block_ts[ev["blockNumber"]]) if ev["blockNumber"] in block_ts else "unknown"
         print(
-            f"- {buyer} | amount: {Web3.from_wei(amount_wei,'ether')} MATIC | tokens: {tokens/10**18:.0f} | tx: {ev['transactionHash'] if isinstance(ev['transactionHash'], str) else ev['transactionHash'].hex()} | time: {ts}"
+            f"- {buyer} | amount: {Web3.from_wei(amount_wei,'ether')} MATIC | tokens: {Web3.from_wei(tokens, 'ether'):,.0f} | tx: {ev['transactionHash'] if isinstance(ev['transactionHash'], str) else ev['transactionHash'].hex()} | time: {ts}"
         )
 
     print("\nTotals:")
@@ -243,6 +243,10 @@ def main():
         for addr, amt in buyers_to_matic.items():
             print(f"  {addr}: {Web3.from_wei(amt,'ether')} MATIC")
 
+    if failed_windows:
+        ranges = ", ".join(f"{a}-{b}" for a, b in failed_windows)
+        raise SystemExit(f"Incomplete: {len(failed_windows)} block windows failed ({ranges}); rerun to fetch them")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,253 @@
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+class RateLimitError(Exception):
+    """
+    RPC ограничил частоту запросов и повторные попытки исчерпаны
+    """
+
+def is_rate_limit_error(error):
+    msg = str(error)
+    return ("Too many requests" in msg) or ("-32090" in msg)
+
+def is_range_error(error):
+    msg = str(error)
+    return ("Block range is too large" in msg) or ("-32062" in msg)
+
+def is_size_error(error):
+    msg = str(error).lower()
+    return ("query returned more than" in msg) or ("response size" in msg) or ("too many results" in msg)
+
+WINDOW_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_windows (
+    endpoint TEXT PRIMARY KEY,
+    window_size INTEGER NOT NULL,
+    ceiling INTEGER
+);
+"""
+
+def _endpoint_key(endpoint):
+    # URL может содержать API ключ: храним только хост и хеш полного адреса
+    parts = urlsplit(endpoint)
+    digest = hashlib.sha256(endpoint.encode()).hexdigest()[:16]
+    return f"{parts.netloc}#{digest}"
+
+class WindowController:
+    """
+    Адаптивный размер окна get_logs (AIMD)
+
+    Пока ответы быстрые и небольшие, окно растет на фиксированный шаг;
+    при ошибке диапазона или размера ответа - уменьшается вдвое. Размер
+    окна, на котором RPC отвечает ошибкой диапазона, запоминается как
+    потолок, чтобы не упираться в лимит провайдера повторно.
+    """
+
+    def __init__(self, window_size=1000, min_window=100, max_window=100_000, increase=250,
+                 target_seconds=2.0, max_logs=5_000, endpoint=None, ceiling=None):
+        self.min_window = min_window
+        self.max_window = max_window
+        self.increase = increase
+        self.target_seconds = target_seconds
+        self.max_logs = max_logs
+        self.endpoint = endpoint
+        self.ceiling = ceiling
+        # Самое большое окно, на котором RPC ответил без ошибки
+        self.best_success = 0
+        self._lock = threading.Lock()
+        self.window_size = self._clamp(window_size)
+
+    def _clamp(self, size):
+        upper = self.max_window if self.ceiling is None else min(self.max_window, self.ceiling)
+        return max(self.min_window, min(upper, size))
+
+    def on_success(self, span, seconds, logs_count):
+        """
+        Учесть успешный ответ: окно растет, если ответ быстрый и небольшой
+        """
+        with self._lock:
+            if seconds <= self.target_seconds * 2:
+                self.best_success = max(self.best_success, span)
+            if seconds > self.target_seconds * 2 or logs_count > self.max_logs:
+                # Ответ на пределе - уменьшаем окно заранее, не дожидаясь ошибки
+                self.window_size = self._clamp(min(self.window_size, span) // 2)
+            elif seconds < self.target_seconds and logs_count < self.max_logs // 2 and span >= self.window_size:
+                self.window_size = self._clamp(self.window_size + self.increase)
+
+    def on_range_error(self, span, minimum=None):
+        """
+        Учесть ошибку диапазона: окно уменьшается вдвое, а потолок ставится
+        посередине между лучшим успешным окном и упавшим (бинарный поиск лимита)
+        """
+        with self._lock:
+            if self.best_success < span:
+                limit = max(self.min_window, (self.best_success + span) // 2)
+            else:
+                limit = max(self.min_window, span - 1)
+            self.ceiling = limit if self.ceiling is None else min(self.ceiling, limit)
+            self.window_size = max(minimum or self.min_window, self._clamp(min(self.window_size, span) // 2))
+
+    def on_size_error(self, span, minimum=None):
+        """
+        Учесть слишком большой ответ: окно уменьшается вдвое без изменения потолка
+        """
+        with self._lock:
+            self.window_size = max(minimum or self.min_window, self._clamp(min(self.window_size, span) // 2))
+
+    @classmethod
+    def for_endpoint(cls, endpoint, window_size=1000, db_path=None, **kwargs):
+        """
+        Создать контроллер с сохраненным для RPC окном
+
+        Args:
+            endpoint (str): URL RPC провайдера
+            window_size (int): Окно по умолчанию, если для провайдера ничего не сохранено
+            db_path (str): Путь к chain.db
+
+        Returns:
+            WindowController: Контроллер окна
+        """
+        import chain_db
+
+        conn = chain_db.connect(db_path)
+        try:
+            conn.executescript(WINDOW_SCHEMA)
+            row = conn.execute(
+                "SELECT window_size, ceiling FROM scan_windows WHERE endpoint = ?",
+                (_endpoint_key(endpoint),)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row:
+            window_size = row["window_size"]
+            kwargs.setdefault("ceiling", row["ceiling"])
+        return cls(window_size, endpoint=endpoint, **kwargs)
+
+    def save(self, db_path=None):
+        """
+        Запомнить текущее окно для RPC провайдера
+        """
+        if not self.endpoint:
+            return
+        import chain_db
+
+        conn = chain_db.connect(db_path)
+        try:
+            with conn:
+                conn.executescript(WINDOW_SCHEMA)
+                # Следующий запуск начинает с лучшего окна, а не с уменьшенного после ошибки
+                conn.execute(
+                    "INSERT OR REPLACE INTO scan_windows (endpoint, window_size, ceiling) VALUES (?, ?, ?)",
+                    (_endpoint_key(self.endpoint), self._clamp(max(self.window_size, self.best_success)), self.ceiling)
+                )
+        finally:
+            conn.close()
+
+def _fetch_window(fetch, from_block, to_block, controller, retry_limit, backoff):
+    """
+    Получить логи одного окна, дробя его при ошибках диапазона
+
+    Returns:
+        list: Логи окна в порядке блоков
+    """
+    while True:
+        started = time.perf_counter()
+        try:
+            part = fetch(from_block, to_block)
+            controller.on_success(to_block - from_block + 1, time.perf_counter() - started, len(part))
+            return part
+        except Exception as e:
+            if is_rate_limit_error(e):
+                if retry_limit > 0:
+                    retry_limit -= 1
+                    time.sleep(backoff)
+                    continue
+                raise RateLimitError(str(e)) from e
+
+            span = to_block - from_block + 1
+            # Ошибка диапазона: дробим окно до 100 блоков, другие ошибки - до 200
+            minimum = 100 if is_range_error(e) or is_size_error(e) else 200
+            if span > minimum:
+                if is_range_error(e):
+                    controller.on_range_error(span, minimum)
+                else:
+                    controller.on_size_error(span, minimum)
+                mid = from_block + span // 2
+                return (
+                    _fetch_window(fetch, from_block, mid - 1, controller, retry_limit, backoff)
+                    + _fetch_window(fetch, mid, to_block, controller, retry_limit, backoff)
+                )
+            if is_range_error(e):
+                # as a last resort, scan per-block in this small range.
+                # A failed block must not be skipped: EventIndex checkpoints
+                # every returned window, so a dropped block would never be rescanned
+                part = []
+                for b in range(from_block, to_block + 1):
+                    part.extend(_fetch_block(fetch, b, retry_limit, backoff))
+                return part
+            raise
+
+def _fetch_block(fetch, block, retry_limit, backoff):
+    """
+    Получить логи одного блока; ошибки, кроме ограничения частоты, пробрасываются
+    """
+    while True:
+        try:
+            return fetch(block, block)
+        except Exception as e:
+            if is_rate_limit_error(e) and retry_limit > 0:
+                retry_limit -= 1
+                time.sleep(backoff)
+                continue
+            if is_rate_limit_error(e):
+                raise RateLimitError(str(e)) from e
+            raise
+
+def scan_logs(fetch, from_block, to_block, window_size=1000, workers=1, retry_limit=3, backoff=15, controller=None):
+    """
+    Получить логи в диапазоне блоков окнами через пул потоков
+
+    Окна запрашиваются параллельно (не более workers одновременно), но
+    возвращаются строго по порядку блоков. При ошибке "Block range is too
+    large" окно дробится (в крайнем случае диапазон сканируется по блокам),
+    при ограничении частоты запросов - пауза и повтор. Размер следующих
+    окон выбирает WindowController по скорости и размеру ответов.
+
+    Args:
+        fetch (callable): fetch(from_block, to_block) -> list логов
+        from_block (int): Начальный блок
+        to_block (int): Конечный блок (включительно)
+        window_size (int): Начальный размер окна, если controller не передан
+        workers (int): Количество одновременных запросов
+        retry_limit (int): Количество повторов при ограничении частоты
+        backoff (float): Пауза перед повтором в секундах
+        controller (WindowController): Адаптивный размер окна
+
+    Yields:
+        tuple: (начало окна, конец окна, список логов)
+
+    Raises:
+        RateLimitError: Если RPC продолжает ограничивать запросы
+    """
+    if controller is None:
+        controller = WindowController(window_size)
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    pending = deque()
+    cursor = from_block
+    try:
+        while cursor <= to_block or pending:
+            # Держим в работе не больше двух окон на поток, чтобы не копить результаты
+            while cursor <= to_block and len(pending) < max(1, workers) * 2:
+                win_to = min(cursor + controller.window_size - 1, to_block)
+                future = pool.submit(_fetch_window, fetch, cursor, win_to, controller, retry_limit, backoff)
+                pending.append((cursor, win_to, future))
+                cursor = win_to + 1
+
+            win_from, win_to, future = pending.popleft()
+            yield win_from, win_to, future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,235 @@
+import os
+from eth_abi import decode
+from hexbytes import HexBytes
+from web3 import Web3
+from config import w3
+from batch_provider import send_batch
+
+# Multicall3 задеплоен по одному и тому же адресу почти во всех EVM сетях
+MULTICALL3_ADDRESS = Web3.to_checksum_address(
+    os.getenv('MULTICALL3_ADDRESS', '0xcA11bde05977b3631167028862bE2a173976CA11')
+)
+
+# ABI Multicall3 (только используемые функции)
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "address", "name": "addr", "type": "address"}],
+        "name": "getEthBalance",
+        "outputs": [{"internalType": "uint256", "name": "balance", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "getBlockNumber",
+        "outputs": [{"internalType": "uint256", "name": "blockNumber", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "getCurrentBlockTimestamp",
+        "outputs": [{"internalType": "uint256", "name": "timestamp", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+# None - еще не проверяли, True/False - результат проверки наличия Multicall3
+_multicall_available = None
+
+def _abi_type(param):
+    """
+    Построить строку типа для eth_abi (с поддержкой tuple)
+    """
+    if param['type'].startswith('tuple'):
+        inner = ','.join(_abi_type(c) for c in param['components'])
+        return f"({inner}){param['type'][len('tuple'):]}"
+    return param['type']
+
+def _output_types(contract, fn_name, args_count):
+    for item in contract.abi:
+        if item.get('type') == 'function' and item.get('name') == fn_name and len(item.get('inputs', [])) == args_count:
+            return [_abi_type(o) for o in item.get('outputs', [])]
+    raise ValueError(f"Функция {fn_name} не найдена в ABI контракта {contract.address}")
+
+def _normalize(abi_type, value):
+    if abi_type == 'address':
+        return Web3.to_checksum_address(value)
+    return value
+
+def prepare_call(contract, fn_name, *args):
+    """
+    Подготовить view-вызов контракта для пакетного чтения
+
+    Args:
+        contract: Контракт web3
+        fn_name (str): Имя view-функции
+        *args: Аргументы функции
+
+    Returns:
+        dict: Адрес, calldata и типы результата
+    """
+    return {
+        "target": contract.address,
+        "data": contract.encode_abi(fn_name, args=list(args)),
+        "types": _output_types(contract, fn_name, len(args))
+    }
+
+def prepare_eth_balance(address):
+    """
+    Подготовить чтение баланса MATIC для пакетного чтения
+
+    Через Multicall3 читается getEthBalance, без Multicall3 - eth_getBalance
+    в том же JSON-RPC пакете.
+
+    Args:
+        address (str): Адрес (checksum)
+
+    Returns:
+        dict: Вызов в формате prepare_call
+    """
+    call = prepare_call(_multicall_contract(), 'getEthBalance', address)
+    call["eth_balance"] = address
+    return call
+
+def _decode_result(call, raw):
+    values = decode(call["types"], bytes(HexBytes(raw)))
+    values = [_normalize(t, v) for t, v in zip(call["types"], values)]
+    return values[0] if len(values) == 1 else tuple(values)
+
+def _multicall_contract():
+    return w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+
+def _read_multicall(calls, block_identifier):
+    multicall = _multicall_contract()
+
+    # Первые два вызова - номер и время блока, на котором выполнен весь пакет
+    payload = [
+        (MULTICALL3_ADDRESS, False, HexBytes(multicall.encode_abi('getBlockNumber'))),
+        (MULTICALL3_ADDRESS, False, HexBytes(multicall.encode_abi('getCurrentBlockTimestamp')))
+    ]
+    payload += [(c["target"], True, HexBytes(c["data"])) for c in calls]
+
+    results = multicall.functions.aggregate3(payload).call(block_identifier=block_identifier)
+
+    block = {
+        "number": decode(['uint256'], results[0][1])[0],
+        "timestamp": decode(['uint256'], results[1][1])[0]
+    }
+    return block, [(success, data) for success, data in results[2:]]
+
+def _read_rpc_batch(calls, block_identifier):
+    # Фиксируем блок, чтобы все eth_call выполнились на одном состоянии
+    if isinstance(block_identifier, int):
+        block_param = hex(block_identifier)
+        requests = [('eth_getBlockByNumber', [block_param, False])]
+    else:
+        latest = w3.eth.get_block(block_identifier)
+        block_param = hex(latest.number)
+        requests = []
+
+    requests += [
+        ('eth_getBalance', [c["eth_balance"], block_param]) if "eth_balance" in c
+        else ('eth_call', [{'to': c["target"], 'data': c["data"]}, block_param])
+        for c in calls
+    ]
+
+    responses = send_batch(w3.provider, requests)
+
+    if isinstance(block_identifier, int):
+        block_raw = responses[0].get('result') or {}
+        block = {
+            "number": int(block_raw.get('number', hex(block_identifier)), 16),
+            "timestamp": int(block_raw.get('timestamp', '0x0'), 16)
+        }
+        responses = responses[1:]
+    else:
+        block = {"number": latest.number, "timestamp": latest.timestamp}
+
+    results = []
+    for call, response in zip(calls, responses):
+        if 'error' in response:
+            results.append((False, b''))
+        elif "eth_balance" in call:
+            # eth_getBalance возвращает число: кодируем его как результат uint256
+            results.append((True, int(response['result'], 16).to_bytes(32, 'big')))
+        else:
+            results.append((True, response.get('result', '0x')))
+    return block, results
+
+def _has_multicall():
+    global _multicall_available
+    if _multicall_available is None:
+        _multicall_available = len(w3.eth.get_code(MULTICALL3_ADDRESS)) > 0
+    return _multicall_available
+
+def batch_read(calls, block_identifier='latest', allow_failure=False):
+    """
+    Выполнить несколько view-вызовов за один запрос на одном блоке
+
+    Сначала используется Multicall3 aggregate3 (один eth_call), если контракт
+    не задеплоен - пакетный JSON-RPC запрос.
+
+    Args:
+        calls (list): Вызовы, подготовленные через prepare_call
+        block_identifier: Номер блока или тег ('latest')
+        allow_failure (bool): Возвращать None для упавших вызовов вместо ошибки
+
+    Returns:
+        tuple: (блок {"number", "timestamp"}, список результатов)
+    """
+    global _multicall_available
+
+    block = None
+    if _multicall_available is not False:
+        try:
+            block, raw_results = _read_multicall(calls, block_identifier)
+            _multicall_available = True
+        except Exception:
+            # Ошибка могла быть сетевой - переключаемся, только если контракта нет
+            _multicall_available = None
+            if _has_multicall():
+                raise
+
+    if block is None:
+        block, raw_results = _read_rpc_batch(calls, block_identifier)
+
+    results = []
+    for call, (success, data) in zip(calls, raw_results):
+        if not success:
+            if not allow_failure:
+                raise ValueError(f"Вызов к {call['target']} завершился ошибкой на блоке {block['number']}")
+            results.append(None)
+            continue
+        results.append(_decode_result(call, data))
+
+    return block, results
@@ -0,0 +1,171 @@
+import heapq
+import threading
+from contextlib import contextmanager
+
+def is_nonce_error(error):
+    msg = str(error).lower()
+    return ("nonce too low" in msg) or ("already known" in msg) or ("nonce too high" in msg)
+
+class NonceManager:
+    """
+    Локальная выдача nonce для отправителей
+
+    Первый nonce берется из сети с учетом pending транзакций, дальше
+    номера выдаются локально без обращения к RPC, поэтому несколько
+    транзакций можно отправить подряд, не дожидаясь майнинга первой.
+    Nonce неотправленной транзакции возвращается и выдается снова, чтобы
+    в последовательности не оставалось дыр.
+    """
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self._lock = threading.Lock()
+        # Адрес -> следующий новый nonce
+        self._next = {}
+        # Адрес -> возвращенные nonce (выдаются первыми)
+        self._released = {}
+        # Адреса, у которых отправка упала после передачи узлу: перед следующей
+        # выдачей nonce перечитывается из сети
+        self._stale = set()
+
+    def _sync(self, address):
+        # pending учитывает транзакции в мемпуле, а не только в блоках
+        chain_nonce = self.w3.eth.get_transaction_count(address, 'pending')
+        self._next[address] = max(chain_nonce, self._next.get(address, 0))
+        self._released[address] = [n for n in self._released.get(address, []) if n >= chain_nonce]
+        heapq.heapify(self._released[address])
+
+    def next_nonce(self, address):
+        """
+        Зарезервировать nonce для адреса
+
+        Args:
+            address (str): Адрес отправителя (checksum)
+
+        Returns:
+            int: Nonce для новой транзакции
+        """
+        with self._lock:
+            if address not in self._next:
+                self._sync(address)
+            elif address in self._stale:
+                self._resync(address)
+            released = self._released[address]
+            if released:
+                return heapq.heappop(released)
+            nonce = self._next[address]
+            self._next[address] = nonce + 1
+            return nonce
+
+    def release(self, address, nonce):
+        """
+        Вернуть nonce транзакции, которая не была отправлена
+
+        Args:
+            address (str): Адрес отправителя
+            nonce (int): Зарезервированный nonce
+        """
+        with self._lock:
+            if address not in self._next:
+                return
+            if nonce == self._next[address] - 1:
+                self._next[address] = nonce
+                # Свернуть возвращенные номера, примыкающие к концу
+                released = self._released[address]
+                while released and max(released) == self._next[address] - 1:
+                    released.remove(self._next[address] - 1)
+                    self._next[address] -= 1
+                heapq.heapify(released)
+            else:
+                heapq.heappush(self._released[address], nonce)
+
+    def resync(self, address):
+        """
+        Перечитать nonce из сети (после ошибки nonce или отправки из другого процесса)
+
+        Args:
+            address (str): Адрес отправителя
+        """
+        with self._lock:
+            self._resync(address)
+
+    def _resync(self, address):
+        # Сеть - источник истины: локальный счетчик мог уйти вперед или отстать
+        self._next[address] = self.w3.eth.get_transaction_count(address, 'pending')
+        self._released[address] = []
+        self._stale.discard(address)
+
+    def mark_stale(self, address):
+        """
+        Перечитать nonce из сети перед следующей выдачей
+
+        Args:
+            address (str): Адрес отправителя
+        """
+        with self._lock:
+            self._stale.add(address)
+
+    @contextmanager
+    def reserve(self, address):
+        """
+        Зарезервировать nonce на время построения и отправки транзакции
+
+        До вызова reservation.broadcasting() (сборка, оценка газа, подпись)
+        ошибка возвращает nonce для повторной выдачи. После него транзакция
+        могла уже попасть в мемпул (таймаут ответа, "replacement transaction
+        underpriced"), поэтому nonce не возвращается, а счетчик перечитывается
+        из сети перед следующей выдачей. При ошибке nonce счетчик
+        перечитывается сразу.
+
+        Args:
+            address (str): Адрес отправителя (checksum)
+
+        Yields:
+            NonceReservation: nonce и отметка начала отправки
+        """
+        reservation = NonceReservation(self.next_nonce(address))
+        try:
+            yield reservation
+        except Exception as e:
+            if is_nonce_error(e):
+                self.resync(address)
+            elif reservation.sent:
+                self.mark_stale(address)
+            else:
+                self.release(address, reservation.nonce)
+            raise
+
+class NonceReservation:
+    """
+    Nonce, выданный NonceManager.reserve
+    """
+
+    def __init__(self, nonce):
+        self.nonce = nonce
+        self.sent = False
+
+    def broadcasting(self):
+        """
+        Отметить, что транзакция передается узлу: nonce больше не возвращается
+        """
+        self.sent = True
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def get_nonce_manager(w3=None):
+    """
+    Получить общий NonceManager для подключения
+
+    Args:
+        w3: Экземпляр Web3. Если None, используется config.w3
+
+    Returns:
+        NonceManager: Менеджер nonce, общий для всех модулей процесса
+    """
+    if w3 is None:
+        from config import w3
+    with _managers_lock:
+        if id(w3) not in _managers:
+            _managers[id(w3)] = NonceManager(w3)
+        return _managers[id(w3)]
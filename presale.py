@@ -1,5 +1,10 @@
 from web3 import Web3
 from config import w3, presale_contract, PRIVATE_KEY, WALLET_ADDRESS
+from tx_engine import get_engine
+from receipt_tracker import get_tracker
+from multicall import batch_read, prepare_call
+import read_cache
+from read_cache import get_read_cache
 
 def get_presale_status():
     """
@@ -12,16 +17,19 @@ def get_presale_status():
         return {"error": "Пресейл контракт не настроен"}
     
     try:
-        # Получаем текущее время
-        current_time = w3.eth.get_block('latest').timestamp
-        
-        # Получаем параметры пресейла
-        start_time = presale_contract.functions.startTime().call()
-        end_time = presale_contract.functions.endTime().call()
-        hard_cap = presale_contract.functions.hardCap().call()
-        total_raised = presale_contract.functions.totalRaised().call()
-        paused = presale_contract.functions.paused().call()
-        token_price = presale_contract.functions.tokenPrice().call()
+        # Получаем время блока и параметры пресейла одним запросом на одном блоке
+        # (с READ_CACHE повторный статус в том же блоке берется из кэша чтений)
+        read = get_read_cache().batch_read if read_cache.READ_CACHE else batch_read
+        block, results = read([
+            prepare_call(presale_contract, 'startTime'),
+            prepare_call(presale_contract, 'endTime'),
+            prepare_call(presale_contract, 'hardCap'),
+            prepare_call(presale_contract, 'totalRaised'),
+            prepare_call(presale_contract, 'paused'),
+            prepare_call(presale_contract, 'tokenPrice')
+        ])
+        current_time = block["timestamp"]
+        start_time, end_time, hard_cap, total_raised, paused, token_price = results
         
         # Проверяем статус
         is_active = current_time >= start_time and current_time <= end_time and not paused
@@ -40,6 +48,7 @@ def get_presale_status():
         return {
             "status": "Пресейл контракт подключен",
             "address": presale_contract.address,
+            "block_number": block["number"],
             "current_time": current_time,
             "start_time": start_time,
             "end_time": end_time,
@@ -59,12 +68,13 @@ def get_presale_status():
     except Exception as e:
         return {"error": f"Ошибка получения статуса: {str(e)}"}
 
-def buy_tokens(amount_matic):
+def buy_tokens(amount_matic, urgency='normal'):
     """
     Купить токены ALIEN за MATIC
     
     Args:
         amount_matic (float): Количество MATIC для покупки
+        urgency (str): Срочность комиссии: slow, normal или fast
     
     Returns:
         str: Хеш транзакции
@@ -102,25 +112,12 @@ def buy_tokens(amount_matic):
         if amount_wei > remaining_cap:
             raise ValueError(f"Сумма превышает оставшийся hardcap. Максимум: {w3.from_wei(remaining_cap, 'ether')} MATIC")
         
-        # Получаем nonce
-        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = presale_contract.functions.buyTokens().build_transaction({
-            'from': wallet_address,
-            'value': amount_wei,
-            'nonce': nonce,
-            'gas': 200000,  # Можно оптимизировать
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            presale_contract.functions.buyTokens(),
+            value=amount_wei,
+            urgency=urgency
+        )
         
         return tx_hash.hex()
         
@@ -129,10 +126,13 @@ def buy_tokens(amount_matic):
         print(f"🔍 Детали: {type(e).__name__}")
         raise e
 
-def claim_tokens():
+def claim_tokens(urgency='normal'):
     """
     Забрать купленные токены
     
+    Args:
+        urgency (str): Срочность комиссии: slow, normal или fast
+    
     Returns:
         str: Хеш транзакции
     """
@@ -150,23 +150,11 @@ def claim_tokens():
         if claimable_tokens == 0:
             raise ValueError("Нет токенов для забора")
         
-        # Получаем nonce
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = presale_contract.functions.claimTokens().build_transaction({
-            'from': wallet_address,
-            'nonce': nonce,
-            'gas': 150000,  # Можно оптимизировать
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            presale_contract.functions.claimTokens(),
+            urgency=urgency
+        )
         
         return tx_hash.hex()
         
@@ -189,24 +177,10 @@ def withdraw_funds():
         raise ValueError("Приватный ключ не настроен в .env")
     
     try:
-        # Получаем nonce
-        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = presale_contract.functions.withdrawFunds().build_transaction({
-            'from': wallet_address,
-            'nonce': nonce,
-            'gas': 100000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            presale_contract.functions.withdrawFunds()
+        )
         
         return tx_hash.hex()
         
@@ -229,24 +203,10 @@ def withdraw_unsold_tokens():
         raise ValueError("Приватный ключ не настроен в .env")
     
     try:
-        # Получаем nonce
-        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = presale_contract.functions.withdrawUnsoldTokens().build_transaction({
-            'from': wallet_address,
-            'nonce': nonce,
-            'gas': 100000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            presale_contract.functions.withdrawUnsoldTokens()
+        )
         
         return tx_hash.hex()
         
@@ -272,24 +232,10 @@ def pause_presale(status):
         raise ValueError("Приватный ключ не настроен в .env")
     
     try:
-        # Получаем nonce
-        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = presale_contract.functions.pausePresale(status).build_transaction({
-            'from': wallet_address,
-            'nonce': nonce,
-            'gas': 100000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            presale_contract.functions.pausePresale(status)
+        )
         
         return tx_hash.hex()
         
@@ -328,6 +274,31 @@ def get_presale_info():
     except Exception as e:
         return {"error": f"Ошибка получения информации: {str(e)}"}
 
+def _transaction_result(tx_hash, receipt):
+    if receipt.status == 0:
+        # Транзакция провалилась, получаем детали ошибки
+        try:
+            tx = w3.eth.get_transaction(tx_hash)
+            # Пытаемся декодировать ошибку
+            error_msg = "Транзакция провалилась"
+            if hasattr(receipt, 'logs') and receipt.logs:
+                error_msg = f"Ошибка: {receipt.logs}"
+        except:
+            error_msg = "Транзакция провалилась (не удалось получить детали)"
+        
+        return {
+            "success": False,
+            "error": error_msg,
+            "gas_used": receipt.gasUsed,
+            "block_number": receipt.blockNumber
+        }
+    else:
+        return {
+            "success": True,
+            "gas_used": receipt.gasUsed,
+            "block_number": receipt.blockNumber
+        }
+
 def wait_for_transaction(tx_hash, timeout=300):
     """
     Ожидать подтверждения транзакции
@@ -340,31 +311,27 @@ def wait_for_transaction(tx_hash, timeout=300):
         dict: Результат транзакции
     """
     try:
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
-        
-        if receipt.status == 0:
-            # Транзакция провалилась, получаем детали ошибки
-            try:
-                tx = w3.eth.get_transaction(tx_hash)
-                # Пытаемся декодировать ошибку
-                error_msg = "Транзакция провалилась"
-                if hasattr(receipt, 'logs') and receipt.logs:
-                    error_msg = f"Ошибка: {receipt.logs}"
-            except:
-                error_msg = "Транзакция провалилась (не удалось получить детали)"
-            
-            return {
-                "success": False,
-                "error": error_msg,
-                "gas_used": receipt.gasUsed,
-                "block_number": receipt.blockNumber
-            }
-        else:
-            return {
-                "success": True,
-                "gas_used": receipt.gasUsed,
-                "block_number": receipt.blockNumber
-            }
+        receipt = get_tracker().track(tx_hash, timeout).result()
+        return _transaction_result(tx_hash, receipt)
             
     except Exception as e:
-        return {"error": f"Ошибка ожидания транзакции: {str(e)}"} 
\ No newline at end of file
+        return {"error": f"Ошибка ожидания транзакции: {str(e)}"}
+
+def wait_for_transactions(tx_hashes, timeout=300):
+    """
+    Ожидать подтверждения нескольких транзакций одним циклом опроса
+    
+    Args:
+        tx_hashes (list): Хеши транзакций
+        timeout (int): Таймаут в секундах на каждую транзакцию
+    
+    Returns:
+        list: Результаты транзакций в порядке tx_hashes
+    """
+    results = []
+    for tx_hash, receipt in zip(tx_hashes, get_tracker().wait_all(tx_hashes, timeout)):
+        if isinstance(receipt, Exception):
+            results.append({"error": f"Ошибка ожидания транзакции: {str(receipt)}"})
+        else:
+            results.append(_transaction_result(tx_hash, receipt))
+    return results
@@ -0,0 +1,201 @@
+import os
+import threading
+import time
+
+# Как часто (с) проверять номер блока; чаще нового блока нет смысла
+BLOCK_TIME = float(os.getenv('BLOCK_TIME', '2'))
+# READ_CACHE=0 отключает кэш view-вызовов
+READ_CACHE = os.getenv('READ_CACHE', '1') != '0'
+
+class ReadCache:
+    """
+    Кэш view-вызовов в пределах одного блока
+
+    Ключ - (номер блока, адрес контракта, calldata). Промах выполняется
+    на зафиксированном номере блока, поэтому все чтения одной команды
+    согласованы. Номер блока проверяется не чаще раза в max_age секунд;
+    с приходом нового блока кэш очищается.
+    """
+
+    def __init__(self, w3, max_age=BLOCK_TIME):
+        self.w3 = w3
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._block = None
+        self._checked_at = 0.0
+        self._entries = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def block_number(self):
+        """
+        Текущий блок кэша (запрашивается у RPC не чаще раза в max_age секунд)
+
+        Returns:
+            int: Номер блока
+        """
+        with self._lock:
+            if self._block is not None and time.monotonic() - self._checked_at < self.max_age:
+                return self._block
+        self.observe_block(self.w3.eth.block_number)
+        with self._lock:
+            self._checked_at = time.monotonic()
+            return self._block
+
+    def observe_block(self, number):
+        """
+        Сообщить кэшу о новом блоке (например, из квитанции транзакции)
+
+        Если блок новее текущего, кэш очищается: следующая запись
+        на контракт уже видна в состоянии.
+        """
+        with self._lock:
+            if self._block is None or number > self._block:
+                self._block = number
+                self._entries.clear()
+
+    def get(self, target, data, fetch):
+        """
+        Получить результат чтения из кэша или выполнить его
+
+        Args:
+            target (str): Адрес контракта
+            data (str): Calldata (или другой ключ запроса)
+            fetch (callable): fetch(номер блока) -> результат
+
+        Returns:
+            Результат fetch на блоке кэша
+        """
+        block = self.block_number()
+        key = (block, target.lower(), data)
+        with self._lock:
+            if key in self._entries:
+                self.stats["hits"] += 1
+                return self._entries[key]
+        # Ошибки не кэшируются
+        value = fetch(block)
+        with self._lock:
+            self.stats["misses"] += 1
+            if self._block == block:
+                self._entries[key] = value
+        return value
+
+    def batch_read(self, calls):
+        """
+        multicall.batch_read на блоке кэша с кэшированием всего пакета
+
+        Если номер блока устарел, пакет читается на 'latest' без отдельного
+        eth_blockNumber: Multicall3 сам возвращает номер блока чтения.
+        """
+        from multicall import batch_read
+
+        data = repr(tuple((call["target"], call["data"]) for call in calls))
+        with self._lock:
+            fresh = self._block is not None and time.monotonic() - self._checked_at < self.max_age
+        if fresh:
+            return self.get('batch', data, lambda block: batch_read(calls, block))
+
+        result = batch_read(calls)
+        number = result[0]["number"]
+        self.observe_block(number)
+        with self._lock:
+            self._checked_at = time.monotonic()
+            self.stats["misses"] += 1
+            if self._block == number:
+                self._entries[(number, 'batch', data)] = result
+        return result
+
+class _CachedCall:
+    """
+    View-функция контракта, у которой call() идет через ReadCache
+    """
+
+    def __init__(self, function, contract, cache, fn_name, args):
+        self._function = function
+        self._contract = contract
+        self._cache = cache
+        self._fn_name = fn_name
+        self._args = args
+
+    def call(self, transaction=None, block_identifier=None, **kwargs):
+        if transaction or kwargs or block_identifier not in (None, 'latest'):
+            return self._function.call(transaction, block_identifier or 'latest', **kwargs)
+        data = self._contract.encode_abi(self._fn_name, args=list(self._args))
+        return self._cache.get(
+            self._contract.address,
+            data,
+            lambda block: self._function.call(block_identifier=block)
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._function, name)
+
+class _CachedFunctions:
+    def __init__(self, contract, cache, view_names):
+        self._contract = contract
+        self._cache = cache
+        self._view_names = view_names
+
+    def __getattr__(self, name):
+        factory = getattr(self._contract.functions, name)
+        if name not in self._view_names:
+            # Транзакции (build_transaction, estimate_gas) идут без изменений
+            return factory
+
+        def build(*args, **kwargs):
+            function = factory(*args, **kwargs)
+            if kwargs:
+                return function
+            return _CachedCall(function, self._contract, self._cache, name, args)
+        return build
+
+class CachedContract:
+    """
+    Обертка контракта web3: call() view и pure функций кэшируется в ReadCache,
+    остальные атрибуты (address, abi, events, транзакции) - как у контракта
+    """
+
+    def __init__(self, contract, cache):
+        self._contract = contract
+        # Старый формат ABI (TOKEN_ABI) помечает view-функции как "constant": true
+        view_names = {
+            item['name'] for item in contract.abi
+            if item.get('type') == 'function'
+            and (item.get('stateMutability') in ('view', 'pure') or item.get('constant') is True)
+        }
+        self.functions = _CachedFunctions(contract, cache, view_names)
+        self.read_cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._contract, name)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_read_cache():
+    """
+    Получить общий ReadCache для config.w3
+
+    Returns:
+        ReadCache: Кэш чтений
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from config import w3
+            _cache = ReadCache(w3)
+        return _cache
+
+def observe_block(number):
+    """
+    Передать номер нового блока общему кэшу, если он уже создан
+    """
+    if _cache is not None:
+        _cache.observe_block(number)
+
+def cached_contract(contract):
+    """
+    Обернуть контракт кэшем чтений (если READ_CACHE не отключен)
+    """
+    if contract is None or not READ_CACHE:
+        return contract
+    return CachedContract(contract, get_read_cache())
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+import read_cache
+from batch_provider import send_batch
+
+POLL_INTERVAL = float(os.getenv('BLOCK_TIME', '2'))
+RECEIPT_TIMEOUT = int(os.getenv('RECEIPT_TIMEOUT', '300'))
+# Сколько eth_getTransactionReceipt отправлять в одном JSON-RPC пакете
+RECEIPT_BATCH_SIZE = 100
+
+# Поля квитанции, которые RPC возвращает hex строками
+_QUANTITY_FIELDS = ('status', 'gasUsed', 'cumulativeGasUsed', 'effectiveGasPrice', 'blockNumber', 'transactionIndex', 'type')
+
+def _normalize_hash(tx_hash):
+    if isinstance(tx_hash, (bytes, bytearray)):
+        return '0x' + bytes(tx_hash).hex()
+    tx_hash = tx_hash.lower()
+    return tx_hash if tx_hash.startswith('0x') else f"0x{tx_hash}"
+
+def _format_receipt(raw):
+    from web3.datastructures import AttributeDict
+
+    receipt = dict(raw)
+    for field in _QUANTITY_FIELDS:
+        if isinstance(receipt.get(field), str):
+            receipt[field] = int(receipt[field], 16)
+    return AttributeDict(receipt)
+
+class ReceiptTracker:
+    """
+    Ожидание квитанций многих транзакций в одном цикле опроса
+
+    Фоновый поток раз в блок запрашивает квитанции всех ожидающих
+    транзакций пакетными JSON-RPC запросами и завершает их Future.
+    Подтверждение N транзакций стоит столько же запросов на блок,
+    сколько и одной (до RECEIPT_BATCH_SIZE хешей в пакете).
+    """
+
+    def __init__(self, w3, poll_interval=POLL_INTERVAL, timeout=RECEIPT_TIMEOUT):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # Хеш -> (Future, срок ожидания)
+        self._pending = {}
+        self._thread = None
+        self._last_block = None
+
+    def track(self, tx_hash, timeout=None):
+        """
+        Начать ожидание квитанции транзакции
+
+        Args:
+            tx_hash (str|bytes): Хеш транзакции
+            timeout (int): Таймаут в секундах (по умолчанию RECEIPT_TIMEOUT)
+
+        Returns:
+            Future: Завершается квитанцией или TimeoutError
+        """
+        tx_hash = _normalize_hash(tx_hash)
+        deadline = time.monotonic() + (timeout or self.timeout)
+        with self._lock:
+            if tx_hash in self._pending:
+                return self._pending[tx_hash][0]
+            future = Future()
+            self._pending[tx_hash] = (future, deadline)
+            # Новая транзакция могла уже попасть в блок: проверяем ее в ближайшем цикле
+            self._last_block = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='receipt-tracker', daemon=True)
+                self._thread.start()
+        return future
+
+    def wait_all(self, tx_hashes, timeout=None):
+        """
+        Дождаться квитанций всех транзакций
+
+        Args:
+            tx_hashes (list): Хеши транзакций
+            timeout (int): Таймаут в секундах на каждую транзакцию
+
+        Returns:
+            list: Квитанции или исключения (TimeoutError и т.п.) в порядке tx_hashes
+        """
+        futures = [self.track(tx_hash, timeout) for tx_hash in tx_hashes]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _fetch_receipts(self, hashes):
+        requests = [('eth_getTransactionReceipt', [tx_hash]) for tx_hash in hashes]
+        responses = send_batch(self.w3.provider, requests)
+        return {
+            tx_hash: response.get('result')
+            for tx_hash, response in zip(hashes, responses)
+        }
+
+    def _poll(self):
+        block = self.w3.eth.block_number
+        if block == self._last_block:
+            return
+
+        with self._lock:
+            hashes = list(self._pending)
+        confirmed = []
+        try:
+            for i in range(0, len(hashes), RECEIPT_BATCH_SIZE):
+                for tx_hash, raw in self._fetch_receipts(hashes[i:i + RECEIPT_BATCH_SIZE]).items():
+                    if not raw:
+                        continue
+                    with self._lock:
+                        entry = self._pending.pop(tx_hash, None)
+                    if entry:
+                        confirmed.append((entry[0], _format_receipt(raw)))
+        finally:
+            # Квитанции пакетов до ошибки уже сняты с ожидания - завершаем их Future
+            if confirmed:
+                # Чтения после подтверждения должны видеть новое состояние
+                read_cache.observe_block(max(receipt.blockNumber for _, receipt in confirmed))
+            for future, receipt in confirmed:
+                future.set_result(receipt)
+
+        # Блок считается проверенным только после успешного опроса; если за это
+        # время добавились транзакции, следующий цикл проверит блок снова
+        with self._lock:
+            if set(self._pending) <= set(hashes):
+                self._last_block = block
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [tx_hash for tx_hash, (_, deadline) in self._pending.items() if deadline <= now]
+            for tx_hash in expired:
+                future, _ = self._pending.pop(tx_hash)
+                future.set_exception(TimeoutError(f"Транзакция {tx_hash} не подтверждена за отведенное время"))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+            try:
+                self._poll()
+            except Exception as e:
+                # Сетевая ошибка не должна останавливать ожидание остальных транзакций
+                print(f"⚠️ Ошибка опроса квитанций: {e}")
+            self._expire()
+            time.sleep(self.poll_interval)
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_tracker():
+    """
+    Получить общий ReceiptTracker для config.w3
+
+    Returns:
+        ReceiptTracker: Трекер квитанций
+    """
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            from config import w3
+            _tracker = ReceiptTracker(w3)
+        return _tracker
@@ -0,0 +1,118 @@
+"""
+Заглушка JSON-RPC провайдера web3 для тестов без узла EVM
+"""
+
+from eth_abi import decode, encode
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+class StubProvider(JSONBaseProvider):
+    """
+    Провайдер-заглушка: ответы по методу, журнал всех запросов
+
+    handlers - словарь метод -> handler(params); handler возвращает result
+    или {"error": {...}} для ответа с ошибкой.
+    """
+
+    def __init__(self, handlers):
+        super().__init__()
+        # eth_chainId может запросить middleware web3 при валидации
+        self.handlers = {"eth_chainId": lambda params: hex(137), **handlers}
+        self.requests = []
+        self.batches = 0
+
+    def _respond(self, request_id, method, params):
+        self.requests.append((method, params))
+        result = self.handlers[method](params)
+        if isinstance(result, dict) and "error" in result:
+            return {"jsonrpc": "2.0", "id": request_id, "error": result["error"]}
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def make_request(self, method, params):
+        return self._respond(len(self.requests), method, params)
+
+    def make_batch_request(self, requests):
+        self.batches += 1
+        return [self._respond(i, method, params) for i, (method, params) in enumerate(requests)]
+
+    def is_connected(self, show_traceback=False):
+        return True
+
+def _selector(signature):
+    return Web3.keccak(text=signature)[:4]
+
+class TokenChain:
+    """
+    Состояние сети для заглушки: токен ERC20 и Multicall3
+
+    Отвечает на eth_call к токену (balanceOf, allowance, totalSupply) и на
+    aggregate3 к Multicall3, разбирая настоящую calldata, поэтому через нее
+    проходит полный путь кодирования и декодирования web3/multicall.
+    """
+
+    def __init__(self, token, multicall_address, block_number=100, timestamp=1_700_000_000):
+        self.token = token.lower()
+        self.multicall = multicall_address.lower()
+        self.block_number = block_number
+        self.timestamp = timestamp
+        self.balances = {}
+        self.allowances = {}
+        self.supply = 0
+        # Номера блоков, на которых выполнялись eth_call
+        self.call_blocks = []
+
+    def handlers(self):
+        return {
+            "eth_blockNumber": lambda params: hex(self.block_number),
+            "eth_call": self._eth_call,
+            "eth_getCode": lambda params: "0x6001" if params[0].lower() == self.multicall else "0x",
+        }
+
+    def _block(self, tag):
+        return self.block_number if tag in ("latest", "pending") else int(tag, 16)
+
+    def _token_call(self, data):
+        selector, args = data[:4], data[4:]
+        if selector == _selector("balanceOf(address)"):
+            (owner,) = decode(["address"], args)
+            return encode(["uint256"], [self.balances.get(owner.lower(), 0)])
+        if selector == _selector("allowance(address,address)"):
+            owner, spender = decode(["address", "address"], args)
+            return encode(["uint256"], [self.allowances.get((owner.lower(), spender.lower()), 0)])
+        if selector == _selector("totalSupply()"):
+            return encode(["uint256"], [self.supply])
+        return None
+
+    def _multicall_call(self, data, block):
+        if data[:4] == _selector("getBlockNumber()"):
+            return encode(["uint256"], [block])
+        if data[:4] == _selector("getCurrentBlockTimestamp()"):
+            return encode(["uint256"], [self.timestamp])
+        return None
+
+    def _eth_call(self, params):
+        transaction, tag = params[0], params[1]
+        block = self._block(tag)
+        self.call_blocks.append(block)
+        to = transaction["to"].lower()
+        data = bytes(HexBytes(transaction["data"]))
+
+        if to == self.token:
+            result = self._token_call(data)
+        elif to == self.multicall and data[:4] == _selector("aggregate3((address,bool,bytes)[])"):
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = []
+            for target, _, call_data in calls:
+                if target.lower() == self.token:
+                    value = self._token_call(call_data)
+                else:
+                    value = self._multicall_call(call_data, block)
+                results.append((value is not None, value or b""))
+            result = encode(["(bool,bytes)[]"], [results])
+        else:
+            result = None
+
+        if result is None:
+            return {"error": {"code": -32000, "message": "execution reverted"}}
+        return "0x" + result.hex()
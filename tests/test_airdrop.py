@@ -0,0 +1,182 @@
+"""
+Разбор CSV раздачи и возобновление по журналу на поддельном движке транзакций
+"""
+
+import json
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("web3")
+
+from airdrop import Airdrop, Journal, load_recipients, to_wei
+
+ALICE = "0x00000000000000000000000000000000000000A1"
+BOB = "0x00000000000000000000000000000000000000B0"
+CAROL = "0x00000000000000000000000000000000000000C0"
+DAVE = "0x00000000000000000000000000000000000000D0"
+
+@pytest.mark.parametrize("amount, wei", [
+    ("1", 10**18),
+    ("1.5", 15 * 10**17),
+    ("0.000000000000000001", 1),
+    ("123456789012345678901234567890.123456789012345678", 123456789012345678901234567890123456789012345678),
+])
+def test_to_wei_is_exact(amount, wei):
+    assert to_wei(amount) == wei
+
+@pytest.mark.parametrize("amount", ["NaN", "sNaN", "Infinity", "-inf", "1e-19", "0.0000000000000000001"])
+def test_to_wei_rejects_non_finite_and_sub_wei(amount):
+    with pytest.raises(ValueError):
+        to_wei(amount)
+
+@pytest.mark.parametrize("amount", ["abc", "", "1e999999"])
+def test_to_wei_rejects_invalid_numbers(amount):
+    with pytest.raises(ArithmeticError):
+        to_wei(amount)
+
+def test_load_recipients_reports_row_errors(tmp_path):
+    path = tmp_path / "recipients.csv"
+    path.write_text(
+        "address,amount\n"
+        f"{ALICE},1.5\n"
+        "0x123,1\n"
+        f"{BOB},NaN\n"
+        f"{BOB},Infinity\n"
+        f"{BOB},1e-19\n"
+        f"{BOB},abc\n"
+        f"{BOB},0\n"
+        f"{BOB},1e60\n"
+        f"{CAROL},2\n",
+        encoding="utf-8"
+    )
+
+    recipients, errors = load_recipients(str(path))
+
+    assert [(r["row"], r["amount_wei"]) for r in recipients] == [(2, 15 * 10**17), (10, 2 * 10**18)]
+    assert [error.split(":")[0] for error in errors] == [f"строка {row}" for row in range(3, 10)]
+    assert "точнее 1 wei" in errors[3]
+    assert "uint256" in errors[6]
+
+class FakeNonces:
+    def __init__(self, start):
+        self.next = start
+        self.released = []
+
+    def next_nonce(self, address):
+        self.next += 1
+        return self.next - 1
+
+    def release(self, address, nonce):
+        self.released.append(nonce)
+
+class FakeEngine:
+    """
+    Движок транзакций без сети: "подпись" кодирует получателя, сумму и nonce
+    """
+
+    def __init__(self, next_nonce):
+        self.address = "0x00000000000000000000000000000000000000EE"
+        self.nonces = FakeNonces(next_nonce)
+        self.gas_profile = SimpleNamespace(margin=1.2)
+        self.sent = []
+        self.w3 = SimpleNamespace(eth=SimpleNamespace(send_raw_transaction=self.sent.append))
+
+    def prepare(self, call, nonce, gas=None, urgency='normal'):
+        payload = json.dumps([call.args[0], call.args[1], nonce]).encode()
+        return SimpleNamespace(hash=payload[:32].ljust(32, b"\0"), raw_transaction=payload)
+
+class FakeContract:
+    def __init__(self):
+        self.minted = []
+        self.functions = SimpleNamespace(mint=self._mint)
+
+    def _mint(self, address, amount):
+        self.minted.append((address, amount))
+        return SimpleNamespace(args=(address, amount), estimate_gas=lambda transaction: 60_000)
+
+class FakeTracker:
+    def track(self, tx_hash):
+        future = Future()
+        future.set_result(SimpleNamespace(status=1, blockNumber=500, gasUsed=50_000))
+        return future
+
+def _raw(address, amount, nonce):
+    return "0x" + json.dumps([address, amount, nonce]).encode().hex()
+
+RECIPIENTS = [
+    {"row": 2, "address": ALICE, "amount_wei": 1},
+    {"row": 3, "address": BOB, "amount_wei": 2},
+    {"row": 4, "address": CAROL, "amount_wei": 3},
+    {"row": 5, "address": DAVE, "amount_wei": 4},
+]
+
+def write_journal(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+def signed_record(recipient, nonce):
+    return {
+        "row": recipient["row"], "status": "signed", "address": recipient["address"],
+        "amount_wei": str(recipient["amount_wei"]), "nonce": nonce, "tx_hash": f"0x{nonce:064x}",
+        "raw": _raw(recipient["address"], recipient["amount_wei"], nonce)
+    }
+
+def test_resume_from_partial_journal(tmp_path):
+    path = tmp_path / "airdrop.journal.jsonl"
+    # Прошлый запуск: строка 2 подтверждена, 3 подписана и не отправлена, 4 отправлена
+    write_journal(path, [
+        signed_record(RECIPIENTS[0], 10), {"row": 2, "status": "sent"}, {"row": 2, "status": "confirmed"},
+        signed_record(RECIPIENTS[1], 11),
+        signed_record(RECIPIENTS[2], 12), {"row": 4, "status": "sent"},
+    ])
+    journal = Journal(str(path))
+    engine = FakeEngine(next_nonce=13)
+    contract = FakeContract()
+    airdrop = Airdrop(engine, contract, FakeTracker(), journal, concurrency=1)
+    try:
+        assert journal.mismatches(RECIPIENTS) == []
+
+        rows = airdrop.broadcast()
+        assert rows == [3, 4]
+        # Подписанные строки отправляются как есть, без новой подписи
+        assert engine.sent == [_raw(BOB, 2, 11), _raw(CAROL, 3, 12)]
+
+        assert airdrop.sign(RECIPIENTS) == 1
+        # Подписана только новая строка (остальные вызовы mint - оценка газа на новый адрес)
+        recipients = {r["address"] for r in RECIPIENTS}
+        assert [call for call in contract.minted if call[0] in recipients] == [(DAVE, 4)]
+        rows += airdrop.broadcast(statuses=('signed',))
+        assert rows == [3, 4, 5]
+        assert engine.sent[-1] == _raw(DAVE, 4, 13)
+
+        airdrop.confirm(rows)
+    finally:
+        journal.close()
+
+    assert {row: entry["status"] for row, entry in Journal(str(path)).state.items()} == {
+        2: "confirmed", 3: "confirmed", 4: "confirmed", 5: "confirmed"
+    }
+    assert airdrop.counts == {"confirmed": 3, "failed": 0, "pending": 0}
+
+def test_journal_mismatch_with_edited_csv(tmp_path):
+    path = tmp_path / "airdrop.journal.jsonl"
+    write_journal(path, [
+        signed_record(RECIPIENTS[0], 10), {"row": 2, "status": "confirmed"},
+        signed_record(RECIPIENTS[1], 11),
+        signed_record({"row": 9, "address": ALICE, "amount_wei": 7}, 12),
+    ])
+    journal = Journal(str(path))
+    try:
+        edited = [
+            RECIPIENTS[0],
+            {"row": 3, "address": DAVE, "amount_wei": 2},
+            RECIPIENTS[2],
+        ]
+        errors = journal.mismatches(edited)
+    finally:
+        journal.close()
+
+    assert len(errors) == 2
+    assert errors[0].startswith("строка 3:") and DAVE in errors[0]
+    assert errors[1].startswith("строка 9:") and "нет в CSV" in errors[1]
@@ -0,0 +1,159 @@
+"""
+ExplorerClient против локального HTTP сервера-заглушки
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from explorer_client import ExplorerClient, ExplorerError
+
+OK = {"status": "1", "message": "OK", "result": "42"}
+
+class StubExplorer:
+    """
+    HTTP сервер с keep-alive: отдает заранее заданные ответы по очереди,
+    затем OK; запоминает порт клиента каждого запроса
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests.append((self.client_address[1], self.path))
+                status, body = stub.responses.pop(0) if stub.responses else (200, OK)
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api"
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def server():
+    server = StubExplorer()
+    yield server
+    server.close()
+
+@pytest.fixture
+def make_client(server, tmp_path):
+    clients = []
+
+    def make(**kwargs):
+        options = {"rate": 1000, "burst": 1000, "retries": 3, "backoff": 0.001, "db_path": str(tmp_path / "chain.db")}
+        client = ExplorerClient("key", base_url=server.url, **{**options, **kwargs})
+        clients.append(client)
+        return client
+    yield make
+    for client in clients:
+        client.close()
+
+def test_requests_reuse_one_keep_alive_connection(server, make_client):
+    client = make_client()
+
+    for block in range(3):
+        assert client.get({"module": "block", "action": "getblockreward", "blockno": block}) == OK
+
+    assert len(server.requests) == 3
+    assert len({port for port, _ in server.requests}) == 1
+    assert "apikey=key" in server.requests[0][1]
+
+def test_token_bucket_paces_requests(make_client):
+    client = make_client(rate=20, burst=1)
+
+    started = time.monotonic()
+    for block in range(5):
+        client.get({"module": "block", "action": "getblockreward", "blockno": block})
+
+    # Первый запрос из запаса, следующие 4 - не чаще 20 в секунду
+    assert time.monotonic() - started >= 4 / 20 * 0.9
+
+def test_5xx_and_429_are_retried(server, make_client):
+    server.responses = [(503, b"unavailable"), (429, b"slow down")]
+    client = make_client()
+
+    assert client.get({"module": "stats", "action": "tokensupply"}) == OK
+    assert len(server.requests) == 3
+    assert client.stats["retries"] == 2
+
+def test_rate_limit_body_is_retried(server, make_client):
+    server.responses = [(200, {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"})]
+    client = make_client()
+
+    assert client.get({"module": "stats", "action": "tokensupply"}) == OK
+    assert client.stats["retries"] == 1
+
+def test_non_json_body_is_retried(server, make_client):
+    server.responses = [(200, b"<html>Just a moment...</html>"), (200, b"")]
+    client = make_client()
+
+    assert client.get({"module": "stats", "action": "tokensupply"}) == OK
+    assert client.stats["retries"] == 2
+
+def test_exhausted_retries_raise_explorer_error(server, make_client):
+    server.responses = [(200, b"<html>Just a moment...</html>")] * 3
+    client = make_client(retries=2)
+
+    with pytest.raises(ExplorerError):
+        client.get({"module": "stats", "action": "tokensupply"})
+    assert len(server.requests) == 3
+
+def test_client_error_is_not_retried(server, make_client):
+    server.responses = [(403, b"forbidden")]
+    client = make_client()
+
+    with pytest.raises(ExplorerError):
+        client.get({"module": "stats", "action": "tokensupply"})
+    assert len(server.requests) == 1
+
+def test_cached_response_expires_after_ttl(server, make_client):
+    client = make_client()
+    params = {"module": "account", "action": "balance", "address": "0x1"}
+
+    client.get(params, ttl=0.2)
+    client.get(params, ttl=0.2)
+    assert len(server.requests) == 1
+    assert client.stats["cache_hits"] == 1
+
+    time.sleep(0.25)
+    client.get(params, ttl=0.2)
+    assert len(server.requests) == 2
+
+def test_ttl_none_is_kept_across_clients(server, make_client):
+    params = {"module": "logs", "action": "getLogs", "fromBlock": 1, "toBlock": 2}
+    make_client().get(params, ttl=None)
+
+    # Новый клиент с той же базой: ответ финализированных блоков берется из chain.db
+    client = make_client()
+    assert client.get(params, ttl=None) == OK
+    assert len(server.requests) == 1
+    assert client.stats["cache_hits"] == 1
+
+def test_errors_and_ttl_zero_are_not_cached(server, make_client):
+    server.responses = [(200, {"status": "0", "message": "NOTOK", "result": "Invalid API Key"})]
+    client = make_client()
+    params = {"module": "stats", "action": "tokensupply"}
+
+    assert client.get(params, ttl=None)["message"] == "NOTOK"
+    assert client.get(params, ttl=None) == OK
+    client.get(params)
+    assert len(server.requests) == 3
@@ -0,0 +1,64 @@
+"""
+Окно eth_feeHistory в FeeOracle, привязанное к номеру блока
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from fee_oracle import FeeOracle
+
+GWEI = 10**9
+
+class FakeEth:
+    """
+    Сеть, где base fee блока n равен n gwei, а чаевые - 40 gwei
+    """
+
+    def __init__(self, head):
+        self.block_number = head
+        self.requests = []
+
+    def fee_history(self, count, newest, percentiles):
+        self.requests.append((count, newest))
+        oldest = newest - count + 1
+        return {
+            'oldestBlock': oldest,
+            'reward': [[40 * GWEI] * len(percentiles) for _ in range(count)],
+            'baseFeePerGas': [n * GWEI for n in range(oldest, newest + 2)],
+        }
+
+@pytest.fixture
+def eth():
+    return FakeEth(head=100)
+
+@pytest.fixture
+def oracle(eth):
+    return FeeOracle(SimpleNamespace(eth=eth), blocks=20, min_priority_fee_gwei=30)
+
+def test_fees_are_reused_within_one_block(oracle, eth):
+    first = oracle.fees('normal')
+    assert oracle.fees('normal') == first
+    assert oracle.fees('fast')['maxPriorityFeePerGas'] == 40 * GWEI
+    assert eth.requests == [(20, 100)]
+    # base fee следующего блока 101 gwei с запасом x2
+    assert first == {'maxPriorityFeePerGas': 40 * GWEI, 'maxFeePerGas': 202 * GWEI + 40 * GWEI}
+
+def test_new_block_refreshes_base_fee_with_only_new_blocks(oracle, eth):
+    oracle.fees('normal')
+
+    eth.block_number = 103
+    fees = oracle.fees('normal')
+
+    assert eth.requests == [(20, 100), (3, 103)]
+    assert fees['maxFeePerGas'] == 2 * 104 * GWEI + 40 * GWEI
+    # Окно остается не больше blocks блоков
+    assert sorted(oracle._rewards) == list(range(84, 104))
+
+def test_long_gap_requests_whole_window(oracle, eth):
+    oracle.fees('normal')
+
+    eth.block_number = 500
+    oracle.fees('slow')
+
+    assert eth.requests[-1] == (20, 500)
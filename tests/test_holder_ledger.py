@@ -0,0 +1,107 @@
+"""
+Реестр держателей HolderLedger на синтетических переводах tokentx
+"""
+
+import pytest
+
+from holder_ledger import HolderLedger, ZERO_ADDRESS
+
+TOKEN = "0x00000000000000000000000000000000000000AA"
+ALICE = "0x00000000000000000000000000000000000000a1"
+BOB = "0x00000000000000000000000000000000000000b0"
+
+def transfer(block, frm, to, value):
+    return {"blockNumber": str(block), "from": frm, "to": to, "value": str(value)}
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = HolderLedger(TOKEN, db_path=str(tmp_path / "chain.db"))
+    yield ledger
+    ledger.close()
+
+def test_apply_tracks_balances_mint_and_burn(ledger):
+    applied = ledger.apply([
+        transfer(10, ZERO_ADDRESS, ALICE, 1000),
+        transfer(11, ALICE, BOB, 300),
+        transfer(11, BOB, ZERO_ADDRESS, 100),
+        transfer(12, ALICE, BOB, 0),
+    ])
+
+    assert applied == 4
+    assert dict(ledger.balances()) == {ALICE: 700, BOB: 200}
+    # Нулевой адрес не держатель, сжигание уменьшает общее предложение
+    assert ledger.state() == {"last_block": 12, "last_position": 1, "total": 900}
+    assert ledger.holders_count() == 2
+
+def test_apply_skips_transfers_already_counted_in_last_block(ledger):
+    ledger.apply([
+        transfer(10, ZERO_ADDRESS, ALICE, 1000),
+        transfer(11, ALICE, BOB, 1),
+    ])
+
+    # Следующая страница начинается с last_block: первый перевод блока 11 уже учтен
+    applied = ledger.apply([
+        transfer(11, ALICE, BOB, 1),
+        transfer(11, ALICE, BOB, 2),
+        transfer(12, BOB, ALICE, 1),
+    ])
+
+    assert applied == 2
+    assert dict(ledger.balances()) == {ALICE: 1000 - 1 - 2 + 1, BOB: 1 + 2 - 1}
+    assert ledger.state()["last_block"] == 12
+
+def test_apply_keeps_full_uint256_precision(ledger):
+    huge = 2**256 - 1
+    ledger.apply([transfer(1, ZERO_ADDRESS, ALICE, huge), transfer(2, ALICE, BOB, 1)])
+
+    assert ledger.top(2) == [(ALICE, huge - 1), (BOB, 1)]
+    assert ledger.state()["total"] == huge
+
+def test_emptied_holder_is_removed(ledger):
+    ledger.apply([transfer(1, ZERO_ADDRESS, ALICE, 5), transfer(2, ALICE, BOB, 5)])
+
+    assert dict(ledger.balances()) == {BOB: 5}
+
+def test_sync_pages_until_reorg_depth(ledger):
+    transfers = [transfer(block, ZERO_ADDRESS, ALICE, 1) for block in range(100, 110)]
+    requests = []
+
+    def fetch_page(start, end, offset):
+        requests.append((start, end))
+        return [tx for tx in transfers if start <= int(tx["blockNumber"]) <= end][:offset]
+
+    applied = ledger.sync(fetch_page, head_block=115, page_size=4, reorg_depth=10)
+
+    # Блоки 106-115 еще могут быть отменены реорганизацией
+    assert applied == 6
+    assert ledger.state()["last_block"] == 105
+    assert all(end == 105 for _, end in requests)
+
+def test_sync_raises_when_one_block_fills_a_page(ledger):
+    transfers = [transfer(100, ZERO_ADDRESS, ALICE, 1) for _ in range(4)]
+
+    with pytest.raises(ValueError):
+        ledger.sync(lambda start, end, offset: transfers[:offset], head_block=200, page_size=4, reorg_depth=0)
+
+def test_old_ledger_drops_zero_address_and_recomputes_total(tmp_path):
+    db_path = str(tmp_path / "chain.db")
+    ledger = HolderLedger(TOKEN, db_path=db_path)
+    ledger.apply([transfer(1, ZERO_ADDRESS, ALICE, 1000), transfer(2, ALICE, BOB, 400)])
+    # Реестр старого формата: сожженные 100 зачислены нулевому адресу, total - только минт
+    with ledger.conn:
+        ledger.conn.execute(
+            "UPDATE holder_balances SET balance = ? WHERE token = ? AND address = ?",
+            (f"{300:064x}", ledger.token, BOB)
+        )
+        ledger.conn.execute(
+            "INSERT INTO holder_balances (token, address, balance) VALUES (?, ?, ?)",
+            (ledger.token, ZERO_ADDRESS, f"{100:064x}")
+        )
+    ledger.close()
+
+    ledger = HolderLedger(TOKEN, db_path=db_path)
+    try:
+        assert dict(ledger.balances()) == {ALICE: 600, BOB: 300}
+        assert ledger.state()["total"] == 900
+    finally:
+        ledger.close()
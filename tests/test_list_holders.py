@@ -0,0 +1,119 @@
+"""
+Пересчет балансов по переводам и сверка реестра с балансами в сети
+"""
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from holder_ledger import HolderLedger, ZERO_ADDRESS
+from list_holders import apply_transfers, onchain_balance_source, verify_ledger
+
+TOKEN = "0x00000000000000000000000000000000000000aa"
+ALICE = "0x00000000000000000000000000000000000000a1"
+BOB = "0x00000000000000000000000000000000000000b0"
+CAROL = "0x00000000000000000000000000000000000000c0"
+
+def transfer(block, frm, to, value):
+    return {"blockNumber": str(block), "from": frm, "to": to, "value": str(value)}
+
+TRANSFERS = [
+    transfer(1, ZERO_ADDRESS, ALICE, 10**24),
+    transfer(2, ALICE, BOB, 3 * 10**23),
+    transfer(3, BOB, CAROL, 10**23),
+    transfer(4, CAROL, ZERO_ADDRESS, 10**22),
+]
+
+class StubBalances:
+    """
+    Балансы "в сети": словарь адрес -> баланс, с журналом запрошенных блоков
+    """
+
+    def __init__(self, balances, supply):
+        self.balances = balances
+        self.supply = supply
+        self.blocks = []
+        self.chunks = []
+
+    def balances_at(self, addresses, block):
+        self.blocks.append(block)
+        self.chunks.append(len(addresses))
+        return [self.balances.get(address, 0) for address in addresses]
+
+    def total_supply_at(self, block):
+        self.blocks.append(block)
+        return self.supply
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = HolderLedger(TOKEN, db_path=str(tmp_path / "chain.db"))
+    ledger.apply(TRANSFERS)
+    yield ledger
+    ledger.close()
+
+def test_apply_transfers_is_exact_in_base_units():
+    balances = apply_transfers({}, TRANSFERS + [transfer(5, ALICE, BOB, 0)])
+
+    assert balances[ALICE] == 7 * 10**23
+    assert balances[BOB] == 2 * 10**23
+    assert balances[CAROL] == 9 * 10**22
+    # Минт не списывается с нулевого адреса
+    assert balances[ZERO_ADDRESS] == 10**22
+
+def test_apply_transfers_accumulates_onto_existing_balances():
+    balances = apply_transfers({ALICE: 5}, [transfer(1, ALICE, BOB, 5)])
+
+    assert balances == {ALICE: 0, BOB: 5}
+
+def test_verify_ledger_matches_onchain_balances(ledger):
+    onchain = StubBalances(dict(ledger.balances()), 99 * 10**22)
+
+    assert verify_ledger(ledger, onchain.balances_at, onchain.total_supply_at, chunk_size=2)
+    # Все чтения на последнем блоке реестра, по chunk_size адресов
+    assert set(onchain.blocks) == {4}
+    assert onchain.chunks == [2, 1]
+
+def test_verify_ledger_reports_balance_mismatch(ledger, capsys):
+    balances = dict(ledger.balances())
+    balances[BOB] += 1
+    onchain = StubBalances(balances, 99 * 10**22)
+
+    assert not verify_ledger(ledger, onchain.balances_at, onchain.total_supply_at)
+    assert f"mismatch {BOB}" in capsys.readouterr().out
+
+def test_verify_ledger_reports_supply_mismatch(ledger):
+    onchain = StubBalances(dict(ledger.balances()), 10**24)
+
+    assert not verify_ledger(ledger, onchain.balances_at, onchain.total_supply_at)
+
+def test_verify_ledger_fails_on_empty_ledger(tmp_path):
+    empty = HolderLedger(TOKEN, db_path=str(tmp_path / "empty.db"))
+    try:
+        onchain = StubBalances({}, 0)
+        assert not verify_ledger(empty, onchain.balances_at, onchain.total_supply_at)
+        assert onchain.blocks == []
+    finally:
+        empty.close()
+
+def test_onchain_balance_source_reads_through_multicall(ledger, monkeypatch):
+    pytest.importorskip("web3")
+    pytest.importorskip("eth_abi")
+    from web3 import Web3
+    import config
+    import multicall
+    from rpc_stub import StubProvider, TokenChain
+
+    chain = TokenChain(TOKEN, multicall.MULTICALL3_ADDRESS, block_number=50)
+    chain.balances = dict(ledger.balances())
+    chain.supply = 99 * 10**22
+    w3 = Web3(StubProvider(chain.handlers()))
+    monkeypatch.setattr(config, "w3", w3, raising=False)
+    monkeypatch.setattr(multicall, "w3", w3)
+    monkeypatch.setattr(multicall, "_multicall_available", True)
+
+    balances_at, total_supply_at = onchain_balance_source(TOKEN)
+
+    assert balances_at([ALICE, BOB, ZERO_ADDRESS], 4) == [7 * 10**23, 2 * 10**23, 0]
+    assert total_supply_at(4) == 99 * 10**22
+    assert set(chain.call_blocks) == {4}
+    assert verify_ledger(ledger, balances_at, total_supply_at)
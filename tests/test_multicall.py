@@ -0,0 +1,154 @@
+"""
+Пакетное чтение multicall.batch_read на заглушке JSON-RPC провайдера
+
+Заглушка играет роль узла EVM: отвечает на eth_call к Multicall3
+заранее закодированным результатом aggregate3, а на eth_getBlockByNumber,
+eth_call и eth_getBalance пакетного режима - фиксированными значениями.
+Все запросы записываются, чтобы проверить, на каком блоке они выполнены.
+"""
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("web3")
+eth_abi = pytest.importorskip("eth_abi")
+
+from web3 import Web3
+
+import multicall
+from rpc_stub import StubProvider
+
+TOKEN = Web3.to_checksum_address("0x00000000000000000000000000000000000000aa")
+HOLDER = Web3.to_checksum_address("0x00000000000000000000000000000000000000b1")
+OTHER = Web3.to_checksum_address("0x00000000000000000000000000000000000000b2")
+
+ERC20_ABI = [
+    {
+        "inputs": [{"name": "account", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+def _word(value):
+    return eth_abi.encode(["uint256"], [value])
+
+@pytest.fixture
+def stub(monkeypatch):
+    def install(handlers, multicall_available):
+        provider = StubProvider(handlers)
+        monkeypatch.setattr(multicall, "w3", Web3(provider))
+        monkeypatch.setattr(multicall, "_multicall_available", multicall_available)
+        token = multicall.w3.eth.contract(address=TOKEN, abi=ERC20_ABI)
+        return provider, token
+    return install
+
+def test_aggregate3_results_are_decoded_with_block(stub):
+    aggregate = eth_abi.encode(
+        ["(bool,bytes)[]"],
+        [[
+            (True, _word(123)),            # getBlockNumber
+            (True, _word(1_700_000_000)),  # getCurrentBlockTimestamp
+            (True, _word(42 * 10**18)),
+            (False, b""),
+        ]]
+    )
+    provider, token = stub({"eth_call": lambda params: "0x" + aggregate.hex()}, True)
+
+    block, results = multicall.batch_read(
+        [
+            multicall.prepare_call(token, "balanceOf", HOLDER),
+            multicall.prepare_call(token, "balanceOf", OTHER),
+        ],
+        allow_failure=True
+    )
+
+    assert block == {"number": 123, "timestamp": 1_700_000_000}
+    assert results == [42 * 10**18, None]
+    # Весь пакет - один eth_call к Multicall3
+    calls = [params for method, params in provider.requests if method == "eth_call"]
+    assert len(calls) == 1
+    assert calls[0][0]["to"].lower() == multicall.MULTICALL3_ADDRESS.lower()
+
+def test_aggregate3_failure_raises_without_allow_failure(stub):
+    aggregate = eth_abi.encode(
+        ["(bool,bytes)[]"],
+        [[(True, _word(5)), (True, _word(6)), (False, b"")]]
+    )
+    _, token = stub({"eth_call": lambda params: "0x" + aggregate.hex()}, True)
+
+    with pytest.raises(ValueError):
+        multicall.batch_read([multicall.prepare_call(token, "balanceOf", HOLDER)])
+
+def test_aggregate3_is_pinned_to_requested_block(stub):
+    aggregate = eth_abi.encode(["(bool,bytes)[]"], [[(True, _word(77)), (True, _word(1)), (True, _word(9))]])
+    provider, token = stub({"eth_call": lambda params: "0x" + aggregate.hex()}, True)
+
+    multicall.batch_read([multicall.prepare_call(token, "balanceOf", HOLDER)], 77)
+
+    (_, params), = [r for r in provider.requests if r[0] == "eth_call"]
+    assert params[1] == hex(77)
+
+def test_rpc_batch_fallback_reads_calls_and_balances_on_one_block(stub):
+    provider, token = stub({
+        "eth_getBlockByNumber": lambda params: {"number": params[0], "timestamp": hex(1_700_000_100)},
+        "eth_call": lambda params: "0x" + _word(7).hex(),
+        "eth_getBalance": lambda params: hex(3 * 10**18),
+    }, False)
+
+    block, results = multicall.batch_read(
+        [
+            multicall.prepare_call(token, "balanceOf", HOLDER),
+            multicall.prepare_eth_balance(OTHER),
+        ],
+        100
+    )
+
+    assert block == {"number": 100, "timestamp": 1_700_000_100}
+    assert results == [7, 3 * 10**18]
+    # Один JSON-RPC пакет: блок, eth_call и eth_getBalance на одном номере блока
+    assert provider.batches == 1
+    assert [method for method, _ in provider.requests] == ["eth_getBlockByNumber", "eth_call", "eth_getBalance"]
+    assert provider.requests[1][1][1] == hex(100)
+    assert provider.requests[2][1] == [OTHER, hex(100)]
+
+def test_rpc_batch_fallback_pins_latest_to_one_number(stub):
+    provider, token = stub({
+        "eth_getBlockByNumber": lambda params: {"number": hex(555), "timestamp": hex(1_700_000_200)},
+        "eth_call": lambda params: "0x" + _word(1).hex(),
+        "eth_getBalance": lambda params: hex(2),
+    }, False)
+
+    block, results = multicall.batch_read(
+        [multicall.prepare_call(token, "balanceOf", HOLDER), multicall.prepare_eth_balance(HOLDER)]
+    )
+
+    assert block["number"] == 555
+    assert results == [1, 2]
+    # 'latest' запрашивается один раз, дальше все чтения идут на его номер
+    batch_params = [params for method, params in provider.requests if method != "eth_getBlockByNumber"]
+    assert [params[-1] for params in batch_params] == [hex(555), hex(555)]
+
+def test_rpc_batch_fallback_marks_failed_call(stub):
+    _, token = stub({
+        "eth_getBlockByNumber": lambda params: {"number": params[0], "timestamp": "0x1"},
+        "eth_call": lambda params: {"error": {"code": -32000, "message": "execution reverted"}},
+    }, False)
+
+    block, results = multicall.batch_read(
+        [multicall.prepare_call(token, "balanceOf", HOLDER), multicall.prepare_call(token, "balanceOf", OTHER)],
+        10,
+        allow_failure=True
+    )
+
+    assert block["number"] == 10
+    assert results == [None, None]
+
+def test_rejected_batch_raises_connection_error(stub):
+    provider, token = stub({}, False)
+    provider.make_batch_request = lambda requests: {"jsonrpc": "2.0", "id": None, "error": {"message": "batch not allowed"}}
+
+    with pytest.raises(ConnectionError):
+        multicall.batch_read([multicall.prepare_call(token, "balanceOf", HOLDER)] * 2, 10)
@@ -0,0 +1,77 @@
+"""
+Выдача и возврат nonce в NonceManager
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from nonce_manager import NonceManager
+
+SENDER = "0x00000000000000000000000000000000000000EE"
+
+class FakeEth:
+    def __init__(self, pending):
+        self.pending = pending
+        self.lookups = 0
+
+    def get_transaction_count(self, address, block_identifier):
+        assert block_identifier == 'pending'
+        self.lookups += 1
+        return self.pending
+
+@pytest.fixture
+def eth():
+    return FakeEth(pending=10)
+
+@pytest.fixture
+def manager(eth):
+    return NonceManager(SimpleNamespace(eth=eth))
+
+def test_nonces_are_issued_locally_after_first_sync(manager, eth):
+    assert [manager.next_nonce(SENDER) for _ in range(3)] == [10, 11, 12]
+    assert eth.lookups == 1
+
+def test_failure_before_broadcast_returns_nonce(manager, eth):
+    with pytest.raises(ValueError):
+        with manager.reserve(SENDER) as reservation:
+            assert reservation.nonce == 10
+            raise ValueError("estimate_gas: execution reverted")
+
+    assert manager.next_nonce(SENDER) == 10
+    assert eth.lookups == 1
+
+@pytest.mark.parametrize("error", [TimeoutError("read timed out"), ValueError("replacement transaction underpriced")])
+def test_failure_after_broadcast_keeps_nonce_and_resyncs(manager, eth, error):
+    with pytest.raises(type(error)):
+        with manager.reserve(SENDER) as reservation:
+            reservation.broadcasting()
+            raise error
+
+    # Транзакция дошла до мемпула: узел считает ее в pending
+    eth.pending = 11
+    assert manager.next_nonce(SENDER) == 11
+    assert eth.lookups == 2
+    # Дальше снова локально
+    assert manager.next_nonce(SENDER) == 12
+    assert eth.lookups == 2
+
+def test_failure_after_broadcast_reuses_nonce_the_node_did_not_take(manager, eth):
+    with pytest.raises(TimeoutError):
+        with manager.reserve(SENDER) as reservation:
+            reservation.broadcasting()
+            raise TimeoutError("read timed out")
+
+    # Транзакция не дошла: pending у узла не изменился, nonce выдается снова
+    assert manager.next_nonce(SENDER) == 10
+    assert eth.lookups == 2
+
+def test_nonce_error_resyncs_immediately(manager, eth):
+    with pytest.raises(ValueError):
+        with manager.reserve(SENDER) as reservation:
+            reservation.broadcasting()
+            eth.pending = 15
+            raise ValueError("nonce too low")
+
+    assert eth.lookups == 2
+    assert manager.next_nonce(SENDER) == 15
@@ -0,0 +1,62 @@
+"""
+Кэш view-вызовов ReadCache через config.token_contract
+"""
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("web3")
+pytest.importorskip("eth_abi")
+
+from web3 import Web3
+
+import config
+import multicall
+import read_cache
+from rpc_stub import StubProvider, TokenChain
+
+HOLDER = "0x00000000000000000000000000000000000000b1"
+SPENDER = "0x00000000000000000000000000000000000000c2"
+
+@pytest.fixture
+def chain(monkeypatch):
+    chain = TokenChain(config.TOKEN_ADDRESS, multicall.MULTICALL3_ADDRESS, block_number=100)
+    chain.balances[HOLDER] = 5 * 10**18
+    chain.allowances[(HOLDER, SPENDER)] = 7
+    w3 = Web3(StubProvider(chain.handlers()))
+    monkeypatch.setattr(config, "w3", w3, raising=False)
+    monkeypatch.setattr(read_cache, "READ_CACHE", True)
+    # max_age=0: номер блока проверяется при каждом чтении
+    monkeypatch.setattr(read_cache, "_cache", read_cache.ReadCache(w3, max_age=0))
+    # config.token_contract строится заново на заглушке
+    saved = vars(config).pop("token_contract", None)
+    yield chain
+    vars(config).pop("token_contract", None)
+    if saved is not None:
+        config.token_contract = saved
+
+def test_legacy_constant_functions_are_cached(chain):
+    token = config.token_contract
+
+    assert isinstance(token, read_cache.CachedContract)
+    assert {"balanceOf", "allowance"} <= token.functions._view_names
+    assert "transfer" not in token.functions._view_names
+
+def test_reads_hit_within_block_and_miss_after_new_block(chain):
+    token = config.token_contract
+    holder = Web3.to_checksum_address(HOLDER)
+    spender = Web3.to_checksum_address(SPENDER)
+
+    assert token.functions.balanceOf(holder).call() == 5 * 10**18
+    assert token.functions.balanceOf(holder).call() == 5 * 10**18
+    assert token.functions.allowance(holder, spender).call() == 7
+    assert token.functions.allowance(holder, spender).call() == 7
+    # Два разных чтения - два eth_call на блоке кэша, повторы из кэша
+    assert chain.call_blocks == [100, 100]
+    assert token.read_cache.stats == {"hits": 2, "misses": 2}
+
+    chain.block_number = 101
+    chain.balances[HOLDER] = 6 * 10**18
+    assert token.functions.balanceOf(holder).call() == 6 * 10**18
+    assert chain.call_blocks == [100, 100, 101]
+    assert token.read_cache.stats["misses"] == 3
@@ -0,0 +1,100 @@
+"""
+Цикл опроса квитанций ReceiptTracker на поддельном провайдере
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("web3")
+
+from receipt_tracker import ReceiptTracker
+
+TX_A = "0x" + "aa" * 32
+TX_B = "0x" + "bb" * 32
+
+class FlakyProvider:
+    """
+    Отвечает квитанциями из receipts; первые failures пакетов падают
+    """
+
+    def __init__(self, failures=0):
+        self.receipts = {}
+        self.failures = failures
+        self.batches = 0
+
+    def make_batch_request(self, requests):
+        self.batches += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("read timed out")
+        return [
+            {"jsonrpc": "2.0", "id": i, "result": self.receipts.get(params[0])}
+            for i, (_, params) in enumerate(requests)
+        ]
+
+    def make_request(self, method, params):
+        return self.make_batch_request([(method, params)])[0]
+
+def receipt(block):
+    return {"status": "0x1", "blockNumber": hex(block), "gasUsed": "0x5208"}
+
+@pytest.fixture
+def tracker():
+    w3 = SimpleNamespace(eth=SimpleNamespace(block_number=100), provider=FlakyProvider())
+    tracker = ReceiptTracker(w3, poll_interval=3600)
+    # Без фонового потока: циклы опроса вызываются тестом
+    tracker._thread = SimpleNamespace(is_alive=lambda: True)
+    return tracker
+
+def test_failed_fetch_retries_same_block(tracker):
+    provider = tracker.w3.provider
+    future = tracker.track(TX_A)
+    provider.failures = 1
+    provider.receipts[TX_A] = receipt(100)
+
+    with pytest.raises(ConnectionError):
+        tracker._poll()
+    assert not future.done()
+
+    # Тот же блок: ошибка не отметила его проверенным
+    tracker._poll()
+    assert future.result(timeout=0).blockNumber == 100
+    assert provider.batches == 2
+
+def test_successful_poll_skips_same_block(tracker):
+    provider = tracker.w3.provider
+    tracker.track(TX_A)
+
+    tracker._poll()
+    tracker._poll()
+    assert provider.batches == 1
+
+    tracker.w3.eth.block_number = 101
+    tracker._poll()
+    assert provider.batches == 2
+
+def test_receipts_before_failed_batch_are_delivered(tracker, monkeypatch):
+    import receipt_tracker
+
+    monkeypatch.setattr(receipt_tracker, "RECEIPT_BATCH_SIZE", 1)
+    provider = tracker.w3.provider
+    first = tracker.track(TX_A)
+    second = tracker.track(TX_B)
+    provider.receipts[TX_A] = receipt(100)
+
+    calls = []
+    fetch = tracker._fetch_receipts
+
+    def flaky_fetch(hashes):
+        calls.append(hashes)
+        if len(calls) == 2:
+            raise ConnectionError("read timed out")
+        return fetch(hashes)
+    monkeypatch.setattr(tracker, "_fetch_receipts", flaky_fetch)
+
+    with pytest.raises(ConnectionError):
+        tracker._poll()
+    assert first.result(timeout=0).status == 1
+    assert not second.done()
+    assert tracker._last_block is None
@@ -0,0 +1,76 @@
+"""
+Пакетное изменение черного списка на поддельном движке транзакций
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("web3")
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+import token_v2
+
+ADDRESSES = [Web3.to_checksum_address(f"0x{i:040x}") for i in range(1, 8)]
+
+class FakeEngine:
+    """
+    Движок, у которого send падает на заданном по счету вызове
+    """
+
+    def __init__(self, fail_on):
+        self.address = Web3.to_checksum_address("0x" + "ee" * 20)
+        self.gas_profile = SimpleNamespace(margin=1.0)
+        self.fail_on = fail_on
+        self.sent = []
+
+    def send(self, call, gas=None, urgency='normal'):
+        if len(self.sent) + 1 == self.fail_on:
+            raise TimeoutError("read timed out")
+        self.sent.append(call.args)
+        return HexBytes(bytes([len(self.sent)]) * 32)
+
+class FakeContract:
+    def __init__(self):
+        self.functions = SimpleNamespace(batchSetBlacklist=self._batch)
+
+    def _batch(self, addresses, status):
+        # 100 газа на адрес: при лимите блока 1200 и доле 0.25 в чанке 3 адреса
+        return SimpleNamespace(args=(list(addresses), status), estimate_gas=lambda tx: 100 * len(addresses))
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine(fail_on=2)
+    monkeypatch.setattr(token_v2, "token_v2_contract", FakeContract())
+    monkeypatch.setattr(token_v2, "PRIVATE_KEY", "0x" + "11" * 32)
+    monkeypatch.setattr(token_v2, "get_engine", lambda: engine)
+    monkeypatch.setattr(token_v2, "get_blacklist_statuses", lambda addresses: {a: a == ADDRESSES[0] for a in addresses})
+    monkeypatch.setattr(token_v2, "w3", SimpleNamespace(eth=SimpleNamespace(get_block=lambda tag: {"gasLimit": 1200})))
+    return engine
+
+def test_failed_second_chunk_reports_sent_chunks(engine):
+    with pytest.raises(token_v2.BatchSendError) as info:
+        token_v2.batch_set_blacklist(ADDRESSES, True, wait=False)
+
+    error = info.value
+    pending = ADDRESSES[1:]
+    # Первый чанк отправлен, второй упал, третий не отправлялся
+    assert engine.sent == [(pending[:3], True)]
+    assert error.tx_hashes == [(b"\x01" * 32).hex()]
+    assert error.sent_addresses == pending[:3]
+    assert error.failed_chunk == (3, 6)
+    assert error.remaining_addresses == pending[3:]
+    assert isinstance(error.__cause__, TimeoutError)
+
+def test_all_chunks_sent(engine):
+    engine.fail_on = None
+
+    result = token_v2.batch_set_blacklist(ADDRESSES, True, wait=False)
+
+    assert result["skipped"] == 1
+    assert result["chunk_size"] == 3
+    assert [args[0] for args in engine.sent] == [ADDRESSES[1:4], ADDRESSES[4:7]]
+    assert len(result["tx_hashes"]) == 2
@@ -31,7 +31,7 @@ def get_token_balance(address=None):
         address (str): Адрес кошелька. Если None, используется WALLET_ADDRESS из .env
     
     Returns:
-        float: Баланс токенов ALIEN
+        Decimal: Баланс токенов ALIEN (точное значение, без округления float)
     """
     if address is None:
         address = WALLET_ADDRESS
@@ -43,9 +43,8 @@ def get_token_balance(address=None):
     
     # Используем существующую логику из check_balances.py
     balance_wei = token_contract.functions.balanceOf(address).call()
-    balance_tokens = balance_wei / 1e18
-    
-    return float(balance_tokens)
+    # Деление 1e18 во float теряет младшие разряды больших балансов
+    return Web3.from_wei(balance_wei, 'ether')
 
 def get_allowance(owner, spender):
     """
@@ -56,22 +55,108 @@ def get_allowance(owner, spender):
         spender (str): Адрес, которому разрешено тратить токены
     
     Returns:
-        float: Размер разрешения в токенах
+        Decimal: Размер разрешения в токенах
     """
     owner = Web3.to_checksum_address(owner)
     spender = Web3.to_checksum_address(spender)
     
     allowance_wei = token_contract.functions.allowance(owner, spender).call()
-    allowance_tokens = allowance_wei / 1e18
+    return Web3.from_wei(allowance_wei, 'ether')
+
+def format_wei(amount_wei, decimals=18):
+    """
+    Перевести целое количество wei в десятичную строку без потери точности
     
-    return float(allowance_tokens)
+    Args:
+        amount_wei (int): Сумма в минимальных единицах
+        decimals (int): Количество знаков после запятой у токена
+    
+    Returns:
+        str: Десятичная запись (например, "1.5")
+    """
+    sign = "-" if amount_wei < 0 else ""
+    whole, fraction = divmod(abs(amount_wei), 10**decimals)
+    fraction_str = f"{fraction:0{decimals}d}".rstrip("0")
+    return f"{sign}{whole}.{fraction_str}" if fraction_str else f"{sign}{whole}"
+
+def read_addresses(path):
+    """
+    Прочитать адреса из файла (по одному в строке или первая колонка CSV)
+    
+    Args:
+        path (str): Путь к файлу
+    
+    Returns:
+        tuple: (список checksum адресов без повторов, список неверных строк)
+    """
+    addresses = {}
+    invalid = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            value = line.split(',')[0].strip()
+            if not value or value.lower() == 'address':
+                continue
+            if Web3.is_address(value):
+                addresses[Web3.to_checksum_address(value)] = True
+            else:
+                invalid.append(f"строка {line_number}: {value}")
+    return list(addresses), invalid
+
+def get_balances(addresses, block_identifier='latest', chunk_size=500, workers=4):
+    """
+    Получить балансы MATIC и ALIEN для многих адресов на одном блоке
+    
+    Адреса читаются чанками через Multicall3 (по 2 вызова на адрес),
+    чанки выполняются параллельно (не больше workers одновременно), а
+    результаты возвращаются в порядке адресов по мере готовности.
+    
+    Args:
+        addresses (list): Адреса (checksum)
+        block_identifier: Номер блока или 'latest' (фиксируется при старте)
+        chunk_size (int): Адресов в одном пакетном чтении
+        workers (int): Количество одновременных пакетных чтений
+    
+    Yields:
+        dict: address, matic_wei, alien_wei, block
+    """
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    from multicall import batch_read, prepare_call, prepare_eth_balance
+    
+    # Все чанки читаются на одном блоке, поэтому снимок согласован
+    if not isinstance(block_identifier, int):
+        block_identifier = w3.eth.get_block(block_identifier).number
+    
+    def read_chunk(chunk):
+        calls = []
+        for address in chunk:
+            calls.append(prepare_eth_balance(address))
+            calls.append(prepare_call(token_contract, 'balanceOf', address))
+        _, results = batch_read(calls, block_identifier)
+        return [
+            {"address": address, "matic_wei": results[2 * i], "alien_wei": results[2 * i + 1], "block": block_identifier}
+            for i, address in enumerate(chunk)
+        ]
+    
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    pending = deque()
+    cursor = 0
+    try:
+        while cursor < len(addresses) or pending:
+            # Держим в работе не больше двух чанков на поток
+            while cursor < len(addresses) and len(pending) < max(1, workers) * 2:
+                pending.append(pool.submit(read_chunk, addresses[cursor:cursor + chunk_size]))
+                cursor += chunk_size
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
 
 def format_balance(balance, token_name="ALIEN"):
     """
     Форматировать баланс для вывода
     
     Args:
-        balance (float): Баланс токенов
+        balance (Decimal|float): Баланс токенов
         token_name (str): Название токена
     
     Returns:
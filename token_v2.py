@@ -1,13 +1,33 @@
 from web3 import Web3
-from config import w3, token_v2_contract, WALLET_ADDRESS, PRIVATE_KEY
+from config import w3, token_v2_contract, PRIVATE_KEY
+from multicall import batch_read, prepare_call
+from receipt_tracker import get_tracker
+from tx_engine import get_engine
 
-def mint_tokens(to_address, amount):
+class BatchSendError(Exception):
+    """
+    Отправка чанка пакетной операции не удалась
+
+    Чанки до failed_chunk уже отправлены (tx_hashes, sent_addresses),
+    повторный запуск должен начинать с remaining_addresses.
+    """
+
+    def __init__(self, message, tx_hashes, sent_addresses, failed_chunk, remaining_addresses):
+        super().__init__(message)
+        self.tx_hashes = tx_hashes
+        self.sent_addresses = sent_addresses
+        # (начало, конец) упавшего чанка в списке изменяемых адресов
+        self.failed_chunk = failed_chunk
+        self.remaining_addresses = remaining_addresses
+
+def mint_tokens(to_address, amount, urgency='normal'):
     """
     Создать новые токены (только для владельца)
     
     Args:
         to_address (str): Адрес получателя
         amount (float): Количество токенов
+        urgency (str): Срочность комиссии: slow, normal или fast
     
     Returns:
         str: Хеш транзакции
@@ -22,24 +42,11 @@ def mint_tokens(to_address, amount):
         # Конвертируем в Wei
         amount_wei = w3.to_wei(amount, 'ether')
         
-        # Получаем nonce
-        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = token_v2_contract.functions.mint(to_address, amount_wei).build_transaction({
-            'from': wallet_address,
-            'nonce': nonce,
-            'gas': 150000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            token_v2_contract.functions.mint(to_address, amount_wei),
+            urgency=urgency
+        )
         
         return tx_hash.hex()
         
@@ -47,12 +54,13 @@ def mint_tokens(to_address, amount):
         print(f"❌ Ошибка при создании токенов: {str(e)}")
         raise e
 
-def burn_tokens(amount):
+def burn_tokens(amount, urgency='normal'):
     """
     Сжечь токены
     
     Args:
         amount (float): Количество токенов для сжигания
+        urgency (str): Срочность комиссии: slow, normal или fast
     
     Returns:
         str: Хеш транзакции
@@ -67,24 +75,11 @@ def burn_tokens(amount):
         # Конвертируем в Wei
         amount_wei = w3.to_wei(amount, 'ether')
         
-        # Получаем nonce
-        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = token_v2_contract.functions.burn(amount_wei).build_transaction({
-            'from': wallet_address,
-            'nonce': nonce,
-            'gas': 100000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            token_v2_contract.functions.burn(amount_wei),
+            urgency=urgency
+        )
         
         return tx_hash.hex()
         
@@ -92,13 +87,14 @@ def burn_tokens(amount):
         print(f"❌ Ошибка при сжигании токенов: {str(e)}")
         raise e
 
-def burn_from_tokens(from_address, amount):
+def burn_from_tokens(from_address, amount, urgency='normal'):
     """
     Сжечь токены с другого адреса (только для владельца)
     
     Args:
         from_address (str): Адрес, с которого сжигать
         amount (float): Количество токенов
+        urgency (str): Срочность комиссии: slow, normal или fast
     
     Returns:
         str: Хеш транзакции
@@ -113,24 +109,11 @@ def burn_from_tokens(from_address, amount):
         # Конвертируем в Wei
         amount_wei = w3.to_wei(amount, 'ether')
         
-        # Получаем nonce
-        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = token_v2_contract.functions.burnFrom(from_address, amount_wei).build_transaction({
-            'from': wallet_address,
-            'nonce': nonce,
-            'gas': 100000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            token_v2_contract.functions.burnFrom(from_address, amount_wei),
+            urgency=urgency
+        )
         
         return tx_hash.hex()
         
@@ -138,10 +121,13 @@ def burn_from_tokens(from_address, amount):
         print(f"❌ Ошибка при сжигании токенов: {str(e)}")
         raise e
 
-def pause_token():
+def pause_token(urgency='normal'):
     """
     Приостановить переводы токенов (только для владельца)
     
+    Args:
+        urgency (str): Срочность комиссии: slow, normal или fast
+    
     Returns:
         str: Хеш транзакции
     """
@@ -152,24 +138,11 @@ def pause_token():
         raise ValueError("Приватный ключ не настроен в .env")
     
     try:
-        # Получаем nonce
-        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = token_v2_contract.functions.pause().build_transaction({
-            'from': wallet_address,
-            'nonce': nonce,
-            'gas': 100000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            token_v2_contract.functions.pause(),
+            urgency=urgency
+        )
         
         return tx_hash.hex()
         
@@ -177,10 +150,13 @@ def pause_token():
         print(f"❌ Ошибка при приостановке токена: {str(e)}")
         raise e
 
-def unpause_token():
+def unpause_token(urgency='normal'):
     """
     Возобновить переводы токенов (только для владельца)
     
+    Args:
+        urgency (str): Срочность комиссии: slow, normal или fast
+    
     Returns:
         str: Хеш транзакции
     """
@@ -191,24 +167,11 @@ def unpause_token():
         raise ValueError("Приватный ключ не настроен в .env")
     
     try:
-        # Получаем nonce
-        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = token_v2_contract.functions.unpause().build_transaction({
-            'from': wallet_address,
-            'nonce': nonce,
-            'gas': 100000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            token_v2_contract.functions.unpause(),
+            urgency=urgency
+        )
         
         return tx_hash.hex()
         
@@ -216,13 +179,14 @@ def unpause_token():
         print(f"❌ Ошибка при возобновлении токена: {str(e)}")
         raise e
 
-def set_blacklist(address, status):
+def set_blacklist(address, status, urgency='normal'):
     """
     Добавить/удалить адрес из черного списка (только для владельца)
     
     Args:
         address (str): Адрес для изменения статуса
         status (bool): True - добавить в черный список, False - убрать
+        urgency (str): Срочность комиссии: slow, normal или fast
     
     Returns:
         str: Хеш транзакции
@@ -234,24 +198,11 @@ def set_blacklist(address, status):
         raise ValueError("Приватный ключ не настроен в .env")
     
     try:
-        # Получаем nonce
-        wallet_address = Web3.to_checksum_address(WALLET_ADDRESS)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        
-        # Строим транзакцию
-        transaction = token_v2_contract.functions.setBlacklist(address, status).build_transaction({
-            'from': wallet_address,
-            'nonce': nonce,
-            'gas': 100000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Подписываем транзакцию
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        
-        # Отправляем транзакцию
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            token_v2_contract.functions.setBlacklist(address, status),
+            urgency=urgency
+        )
         
         return tx_hash.hex()
         
@@ -259,6 +210,116 @@ def set_blacklist(address, status):
         print(f"❌ Ошибка при изменении черного списка: {str(e)}")
         raise e
 
+def get_blacklist_statuses(addresses, chunk_size=500):
+    """
+    Проверить статус многих адресов в черном списке пакетными чтениями
+    
+    Все чанки читаются на одном блоке, поэтому результат согласован.
+    
+    Args:
+        addresses (list): Адреса для проверки
+        chunk_size (int): Количество адресов в одном multicall
+    
+    Returns:
+        dict: Адрес -> True если в черном списке
+    """
+    if not token_v2_contract:
+        raise ValueError("Улучшенный токен не настроен")
+    
+    statuses = {}
+    block_identifier = 'latest'
+    for i in range(0, len(addresses), chunk_size):
+        chunk = addresses[i:i + chunk_size]
+        block, results = batch_read(
+            [prepare_call(token_v2_contract, 'getBlacklistStatus', address) for address in chunk],
+            block_identifier
+        )
+        block_identifier = block["number"]
+        statuses.update(zip(chunk, results))
+    return statuses
+
+def batch_set_blacklist(addresses, status, block_share=0.25, urgency='normal', wait=True):
+    """
+    Изменить статус многих адресов в черном списке через batchSetBlacklist
+    
+    Адреса, статус которых уже совпадает, пропускаются. Остальные делятся
+    на чанки так, чтобы транзакция занимала не больше block_share лимита газа
+    блока. Чанки отправляются подряд с последовательными nonce без ожидания
+    подтверждения предыдущих.
+    
+    Args:
+        addresses (list): Адреса для изменения статуса
+        status (bool): True - добавить в черный список, False - убрать
+        block_share (float): Доля лимита газа блока на одну транзакцию
+        urgency (str): Срочность комиссии: slow, normal или fast
+        wait (bool): Дождаться подтверждения всех транзакций
+    
+    Returns:
+        dict: skipped (уже в нужном статусе), changed, chunk_size, tx_hashes
+            и results (если wait=True)
+
+    Raises:
+        BatchSendError: Если отправка чанка не удалась; содержит хеши уже
+            отправленных чанков и адреса, которые еще не отправлены
+    """
+    if not token_v2_contract:
+        raise ValueError("Улучшенный токен не настроен")
+    
+    if not PRIVATE_KEY or PRIVATE_KEY == 'your_private_key':
+        raise ValueError("Приватный ключ не настроен в .env")
+    
+    try:
+        # Проверяем адреса и убираем повторы, сохраняя порядок
+        unique = list(dict.fromkeys(Web3.to_checksum_address(address) for address in addresses))
+        
+        # Пропускаем адреса, статус которых уже совпадает
+        statuses = get_blacklist_statuses(unique)
+        pending = [address for address in unique if statuses[address] != status]
+        result = {"skipped": len(unique) - len(pending), "changed": len(pending), "chunk_size": 0, "tx_hashes": []}
+        if not pending:
+            return result
+        
+        # Газ на один адрес оцениваем по пробному чанку
+        engine = get_engine()
+        probe = pending[:min(len(pending), 20)]
+        probe_gas = token_v2_contract.functions.batchSetBlacklist(probe, status).estimate_gas({'from': engine.address})
+        gas_per_address = probe_gas / len(probe)
+        block_gas_limit = w3.eth.get_block('latest')['gasLimit']
+        chunk_size = max(1, int(block_gas_limit * block_share / (gas_per_address * engine.gas_profile.margin)))
+        result["chunk_size"] = chunk_size
+        
+        # Отправляем чанки подряд: nonce резервируются локально.
+        # Лимит газа считаем из пробной оценки этого запуска, а не из профиля:
+        # все адреса в pending меняют статус, то есть идут по дорогому пути
+        for i in range(0, len(pending), chunk_size):
+            chunk = pending[i:i + chunk_size]
+            chunk_gas = int(max(probe_gas, gas_per_address * len(chunk)) * engine.gas_profile.margin)
+            try:
+                tx_hash = engine.send(
+                    token_v2_contract.functions.batchSetBlacklist(chunk, status),
+                    gas=chunk_gas,
+                    urgency=urgency
+                )
+            except Exception as e:
+                # Предыдущие чанки уже в сети: сообщаем, какие адреса отправлены
+                raise BatchSendError(
+                    f"чанк {i}-{i + len(chunk)} из {len(pending)} адресов не отправлен "
+                    f"(отправлено транзакций: {len(result['tx_hashes'])}): {e}",
+                    tx_hashes=result["tx_hashes"],
+                    sent_addresses=pending[:i],
+                    failed_chunk=(i, i + len(chunk)),
+                    remaining_addresses=pending[i:]
+                ) from e
+            result["tx_hashes"].append(tx_hash.hex())
+        
+        if wait:
+            result["results"] = get_tracker().wait_all(result["tx_hashes"])
+        return result
+        
+    except Exception as e:
+        print(f"❌ Ошибка при пакетном изменении черного списка: {str(e)}")
+        raise e
+
 def get_token_info():
     """
     Получить информацию о токене
@@ -4,7 +4,9 @@
 """
 
 from web3 import Web3
-from config import w3, token_contract, WALLET_ADDRESS, PRIVATE_KEY, PRESALE_ADDRESS
+from config import token_contract, WALLET_ADDRESS, PRESALE_ADDRESS
+from tx_engine import get_engine
+from receipt_tracker import get_tracker
 import os
 from dotenv import load_dotenv
 
@@ -38,32 +40,18 @@ def transfer_tokens_to_presale(amount):
             print(f"❌ Недостаточно токенов. Доступно: {balance_human:,.0f}")
             return
         
-        # Строим транзакцию
-        nonce = w3.eth.get_transaction_count(wallet_address_checksum)
-        
-        # Получаем gas price
-        gas_price = w3.eth.gas_price
-        
-        # Строим транзакцию
-        transaction = token_contract.functions.transfer(
-            Web3.to_checksum_address(PRESALE_ADDRESS),
-            amount_wei
-        ).build_transaction({
-            'from': Web3.to_checksum_address(WALLET_ADDRESS),
-            'nonce': nonce,
-            'gas': 200000,
-            'gasPrice': gas_price
-        })
-        
-        # Подписываем и отправляем
-        private_key_with_0x = f"0x{PRIVATE_KEY}" if not PRIVATE_KEY.startswith('0x') else PRIVATE_KEY
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key_with_0x)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # Собираем, подписываем и отправляем через общий конвейер
+        tx_hash = get_engine().send(
+            token_contract.functions.transfer(
+                Web3.to_checksum_address(PRESALE_ADDRESS),
+                amount_wei
+            )
+        )
         
         print(f"⏳ Транзакция отправлена: {tx_hash.hex()}")
         
         # Ждем подтверждения
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = get_tracker().track(tx_hash).result()
         
         if receipt.status == 1:
             print("✅ Токены успешно переведены на пресейл!")
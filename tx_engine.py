@@ -0,0 +1,184 @@
+import os
+import threading
+import time
+from fee_oracle import URGENCIES, FeeOracle
+from gas_profile import GasProfile, bool_variant
+from nonce_manager import get_nonce_manager
+
+# Сколько секунд переиспользовать цену газа legacy транзакций (примерно время блока Polygon)
+FEE_CACHE_SECONDS = float(os.getenv('FEE_CACHE_SECONDS', '2'))
+
+STAGES = ('nonce', 'fees', 'build', 'gas', 'sign', 'send')
+
+def is_method_not_found(error):
+    msg = str(error).lower()
+    return ("-32601" in msg) or ("method not found" in msg)
+
+class TransactionEngine:
+    """
+    Общий конвейер отправки транзакций: nonce -> комиссия -> сборка -> подпись -> отправка
+
+    Аккаунт подписанта создается из приватного ключа один раз, chain id
+    запрашивается один раз, комиссии EIP-1559 берутся из FeeOracle и
+    переиспользуются в пределах блока, лимит газа берется из GasProfile.
+    Хуки получают длительность каждого этапа.
+    """
+
+    def __init__(self, w3, private_key, fee_cache_seconds=FEE_CACHE_SECONDS):
+        from eth_account import Account
+
+        if not private_key or private_key == 'your_private_key':
+            raise ValueError("Приватный ключ не настроен в .env")
+        key = private_key if private_key.startswith('0x') else f"0x{private_key}"
+
+        self.w3 = w3
+        self.account = Account.from_key(key)
+        self.address = self.account.address
+        self.nonces = get_nonce_manager(w3)
+        self.fee_cache_seconds = fee_cache_seconds
+        self.fee_oracle = FeeOracle(w3)
+        self.gas_profile = GasProfile(w3)
+        # Сеть без eth_feeHistory: отправляем legacy транзакции с gasPrice
+        self.legacy_fees = False
+        self.hooks = []
+        self._lock = threading.Lock()
+        self._chain_id = None
+        self._gas_price = None
+        self._gas_price_at = 0.0
+
+    def add_hook(self, hook):
+        """
+        Подписаться на длительность этапов
+
+        Args:
+            hook (callable): hook(stage, seconds), stage из STAGES
+        """
+        self.hooks.append(hook)
+
+    def _emit(self, stage, seconds):
+        for hook in self.hooks:
+            hook(stage, seconds)
+
+    def _timed(self, stage, fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        self._emit(stage, time.perf_counter() - started)
+        return result
+
+    @property
+    def chain_id(self):
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+
+    def gas_price(self):
+        """
+        Цена газа, закэшированная на FEE_CACHE_SECONDS
+
+        Returns:
+            int: Цена газа в wei
+        """
+        with self._lock:
+            if self._gas_price is None or time.monotonic() - self._gas_price_at > self.fee_cache_seconds:
+                self._gas_price = self.w3.eth.gas_price
+                self._gas_price_at = time.monotonic()
+            return self._gas_price
+
+    def fee_fields(self, urgency='normal'):
+        """
+        Поля комиссии для транзакции
+
+        Args:
+            urgency (str): Срочность: slow, normal или fast
+
+        Returns:
+            dict: maxFeePerGas и maxPriorityFeePerGas, либо gasPrice, если
+                сеть не поддерживает eth_feeHistory
+        """
+        if urgency not in URGENCIES:
+            raise ValueError(f"Неизвестная срочность: {urgency}. Доступно: {', '.join(URGENCIES)}")
+        if not self.legacy_fees:
+            try:
+                return self.fee_oracle.fees(urgency)
+            except Exception as e:
+                # Сетевые ошибки и лимиты не повод навсегда переходить на gasPrice
+                if not is_method_not_found(e):
+                    raise
+                print(f"⚠️ eth_feeHistory недоступен ({e}), используем gasPrice")
+                self.legacy_fees = True
+        return {'gasPrice': self.gas_price()}
+
+    def prepare(self, call, nonce, gas=None, value=0, urgency='normal'):
+        """
+        Собрать и подписать транзакцию без отправки
+
+        Args:
+            call: Вызов функции контракта (contract.functions.fn(...))
+            nonce (int): Nonce транзакции
+            gas (int): Лимит газа. Если None - оценка из GasProfile
+            value (int): Сумма в wei
+            urgency (str): Срочность: slow, normal или fast
+
+        Returns:
+            SignedTransaction: Подписанная транзакция
+        """
+        fees = self._timed('fees', self.fee_fields, urgency)
+        params = {
+            'from': self.address,
+            'nonce': nonce,
+            # Явный gas не дает build_transaction вызывать estimate_gas, лимит подставляется ниже
+            'gas': gas or 0,
+            'chainId': self.chain_id,
+            'value': value,
+            **fees
+        }
+        transaction = self._timed('build', call.build_transaction, params)
+        if not gas:
+            transaction['gas'] = self._timed('gas', self.gas_profile.gas_limit, transaction, bool_variant(call))
+        return self._timed('sign', self.account.sign_transaction, transaction)
+
+    def send_signed(self, signed):
+        """
+        Отправить подписанную транзакцию
+
+        Returns:
+            HexBytes: Хеш транзакции
+        """
+        return self._timed('send', self.w3.eth.send_raw_transaction, signed.raw_transaction)
+
+    def send(self, call, gas=None, value=0, urgency='normal'):
+        """
+        Собрать, подписать и отправить транзакцию
+
+        Args:
+            call: Вызов функции контракта (contract.functions.fn(...))
+            gas (int): Лимит газа. Если None - оценка из GasProfile
+            value (int): Сумма в wei
+            urgency (str): Срочность: slow, normal или fast
+
+        Returns:
+            HexBytes: Хеш транзакции
+        """
+        started = time.perf_counter()
+        with self.nonces.reserve(self.address) as reservation:
+            self._emit('nonce', time.perf_counter() - started)
+            signed = self.prepare(call, reservation.nonce, gas, value, urgency)
+            reservation.broadcasting()
+            return self.send_signed(signed)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """
+    Получить общий TransactionEngine для кошелька из .env
+
+    Returns:
+        TransactionEngine: Конвейер отправки транзакций
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from config import w3, PRIVATE_KEY
+            _engine = TransactionEngine(w3, PRIVATE_KEY)
+        return _engine
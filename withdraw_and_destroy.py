@@ -4,7 +4,9 @@
 """
 
 from web3 import Web3
-from config import w3, presale_contract, WALLET_ADDRESS, PRIVATE_KEY
+from config import w3, presale_contract, token_contract, WALLET_ADDRESS
+from tx_engine import get_engine
+from receipt_tracker import get_tracker
 import os
 
 def withdraw_and_destroy():
@@ -45,38 +47,48 @@ def withdraw_and_destroy():
         except Exception as e:
             print(f"⚠️ Не удалось проверить ваш вклад: {e}")
         
-        # Возвращаем средства (если пресейл еще не закончился)
+        # Проверяем нераспроданные токены на пресейле
+        unsold = 0
+        if token_contract:
+            try:
+                unsold = token_contract.functions.balanceOf(presale_address).call()
+                print(f"🪙 Нераспроданные токены: {Web3.from_wei(unsold, 'ether')} ALIEN")
+            except Exception as e:
+                print(f"⚠️ Не удалось проверить токены пресейла: {e}")
+        
+        # Отправляем withdrawFunds и withdrawUnsoldTokens подряд с последовательными
+        # nonce и ждем подтверждения обеих транзакций вместе
+        steps = []
         if balance > 0:
-            print("\n🔄 Возврат средств...")
-            
-            nonce = w3.eth.get_transaction_count(WALLET_ADDRESS)
-            
-            # Пытаемся вызвать withdrawFunds
+            steps.append(("возврат средств", presale_contract.functions.withdrawFunds()))
+        if unsold > 0:
+            steps.append(("возврат нераспроданных токенов", presale_contract.functions.withdrawUnsoldTokens()))
+        
+        engine = get_engine()
+        sent = []
+        for label, call in steps:
+            print(f"\n🔄 Отправка: {label}...")
             try:
-                tx = presale_contract.functions.withdrawFunds().build_transaction({
-                    'from': WALLET_ADDRESS,
-                    'nonce': nonce,
-                    'gas': 200000,
-                    'gasPrice': w3.eth.gas_price
-                })
+                # Nonce резервируется локально, вторая транзакция не ждет первую
+                tx_hash = engine.send(call)
                 
-                signed_tx = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
-                tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-                
-                print(f"🚀 Транзакция возврата отправлена: {tx_hash.hex()}")
+                print(f"🚀 Транзакция отправлена: {tx_hash.hex()}")
                 print(f"🔗 Polygonscan: https://polygonscan.com/tx/{tx_hash.hex()}")
-                
-                receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-                
-                if receipt.status == 1:
-                    print("✅ Средства успешно возвращены!")
-                else:
-                    print("❌ Транзакция возврата не прошла")
-                    
+                sent.append((label, tx_hash))
             except Exception as e:
-                print(f"❌ Ошибка возврата средств: {e}")
+                print(f"❌ Ошибка ({label}): {e}")
                 print("💡 Возможно, пресейл еще не закончился")
         
+        # Квитанции обеих транзакций ожидаются одним циклом опроса
+        receipts = get_tracker().wait_all([tx_hash for _, tx_hash in sent])
+        for (label, tx_hash), receipt in zip(sent, receipts):
+            if isinstance(receipt, Exception):
+                print(f"⚠️ Не дождались подтверждения ({label}): {receipt}")
+            elif receipt.status == 1:
+                print(f"✅ Успешно: {label}")
+            else:
+                print(f"❌ Транзакция не прошла: {label}")
+        
         print("\n🗑️ Пресейл готов к удалению!")
         print("📝 Для полного удаления нужно:")
         print("1. Дождаться окончания пресейла")